@@ -0,0 +1,50 @@
+"""Numba kernels for ExplorationMap hot paths.
+
+Importing this module requires numba; bot.exploration_map falls back to
+its pure-Python implementation when the import fails.
+"""
+
+from numba import njit
+
+
+@njit(cache=True, boundscheck=False)
+def update_kernel(bits, anchor_y_lut, anchor_x_lut, x, y, map_id, pad2, ymax, xmax):
+    """Set the packed bit for a local position; returns True if it was new."""
+    ay = anchor_y_lut[map_id]
+    ax = anchor_x_lut[map_id]
+    gx = ax + x + pad2
+    gy = ymax + 1 - (ay - y + pad2)
+    if gy < 0:
+        gy = 0
+    elif gy > ymax:
+        gy = ymax
+    if gx < 0:
+        gx = 0
+    elif gx > xmax:
+        gx = xmax
+    byte = gx >> 3
+    mask = 1 << (gx & 7)
+    prev = bits[gy, byte]
+    bits[gy, byte] = prev | mask
+    return (prev & mask) == 0
+
+
+@njit(cache=True, boundscheck=False)
+def get_local_view_kernel(bits, global_y, global_x, radius, width, out):
+    """Expand the (2*radius, 2*radius) window centred on a global position into out.
+
+    bits is the packed map (one bit per cell, little-endian per byte); each
+    cell becomes 0 or 255. Cells outside the map are zero-filled. out must be at least
+    (2*radius, 2*radius); the filled region is returned as a view of it.
+    """
+    height = bits.shape[0]
+    size = radius * 2
+    for i in range(size):
+        gy = global_y - radius + i
+        for j in range(size):
+            gx = global_x - radius + j
+            if 0 <= gy < height and 0 <= gx < width:
+                out[i, j] = 255 if (bits[gy, gx >> 3] >> (gx & 7)) & 1 else 0
+            else:
+                out[i, j] = 0
+    return out[:size, :size]
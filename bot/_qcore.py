@@ -0,0 +1,64 @@
+"""Numba kernels for the QLearningAgent hot path.
+
+Importing this module requires numba; bot.q_learning falls back to its
+pure-Python/NumPy implementation when the import fails.
+"""
+
+from numba import njit
+
+
+@njit(cache=True, fastmath=True)
+def td_update(Q, visited, s, a, r, ns, done, alpha, gamma):
+    """Apply one Q-learning update in place; returns the new Q(s, a).
+    
+    The bootstrap target is the max over next-state actions that have
+    been updated so far (0.0 if none, or if done).
+    """
+    max_next = 0.0
+    if not done:
+        found = False
+        for j in range(Q.shape[1]):
+            if visited[ns, j] and (not found or Q[ns, j] > max_next):
+                max_next = Q[ns, j]
+                found = True
+    current = Q[s, a]
+    new_q = current + alpha * (r + gamma * max_next - current)
+    Q[s, a] = new_q
+    visited[s, a] = True
+    return new_q
+
+
+@njit(cache=True)
+def eps_greedy(Q, visited, s, mask, eps, rand1, rand2):
+    """Epsilon-greedy action choice over the actions enabled in mask.
+    
+    rand1 and rand2 are pre-drawn uniforms in [0, 1): rand1 decides
+    explore vs exploit, rand2 picks the random action.
+    
+    Returns:
+        (action_index, is_exploration), or (-1, True) if mask is empty
+    """
+    n_available = 0
+    known = False
+    for j in range(mask.shape[0]):
+        if mask[j]:
+            n_available += 1
+        if visited[s, j]:
+            known = True
+    if n_available == 0:
+        return -1, True
+    
+    if rand1 < eps or not known:
+        # Uniform pick among enabled actions
+        k = int(rand2 * n_available)
+        for j in range(mask.shape[0]):
+            if mask[j]:
+                if k == 0:
+                    return j, True
+                k -= 1
+    
+    best = -1
+    for j in range(mask.shape[0]):
+        if mask[j] and (best < 0 or Q[s, j] > Q[s, best]):
+            best = j
+    return best, False
@@ -0,0 +1,48 @@
+"""Numba kernels for ScreenExplorer frame hashing.
+
+Importing this module requires numba; bot.screen_explorer falls back to
+its NumPy implementation when the import fails.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def dhash_kernel(frame):
+    """64-bit difference hash of an (H, W, C) uint8 frame.
+    
+    Same bits as screen_explorer._dhash over the channel sums: horizontal
+    gradient signs of the 8x9 block means, compared as integer sums.
+    """
+    height, width, channels = frame.shape
+    h = height // 8
+    w = width // 9
+    sums = np.zeros((8, 9), dtype=np.int64)
+    for i in range(8 * h):
+        bi = i // h
+        for j in range(9 * w):
+            total = np.int64(0)
+            for c in range(channels):
+                total += frame[i, j, c]
+            sums[bi, j // w] += total
+    
+    out = np.uint64(0)
+    for bi in range(8):
+        for bj in range(8):
+            bit = 1 if sums[bi, bj + 1] > sums[bi, bj] else 0
+            out = (out << np.uint64(1)) | np.uint64(bit)
+    return out
+
+
+@njit(cache=True)
+def frame_hash_kernel(frame, step):
+    """FNV-1a hash of every step-th pixel of an (H, W, C) uint8 frame."""
+    h = np.uint64(14695981039346656037)
+    prime = np.uint64(1099511628211)
+    height, width, channels = frame.shape
+    for i in range(0, height, step):
+        for j in range(0, width, step):
+            for c in range(channels):
+                h = (h ^ np.uint64(frame[i, j, c])) * prime
+    return h
@@ -0,0 +1,34 @@
+"""Numba kernels for SessionStats aggregation.
+
+Importing this module requires numba; bot.session_stats falls back to its
+NumPy implementation when the import fails.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def summarize_kernel(total_reward, badges, deaths):
+    """One pass over the summary columns (all the same non-zero length).
+
+    Returns:
+        (reward_sum, reward_max, badges_sum, badges_max, deaths_max)
+    """
+    reward_sum = 0.0
+    reward_max = total_reward[0]
+    badges_sum = np.int64(0)
+    badges_max = badges[0]
+    deaths_max = deaths[0]
+    for i in range(total_reward.shape[0]):
+        r = total_reward[i]
+        reward_sum += r
+        if r > reward_max:
+            reward_max = r
+        b = badges[i]
+        badges_sum += np.int64(b)
+        if b > badges_max:
+            badges_max = b
+        if deaths[i] > deaths_max:
+            deaths_max = deaths[i]
+    return reward_sum, reward_max, badges_sum, badges_max, deaths_max
@@ -3,11 +3,108 @@
 Automatically saves Q-table, statistics, and best models at regular intervals.
 """
 
+import hashlib
 import json
+import os
+import re
 import shutil
+import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+from core.serialization import dumps_compact
+
+# Checkpoint directory names embed the step and a sortable timestamp:
+#   checkpoint_step{step}_ep{episode}_{YYYYmmdd_HHMMSS}
+#   best_{reason}_step{step}_{YYYYmmdd_HHMMSS}
+_CHECKPOINT_NAME_RE = re.compile(r"step(\d+)_(?:ep\d+_)?(\d{8}_\d{6})$")
+
+# Larger buffer for the read/write fallback path of shutil.copyfile
+shutil.COPY_BUFSIZE = max(shutil.COPY_BUFSIZE, 256 * 1024)
+
+# Write buffer for checkpoint JSON files
+_WRITE_BUFFER = 256 * 1024
+
+
+def _copy_file(src: Path, dest: Path):
+    """Copy file contents without preserving metadata.
+    
+    Tries ``os.copy_file_range`` first (reflink/server-side copy on
+    filesystems that support it), then falls back to ``shutil.copyfile``,
+    which uses ``sendfile``/``CopyFileExW`` zero-copy where available.
+    
+    Args:
+        src: Source file
+        dest: Destination file
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return
+        except OSError:
+            pass
+    
+    shutil.copyfile(src, dest)
+
+
+def _file_digest(path: Path) -> str:
+    """Return a short BLAKE2b hex digest of a file's contents."""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+        digest = hashlib.blake2b(digest_size=16)
+        for chunk in iter(lambda: f.read(shutil.COPY_BUFSIZE), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def _fast_rmtree(paths: List[Path]) -> List[subprocess.Popen]:
+    """Delete directory trees without waiting for the removal to finish.
+    
+    Uses a single ``rm -rf`` call for all paths on POSIX and ``rd /s /q``
+    on Windows. Falls back to ``shutil.rmtree`` if no shell tool is available.
+    
+    Args:
+        paths: Directories to remove
+        
+    Returns:
+        List of spawned removal processes (empty if removed synchronously)
+    """
+    if not paths:
+        return []
+    
+    try:
+        if os.name == "posix" and shutil.which("rm"):
+            return [subprocess.Popen(
+                ["rm", "-rf", "--", *map(str, paths)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )]
+        if os.name == "nt":
+            return [
+                subprocess.Popen(
+                    ["cmd", "/c", "rd", "/s", "/q", str(path)],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                for path in paths
+            ]
+    except OSError:
+        pass
+    
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+    return []
 
 
 class CheckpointManager:
@@ -29,6 +126,7 @@ class CheckpointManager:
             enabled: Whether checkpointing is enabled
         """
         self.checkpoint_dir = Path(checkpoint_dir)
+        self._checkpoint_dir_str = os.fspath(self.checkpoint_dir)  # For os.path fast paths
         self.save_interval = save_interval
         self.keep_best = keep_best
         self.enabled = enabled
@@ -36,11 +134,54 @@ class CheckpointManager:
         self.last_checkpoint_step = 0
         self.best_scores: list = []  # List of (score, checkpoint_path) tuples
         
+        # Single background worker for all disk I/O (keeps writes ordered)
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-io")
+        self._rm_procs: List[subprocess.Popen] = []  # Detached checkpoint removals
+        self._closed = False
+        
+        # All known checkpoints as (step, path), oldest first
+        self._all_checkpoints: List[Tuple[int, Path]] = []
+        self._index_lock = threading.Lock()
+        
+        # Last backup of each Q-table file and its digest, keyed by file
+        # name (I/O worker only), so an unchanged file can be hardlinked
+        # instead of copied
+        self._last_q_hash: Dict[str, str] = {}
+        self._last_q_backup: Dict[str, str] = {}
+        
         if self.enabled:
             self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            self._scan_checkpoints()
             print(f"💾 Checkpoint system enabled: {self.checkpoint_dir}")
             print(f"   Auto-save every {save_interval} steps")
     
+    def _scan_checkpoints(self):
+        """Populate the checkpoint index from existing directories."""
+        self._all_checkpoints = self._list_checkpoint_dirs()
+    
+    def _list_checkpoint_dirs(self) -> List[Tuple[int, Path]]:
+        """List checkpoint directories on disk, oldest first.
+        
+        Ordering comes from the timestamp and step embedded in each
+        directory name, so no per-directory stat() is needed.
+        Directories whose names don't parse as checkpoints are ignored.
+        
+        Returns:
+            List of (step, path) tuples
+        """
+        found = []
+        with os.scandir(self.checkpoint_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                match = _CHECKPOINT_NAME_RE.search(entry.name)
+                if match:
+                    step, timestamp = int(match.group(1)), match.group(2)
+                    found.append((timestamp, step, Path(entry.path)))
+        
+        found.sort(key=lambda x: (x[0], x[1]))
+        return [(step, path) for _, step, path in found]
+    
     def should_checkpoint(self, current_step: int) -> bool:
         """Check if checkpoint should be saved.
         
@@ -59,7 +200,7 @@ class CheckpointManager:
         self,
         step: int,
         episode: int,
-        q_table_path: Optional[Path] = None,
+        q_table_files: Sequence[Path] = (),
         stats: Optional[Dict[str, Any]] = None,
         score: float = 0.0,
         is_best: bool = False
@@ -69,7 +210,7 @@ class CheckpointManager:
         Args:
             step: Current step number
             episode: Current episode number
-            q_table_path: Path to Q-table file to backup
+            q_table_files: Agent files to back up (see policy.get_q_table_files)
             stats: Statistics dictionary to save
             score: Score for this checkpoint (for best tracking)
             is_best: Whether this is explicitly marked as best
@@ -79,21 +220,11 @@ class CheckpointManager:
         
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         checkpoint_name = f"checkpoint_step{step}_ep{episode}_{timestamp}"
-        checkpoint_path = self.checkpoint_dir / checkpoint_name
-        checkpoint_path.mkdir(parents=True, exist_ok=True)
+        checkpoint_dir = os.path.join(self._checkpoint_dir_str, checkpoint_name)
+        checkpoint_path = Path(checkpoint_dir)
         
-        # Save Q-table backup
-        if q_table_path and q_table_path.exists():
-            dest = checkpoint_path / "q_table.pkl"
-            shutil.copy2(q_table_path, dest)
-        
-        # Save statistics
-        if stats:
-            stats_file = checkpoint_path / "stats.json"
-            with open(stats_file, 'w') as f:
-                json.dump(stats, f, indent=2)
-        
-        # Save checkpoint metadata
+        # Snapshot stats and metadata now; disk writes happen in the background
+        stats_json = dumps_compact(stats) if stats else None
         metadata = {
             'step': step,
             'episode': episode,
@@ -101,25 +232,27 @@ class CheckpointManager:
             'score': score,
             'is_best': is_best,
         }
-        
-        metadata_file = checkpoint_path / "metadata.json"
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        metadata_json = json.dumps(metadata, indent=2)
         
         self.last_checkpoint_step = step
+        with self._index_lock:
+            self._all_checkpoints.append((step, checkpoint_path))
+        
+        self._io_pool.submit(
+            self._do_save, checkpoint_dir, tuple(q_table_files), stats_json, metadata_json,
+            f"💾 Checkpoint saved: {checkpoint_name}"
+        )
         
         # Track best checkpoints
         if is_best or score > 0:
-            self._update_best_checkpoints(score, checkpoint_path)
-        
-        print(f"💾 Checkpoint saved: {checkpoint_name}")
+            self._io_pool.submit(self._update_best_checkpoints, score, checkpoint_path)
     
     def save_best_checkpoint(
         self,
         step: int,
         episode: int,
         score: float,
-        q_table_path: Optional[Path] = None,
+        q_table_files: Sequence[Path] = (),
         stats: Optional[Dict[str, Any]] = None,
         reason: str = ""
     ):
@@ -129,7 +262,7 @@ class CheckpointManager:
             step: Current step number
             episode: Current episode number
             score: Score for this checkpoint
-            q_table_path: Path to Q-table file
+            q_table_files: Agent files to back up (see policy.get_q_table_files)
             stats: Statistics dictionary
             reason: Reason for best checkpoint (e.g., "highest_reward")
         """
@@ -138,22 +271,14 @@ class CheckpointManager:
         
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         checkpoint_name = f"best_{reason}_step{step}_{timestamp}"
-        checkpoint_path = self.checkpoint_dir / checkpoint_name
-        checkpoint_path.mkdir(parents=True, exist_ok=True)
-        
-        # Save Q-table
-        if q_table_path and q_table_path.exists():
-            dest = checkpoint_path / "q_table.pkl"
-            shutil.copy2(q_table_path, dest)
+        checkpoint_dir = os.path.join(self._checkpoint_dir_str, checkpoint_name)
+        checkpoint_path = Path(checkpoint_dir)
         
-        # Save stats
+        # Snapshot stats and metadata now; disk writes happen in the background
+        stats_json = None
         if stats:
-            stats_file = checkpoint_path / "stats.json"
             enhanced_stats = {**stats, 'reason': reason, 'score': score}
-            with open(stats_file, 'w') as f:
-                json.dump(enhanced_stats, f, indent=2)
-        
-        # Save metadata
+            stats_json = dumps_compact(enhanced_stats)
         metadata = {
             'step': step,
             'episode': episode,
@@ -162,18 +287,125 @@ class CheckpointManager:
             'reason': reason,
             'is_best': True,
         }
+        metadata_json = json.dumps(metadata, indent=2)
+        
+        with self._index_lock:
+            self._all_checkpoints.append((step, checkpoint_path))
+        
+        self._io_pool.submit(
+            self._do_save, checkpoint_dir, tuple(q_table_files), stats_json, metadata_json,
+            f"🏆 Best checkpoint saved: {checkpoint_name} (score: {score:.1f})"
+        )
+        self._io_pool.submit(self._update_best_checkpoints, score, checkpoint_path)
+    
+    def _do_save(
+        self,
+        checkpoint_dir: str,
+        q_table_files: Tuple[Path, ...],
+        stats_json: Optional[bytes],
+        metadata_json: str,
+        message: str
+    ):
+        """Write a checkpoint to disk (runs on the I/O worker thread).
+        
+        Uses plain os.path strings rather than Path objects throughout.
+        
+        Args:
+            checkpoint_dir: Checkpoint directory to create
+            q_table_files: Agent files to back up under their own names
+            stats_json: Pre-serialized compact statistics (or None)
+            metadata_json: Pre-serialized metadata
+            message: Message to print once the checkpoint is written
+        """
+        try:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            
+            # Save Q-table backup
+            for q_file in q_table_files:
+                q_file = os.fspath(q_file)
+                if os.path.exists(q_file):
+                    self._backup_q_table(
+                        q_file, os.path.join(checkpoint_dir, os.path.basename(q_file))
+                    )
+            
+            # Save statistics
+            if stats_json:
+                stats_file = os.path.join(checkpoint_dir, "stats.json")
+                with open(stats_file, 'wb', buffering=_WRITE_BUFFER) as f:
+                    f.write(stats_json)
+            
+            # Save checkpoint metadata
+            metadata_file = os.path.join(checkpoint_dir, "metadata.json")
+            with open(metadata_file, 'w') as f:
+                f.write(metadata_json)
+            
+            print(message)
+        except Exception as e:
+            print(f"⚠️  Failed to save checkpoint {os.path.basename(checkpoint_dir)}: {e}")
+    
+    def _backup_q_table(self, q_table_path: str, dest: str):
+        """Back up a Q-table file, hardlinking its previous backup if unchanged.
+        
+        Args:
+            q_table_path: Q-table file to back up
+            dest: Backup file to create
+        """
+        name = os.path.basename(q_table_path)
+        q_hash = _file_digest(q_table_path)
+        
+        linked = False
+        last_backup = self._last_q_backup.get(name)
+        if q_hash == self._last_q_hash.get(name) and last_backup is not None:
+            try:
+                os.link(last_backup, dest)
+                linked = True
+            except OSError:
+                pass  # Previous backup removed, cross-device, or no hardlink support
+        
+        if not linked:
+            _copy_file(q_table_path, dest)
+        
+        self._last_q_hash[name] = q_hash
+        self._last_q_backup[name] = dest
+    
+    def flush(self):
+        """Block until all pending checkpoint writes have finished."""
+        if self._closed:
+            return  # close() already waited for them
+        self._io_pool.submit(lambda: None).result()
+    
+    def close(self):
+        """Finish pending checkpoint writes and stop the I/O worker."""
+        self._closed = True
+        self._io_pool.shutdown(wait=True)
+        for proc in self._rm_procs:
+            proc.wait()
+        self._rm_procs.clear()
+    
+    def _remove_checkpoints(self, paths: List[Path]):
+        """Remove checkpoint directories in the background.
         
-        metadata_file = checkpoint_path / "metadata.json"
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        Args:
+            paths: Checkpoint directories to remove
+        """
+        if not paths:
+            return
         
-        self._update_best_checkpoints(score, checkpoint_path)
+        removed = set(paths)
+        with self._index_lock:
+            self._all_checkpoints = [
+                entry for entry in self._all_checkpoints if entry[1] not in removed
+            ]
         
-        print(f"🏆 Best checkpoint saved: {checkpoint_name} (score: {score:.1f})")
+        # Reap removals that have already finished
+        self._rm_procs = [proc for proc in self._rm_procs if proc.poll() is None]
+        self._rm_procs.extend(_fast_rmtree(paths))
     
     def _update_best_checkpoints(self, score: float, checkpoint_path: Path):
         """Update list of best checkpoints and clean up old ones.
         
+        Runs on the I/O worker so removals happen after pending saves.
+        
         Args:
             score: Score for the checkpoint
             checkpoint_path: Path to the checkpoint
@@ -184,14 +416,17 @@ class CheckpointManager:
         # Keep only top N best checkpoints
         if len(self.best_scores) > self.keep_best:
             # Remove checkpoints beyond keep_best limit
-            for _, old_path in self.best_scores[self.keep_best:]:
-                if old_path.exists() and not old_path.name.startswith('best_'):
-                    # Only auto-delete regular checkpoints, not explicitly marked best
-                    try:
-                        shutil.rmtree(old_path)
-                        print(f"🗑️  Removed old checkpoint: {old_path.name}")
-                    except Exception as e:
-                        print(f"⚠️  Failed to remove checkpoint {old_path}: {e}")
+            # Only auto-delete regular checkpoints, not explicitly marked best
+            old_paths = [
+                old_path for _, old_path in self.best_scores[self.keep_best:]
+                if old_path.exists() and not old_path.name.startswith('best_')
+            ]
+            try:
+                self._remove_checkpoints(old_paths)
+                for old_path in old_paths:
+                    print(f"🗑️  Removed old checkpoint: {old_path.name}")
+            except Exception as e:
+                print(f"⚠️  Failed to remove checkpoints {old_paths}: {e}")
             
             self.best_scores = self.best_scores[:self.keep_best]
     
@@ -204,23 +439,23 @@ class CheckpointManager:
         if not self.enabled:
             return
         
-        checkpoints = sorted(
-            [d for d in self.checkpoint_dir.iterdir() if d.is_dir()],
-            key=lambda x: x.stat().st_mtime,
-            reverse=True
-        )
+        self.flush()
+        checkpoints = [path for _, path in reversed(self._list_checkpoint_dirs())]
         
         # Keep best checkpoints and recent ones
         protected = set([path for _, path in self.best_scores])
         
+        old_paths = [
+            checkpoint for checkpoint in checkpoints[keep_recent:]
+            if checkpoint not in protected and not checkpoint.name.startswith('best_')
+        ]
+        
         removed_count = 0
-        for checkpoint in checkpoints[keep_recent:]:
-            if checkpoint not in protected and not checkpoint.name.startswith('best_'):
-                try:
-                    shutil.rmtree(checkpoint)
-                    removed_count += 1
-                except Exception as e:
-                    print(f"⚠️  Failed to remove {checkpoint}: {e}")
+        try:
+            self._remove_checkpoints(old_paths)
+            removed_count = len(old_paths)
+        except Exception as e:
+            print(f"⚠️  Failed to remove {old_paths}: {e}")
         
         if removed_count > 0:
             print(f"🗑️  Cleaned up {removed_count} old checkpoints")
@@ -231,18 +466,15 @@ class CheckpointManager:
         Returns:
             Path to latest checkpoint or None
         """
-        if not self.enabled or not self.checkpoint_dir.exists():
-            return None
-        
-        checkpoints = [
-            d for d in self.checkpoint_dir.iterdir()
-            if d.is_dir() and (d / "metadata.json").exists()
-        ]
-        
-        if not checkpoints:
+        if not self.enabled:
             return None
         
-        return max(checkpoints, key=lambda x: x.stat().st_mtime)
+        # Make sure the latest checkpoint has actually been written
+        self.flush()
+        with self._index_lock:
+            if not self._all_checkpoints:
+                return None
+            return self._all_checkpoints[-1][1]
     
     def get_best_checkpoint(self) -> Optional[Path]:
         """Get path to the best checkpoint.
@@ -250,6 +482,8 @@ class CheckpointManager:
         Returns:
             Path to best checkpoint or None
         """
+        # best_scores is updated by the I/O worker once a save lands
+        self.flush()
         if not self.best_scores:
             return None
         
@@ -261,6 +495,7 @@ class CheckpointManager:
         Returns:
             Dictionary with checkpoint stats
         """
+        self.flush()
         return {
             'enabled': self.enabled,
             'checkpoint_dir': str(self.checkpoint_dir),
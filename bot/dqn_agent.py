@@ -0,0 +1,304 @@
+"""Deep Q-Network agent for Pokemon Red.
+
+Drop-in alternative to the tabular QLearningAgent: same select_action /
+update / save_q_table / get_stats API, but Q-values come from a small MLP
+over a compact state feature vector, trained on minibatches sampled from
+a replay buffer. Requires PyTorch; bot.policy falls back to the tabular
+agent when it is not installed.
+"""
+
+import random
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.models import GameState
+
+try:
+    import torch
+    from torch import nn
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+# Map IDs are a single byte in Gen 1
+_NUM_MAPS = 256
+
+# Feature columns stored in the replay buffer: x, y, map_id, badges
+_NUM_FEATURES = 4
+
+
+if TORCH_AVAILABLE:
+    class _QNetwork(nn.Module):
+        """MLP over (x, y, badges) plus a learned map embedding."""
+        
+        def __init__(self, n_actions: int, hidden: int = 64, map_dim: int = 16):
+            super().__init__()
+            self.map_embedding = nn.Embedding(_NUM_MAPS, map_dim)
+            self.mlp = nn.Sequential(
+                nn.Linear(3 + map_dim, hidden),
+                nn.ReLU(),
+                nn.Linear(hidden, hidden),
+                nn.ReLU(),
+                nn.Linear(hidden, n_actions),
+            )
+        
+        def forward(self, features: "torch.Tensor") -> "torch.Tensor":
+            # Coordinates and badges are scaled to roughly [0, 1]
+            scalars = features[:, [0, 1, 3]] / features.new_tensor([255.0, 255.0, 8.0])
+            maps = self.map_embedding(features[:, 2].long())
+            return self.mlp(torch.cat([scalars, maps], dim=1))
+
+
+class DQNAgent:
+    """DQN agent with replay buffer and target network."""
+    
+    def __init__(
+        self,
+        actions: List[str],
+        lr: float = 1e-3,
+        gamma: float = 0.95,
+        epsilon: float = 0.2,
+        model_path: Optional[Path] = None,
+        buffer_size: int = 100_000,
+        batch_size: int = 64,
+        train_every: int = 4,
+        target_sync: int = 1_000,
+        save_interval: int = 10_000,
+        hidden: int = 64,
+        seed: Optional[int] = None,
+        device: Optional[str] = None
+    ):
+        """Initialize DQN agent.
+        
+        Args:
+            actions: List of available actions (e.g., ["UP", "DOWN", "A", "B"])
+            lr: Adam learning rate
+            gamma: Discount factor (0-1)
+            epsilon: Exploration rate (0-1)
+            model_path: Path to save/load network weights
+            buffer_size: Replay buffer capacity (transitions)
+            batch_size: Minibatch size per gradient step
+            train_every: Take one gradient step every N transitions
+            target_sync: Copy online weights to the target network every N gradient steps
+            save_interval: Save weights every N transitions
+            hidden: Width of the two hidden layers
+            seed: Seed for exploration and replay sampling
+            device: Torch device (defaults to CUDA when available)
+        """
+        if not TORCH_AVAILABLE:
+            raise ImportError("DQNAgent requires PyTorch (pip install torch)")
+        
+        self.actions = actions
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.train_every = train_every
+        self.target_sync = target_sync
+        self.save_interval = save_interval
+        
+        self._action_idx: Dict[str, int] = {a: i for i, a in enumerate(actions)}
+        self._mask_cache: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._rng = random.Random(seed)
+        self._np_rng = np.random.default_rng(seed)
+        
+        self.device = torch.device(device or ("cuda" if torch.cuda.is_available() else "cpu"))
+        self.online = _QNetwork(len(actions), hidden).to(self.device)
+        self.target = _QNetwork(len(actions), hidden).to(self.device)
+        self.target.load_state_dict(self.online.state_dict())
+        self.target.eval()
+        self.optimizer = torch.optim.Adam(self.online.parameters(), lr=lr)
+        
+        # Replay buffer as structure-of-arrays ring buffer
+        self._buf_states = np.zeros((buffer_size, _NUM_FEATURES), dtype=np.float32)
+        self._buf_next = np.zeros((buffer_size, _NUM_FEATURES), dtype=np.float32)
+        self._buf_actions = np.zeros(buffer_size, dtype=np.int64)
+        self._buf_rewards = np.zeros(buffer_size, dtype=np.float32)
+        self._buf_done = np.zeros(buffer_size, dtype=np.float32)
+        self._buf_pos = 0
+        self._buf_len = 0
+        
+        # Statistics
+        self.total_updates = 0
+        self.train_steps = 0
+        self.last_loss = 0.0
+        self.states_explored = set()
+        
+        # Load existing weights
+        if model_path and model_path.exists():
+            self.load_q_table()
+    
+    @staticmethod
+    def _features(state: GameState) -> Tuple[int, int, int, int]:
+        """Raw feature tuple for a state (normalized inside the network)."""
+        return (state.x, state.y, state.map_id, state.badges)
+    
+    def _action_mask(self, available_actions: List[str]) -> np.ndarray:
+        """Boolean mask over self.actions for a list of available actions."""
+        key = tuple(available_actions)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = np.zeros(len(self.actions), dtype=bool)
+            for action in available_actions:
+                if action in self._action_idx:
+                    mask[self._action_idx[action]] = True
+            self._mask_cache[key] = mask
+        return mask
+    
+    def select_action(
+        self,
+        state: GameState,
+        available_actions: Optional[List[str]] = None
+    ) -> Tuple[str, bool]:
+        """Select action using epsilon-greedy policy over network Q-values.
+        
+        Args:
+            state: Current game state
+            available_actions: Actions to choose from (defaults to all)
+        
+        Returns:
+            Tuple of (action, is_exploration)
+        """
+        if available_actions is None:
+            available_actions = self.actions
+        
+        features = self._features(state)
+        self.states_explored.add(features)
+        
+        if self._rng.random() < self.epsilon or self._buf_len < self.batch_size:
+            # Explore (also while the buffer is too small to have trained)
+            return self._rng.choice(available_actions), True
+        
+        with torch.no_grad():
+            x = torch.tensor([features], dtype=torch.float32, device=self.device)
+            q_values = self.online(x)[0].cpu().numpy()
+        
+        if available_actions is not self.actions:
+            mask = self._action_mask(available_actions)
+            if not mask.any():
+                return self._rng.choice(available_actions), True
+            q_values = np.where(mask, q_values, -np.inf)
+        return self.actions[int(q_values.argmax())], False
+    
+    def update(
+        self,
+        state: GameState,
+        action: str,
+        reward: float,
+        next_state: GameState,
+        done: bool
+    ):
+        """Store a transition and train on a replay minibatch every train_every steps.
+        
+        Args:
+            state: Previous state
+            action: Action taken
+            reward: Reward received
+            next_state: Current state after action
+            done: Whether episode is complete
+        """
+        pos = self._buf_pos
+        self._buf_states[pos] = self._features(state)
+        self._buf_next[pos] = self._features(next_state)
+        self._buf_actions[pos] = self._action_idx[action]
+        self._buf_rewards[pos] = reward
+        self._buf_done[pos] = float(done)
+        self._buf_pos = (pos + 1) % len(self._buf_rewards)
+        self._buf_len = min(self._buf_len + 1, len(self._buf_rewards))
+        
+        self.total_updates += 1
+        
+        if self._buf_len >= self.batch_size and self.total_updates % self.train_every == 0:
+            self._train_step()
+        
+        if self.model_path and self.total_updates % self.save_interval == 0:
+            self.save_q_table()
+    
+    def _train_step(self):
+        """One gradient step on a uniformly sampled minibatch."""
+        idx = self._np_rng.integers(0, self._buf_len, size=self.batch_size)
+        device = self.device
+        states = torch.from_numpy(self._buf_states[idx]).to(device)
+        next_states = torch.from_numpy(self._buf_next[idx]).to(device)
+        actions = torch.from_numpy(self._buf_actions[idx]).to(device)
+        rewards = torch.from_numpy(self._buf_rewards[idx]).to(device)
+        done = torch.from_numpy(self._buf_done[idx]).to(device)
+        
+        q = self.online(states).gather(1, actions[:, None]).squeeze(1)
+        with torch.no_grad():
+            max_next = self.target(next_states).max(dim=1).values
+            target = rewards + self.gamma * (1.0 - done) * max_next
+        
+        loss = nn.functional.smooth_l1_loss(q, target)
+        self.optimizer.zero_grad(set_to_none=True)
+        loss.backward()
+        self.optimizer.step()
+        
+        self.train_steps += 1
+        self.last_loss = float(loss.item())
+        if self.train_steps % self.target_sync == 0:
+            self.target.load_state_dict(self.online.state_dict())
+    
+    def close(self):
+        """Nothing to close: the model is written whole by save_q_table."""
+    
+    def q_table_files(self) -> List[Path]:
+        """Files written by save_q_table (network and optimizer state)."""
+        return [self.model_path] if self.model_path else []
+    
+    def save_q_table(self):
+        """Save network and optimizer state to disk.
+        
+        Named after QLearningAgent.save_q_table so callers can use either agent.
+        """
+        if not self.model_path:
+            return
+        
+        self.model_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.model_path.with_name(self.model_path.name + ".tmp")
+        torch.save({
+            "actions": self.actions,
+            "online": self.online.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+            "total_updates": self.total_updates,
+            "train_steps": self.train_steps,
+        }, tmp_path)
+        tmp_path.replace(self.model_path)
+        print(f"💾 DQN weights saved: {self.train_steps} train steps, {self.total_updates} updates")
+    
+    def load_q_table(self):
+        """Load network and optimizer state from disk."""
+        try:
+            checkpoint = torch.load(self.model_path, map_location=self.device)
+        except Exception as e:
+            print(f"⚠️  Failed to load DQN weights: {e}")
+            return
+        
+        if checkpoint.get("actions") != self.actions:
+            print("⚠️  DQN weights were trained with a different action set; starting fresh")
+            return
+        
+        self.online.load_state_dict(checkpoint["online"])
+        self.target.load_state_dict(checkpoint["online"])
+        self.optimizer.load_state_dict(checkpoint["optimizer"])
+        self.total_updates = checkpoint.get("total_updates", 0)
+        self.train_steps = checkpoint.get("train_steps", 0)
+        print(f"📂 DQN weights loaded: {self.train_steps} train steps")
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get learning statistics.
+        
+        Returns:
+            Dictionary with stats (q_table_size is the replay buffer fill)
+        """
+        return {
+            "states_explored": len(self.states_explored),
+            "total_updates": self.total_updates,
+            "q_table_size": self._buf_len,
+            "epsilon": self.epsilon,
+            "train_steps": self.train_steps,
+            "loss": self.last_loss,
+        }
@@ -7,6 +7,12 @@ the bot has explored, similar to PokemonRedExperiments approach.
 import numpy as np
 from typing import Tuple
 
+try:
+    from bot._exploration_kernel import update_kernel, get_local_view_kernel
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # Global map dimensions (384x384 pixels)
 GLOBAL_MAP_SHAPE = (384, 384)
 
@@ -112,20 +118,57 @@ MAP_COORDINATES = {
     "default": (80, 0)
 }
 
+# Flat anchor lookup tables indexed by map_id (map_id is a single byte)
+_ANCHOR_Y = np.full(256, MAP_COORDINATES["default"][0], dtype=np.int16)
+_ANCHOR_X = np.full(256, MAP_COORDINATES["default"][1], dtype=np.int16)
+for _key, (_anchor_y, _anchor_x) in MAP_COORDINATES.items():
+    if isinstance(_key, int):
+        _ANCHOR_Y[_key] = _anchor_y
+        _ANCHOR_X[_key] = _anchor_x
+del _key, _anchor_y, _anchor_x
+
+# Same table as plain ints for the scalar path (avoids NumPy scalar boxing)
+_ANCHOR_LUT = tuple(zip(_ANCHOR_Y.tolist(), _ANCHOR_X.tolist()))
+
 
 class ExplorationMap:
     """Tracks explored areas on a global map."""
     
-    def __init__(self, map_size: Tuple[int, int] = GLOBAL_MAP_SHAPE):
+    def __init__(self, map_size: Tuple[int, int] = GLOBAL_MAP_SHAPE, max_radius: int = 16):
         """Initialize exploration map.
         
         Args:
             map_size: Size of global map (height, width)
+            max_radius: Largest get_local_view radius to preallocate for
         """
         self.map_size = map_size
-        self.explore_map = np.zeros(map_size, dtype=np.uint8)
+        # One bit per cell, little-endian within each byte: cell x lives in
+        # byte x >> 3 under mask 1 << (x & 7)
+        self._bits = np.zeros((map_size[0], (map_size[1] + 7) >> 3), dtype=np.uint8)
+        self._explored_count = 0  # Number of set bits, maintained incrementally
         self.coords_pad = 100  # Padding around edges
         
+        # Precomputed per-call constants for local_to_global
+        self._pad2 = self.coords_pad * 2
+        self._height = map_size[0]
+        self._ymax = map_size[0] - 1
+        self._xmax = map_size[1] - 1
+        
+        # Reused output buffer for padded local views
+        self._view_buf = np.zeros((max_radius * 2, max_radius * 2), dtype=np.uint8)
+    
+    @property
+    def explore_map(self) -> np.ndarray:
+        """Unpacked exploration map (0 = unexplored, 255 = explored).
+        
+        Built on demand from the packed bits; modifying it has no effect.
+        """
+        unpacked = np.unpackbits(
+            self._bits, axis=1, count=self.map_size[1], bitorder='little'
+        )
+        unpacked *= 255
+        return unpacked
+        
     def local_to_global(self, x: int, y: int, map_id: int) -> Tuple[int, int]:
         """Convert local game coordinates to global map coordinates.
         
@@ -137,20 +180,23 @@ class ExplorationMap:
         Returns:
             (global_y, global_x) coordinates
         """
-        # Get anchor coordinates for this map
-        if map_id in MAP_COORDINATES:
-            anchor_y, anchor_x = MAP_COORDINATES[map_id]
-        else:
-            anchor_y, anchor_x = MAP_COORDINATES["default"]
+        # Get anchor coordinates for this map (unknown maps use the default)
+        anchor_y, anchor_x = _ANCHOR_LUT[map_id]
         
         # Convert to global coordinates
         # Note: y is inverted in Pokemon (0 is top)
-        global_x = anchor_x + x + self.coords_pad * 2
-        global_y = self.map_size[0] - (anchor_y - y + self.coords_pad * 2)
+        global_x = anchor_x + x + self._pad2
+        global_y = self._height - (anchor_y - y + self._pad2)
         
-        # Clamp to map bounds
-        global_y = max(0, min(global_y, self.map_size[0] - 1))
-        global_x = max(0, min(global_x, self.map_size[1] - 1))
+        # Clamp to map bounds (plain comparisons, no max/min calls)
+        if global_y < 0:
+            global_y = 0
+        elif global_y > self._ymax:
+            global_y = self._ymax
+        if global_x < 0:
+            global_x = 0
+        elif global_x > self._xmax:
+            global_x = self._xmax
         
         return (global_y, global_x)
     
@@ -165,15 +211,70 @@ class ExplorationMap:
         Returns:
             True if this is a newly explored position
         """
+        if NUMBA_AVAILABLE:
+            is_new = bool(update_kernel(
+                self._bits, _ANCHOR_Y, _ANCHOR_X, x, y, map_id,
+                self._pad2, self._ymax, self._xmax
+            ))
+            if is_new:
+                self._explored_count += 1
+            return is_new
+        
         global_y, global_x = self.local_to_global(x, y, map_id)
         
+        byte = global_x >> 3
+        mask = 1 << (global_x & 7)
+        
         # Check if already explored
-        was_explored = self.explore_map[global_y, global_x] > 0
+        prev = self._bits[global_y, byte]
+        if prev & mask:
+            return False
+        
+        # Mark as explored
+        self._bits[global_y, byte] = prev | mask
+        self._explored_count += 1
+        return True
+    
+    def update_batch(self, xs, ys, map_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """Mark a batch of positions as explored.
+        
+        Preferred over calling update() per step: callers can buffer
+        positions and flush them periodically.
         
-        # Mark as explored (255 = fully explored)
-        self.explore_map[global_y, global_x] = 255
+        Args:
+            xs: Local X positions
+            ys: Local Y positions
+            map_ids: Map IDs (0-255)
+            
+        Returns:
+            (is_new, counts): boolean mask, True where a position was newly
+            explored (repeated positions within the batch count only once),
+            and the explored-tile count after each position
+        """
+        xs = np.asarray(xs, dtype=np.int32)
+        ys = np.asarray(ys, dtype=np.int32)
+        map_ids = np.asarray(map_ids, dtype=np.intp)
         
-        return not was_explored
+        global_x = _ANCHOR_X[map_ids] + xs + self._pad2
+        global_y = self._height - (_ANCHOR_Y[map_ids] - ys + self._pad2)
+        np.clip(global_y, 0, self._ymax, out=global_y)
+        np.clip(global_x, 0, self._xmax, out=global_x)
+        
+        byte = global_x >> 3
+        mask = np.left_shift(1, global_x & 7).astype(np.uint8)
+        prev = self._bits[global_y, byte] & mask
+        # bitwise_or.at so several cells sharing a byte are all recorded
+        np.bitwise_or.at(self._bits, (global_y, byte), mask)
+        
+        # Only the first occurrence of a repeated cell counts as new
+        flat = global_y * self.map_size[1] + global_x
+        _, first = np.unique(flat, return_index=True)
+        is_new = np.zeros(len(flat), dtype=bool)
+        is_new[first] = prev[first] == 0
+        counts = self._explored_count + np.cumsum(is_new)
+        if len(counts):
+            self._explored_count = int(counts[-1])
+        return is_new, counts
     
     def get_explored_count(self) -> int:
         """Get total number of explored positions.
@@ -181,7 +282,7 @@ class ExplorationMap:
         Returns:
             Count of explored tiles
         """
-        return np.count_nonzero(self.explore_map)
+        return self._explored_count
     
     def get_local_view(self, x: int, y: int, map_id: int, radius: int = 16) -> np.ndarray:
         """Get local view around current position.
@@ -193,28 +294,41 @@ class ExplorationMap:
             radius: Radius of view (in tiles)
             
         Returns:
-            2D array of explored tiles around position
+            2D array of explored tiles around position. The array aliases
+            internal storage and is overwritten by the next call; copy it
+            if it must be kept or modified.
         """
         global_y, global_x = self.local_to_global(x, y, map_id)
         
+        if self._view_buf.shape[0] < radius * 2:
+            self._view_buf = np.zeros((radius * 2, radius * 2), dtype=np.uint8)
+        
+        if NUMBA_AVAILABLE:
+            return get_local_view_kernel(
+                self._bits, global_y, global_x, radius, self.map_size[1], self._view_buf
+            )
+        
         # Extract local window
         y_min = max(0, global_y - radius)
         y_max = min(self.map_size[0], global_y + radius)
         x_min = max(0, global_x - radius)
         x_max = min(self.map_size[1], global_x + radius)
         
-        view = self.explore_map[y_min:y_max, x_min:x_max]
-        
-        # Pad if at edges
-        if view.shape[0] < radius * 2 or view.shape[1] < radius * 2:
-            padded = np.zeros((radius * 2, radius * 2), dtype=np.uint8)
-            y_offset = radius - (global_y - y_min)
-            x_offset = radius - (global_x - x_min)
-            padded[y_offset:y_offset+view.shape[0], x_offset:x_offset+view.shape[1]] = view
-            return padded
+        # Unpack only the bytes covering the window
+        packed = self._bits[y_min:y_max, x_min >> 3:(x_max + 7) >> 3]
+        start = x_min & 7
+        view = np.unpackbits(packed, axis=1, bitorder='little')[:, start:start + x_max - x_min]
         
-        return view
+        # Expand into the reused buffer, zero-padded at edges
+        out = self._view_buf[:radius * 2, :radius * 2]
+        out.fill(0)
+        y_offset = radius - (global_y - y_min)
+        x_offset = radius - (global_x - x_min)
+        out[y_offset:y_offset+view.shape[0], x_offset:x_offset+view.shape[1]] = view
+        out *= 255
+        return out
     
     def reset(self):
         """Reset exploration map."""
-        self.explore_map.fill(0)
+        self._bits.fill(0)
+        self._explored_count = 0
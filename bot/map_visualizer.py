@@ -3,13 +3,15 @@
 Visualizes visited coordinates as heatmaps and images.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Set, Tuple, Optional
+from typing import Dict, Optional
 import time
 
+import numpy as np
+
 try:
     from PIL import Image, ImageDraw, ImageFont
-    import numpy as np
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
@@ -18,7 +20,7 @@ except ImportError:
 try:
     import matplotlib
     matplotlib.use('Agg')  # Non-interactive backend
-    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
     import matplotlib.colors as mcolors
     MATPLOTLIB_AVAILABLE = True
 except ImportError:
@@ -60,15 +62,16 @@ class MapVisualizer:
         self.save_interval = save_interval
         self.enabled = enabled and PIL_AVAILABLE
         
-        # Track visited coordinates: map_id -> set of (x, y) tuples
-        self.visited_coords: Dict[int, Set[Tuple[int, int]]] = {}
-        
-        # Track coordinate visit counts for heatmap
-        self.coord_visits: Dict[Tuple[int, int, int], int] = {}  # (map_id, x, y) -> count
+        # Visit counts per map: map_id -> (MAP_HEIGHT, MAP_WIDTH) grid, allocated lazily
+        self._visit_grid: Dict[int, np.ndarray] = {}
         
         self.last_save_step = 0
         self.total_unique_coords = 0
         
+        # Rendering runs on a single background thread against grid snapshots
+        self._render_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="map-render")
+        self._closed = False
+        
         if self.enabled:
             self.output_dir.mkdir(parents=True, exist_ok=True)
             print(f"🗺️  Map visualization enabled: {self.output_dir}")
@@ -84,18 +87,16 @@ class MapVisualizer:
         if not self.enabled:
             return
         
-        # Add to visited set
-        if map_id not in self.visited_coords:
-            self.visited_coords[map_id] = set()
-        
-        coord = (x, y)
-        if coord not in self.visited_coords[map_id]:
-            self.visited_coords[map_id].add(coord)
-            self.total_unique_coords += 1
+        grid = self._visit_grid.get(map_id)
+        if grid is None:
+            grid = np.zeros((MAP_HEIGHT, MAP_WIDTH), dtype=np.uint32)
+            self._visit_grid[map_id] = grid
         
         # Increment visit count
-        key = (map_id, x, y)
-        self.coord_visits[key] = self.coord_visits.get(key, 0) + 1
+        visits = grid[y, x]
+        grid[y, x] = visits + 1
+        if visits == 0:
+            self.total_unique_coords += 1
     
     def should_save(self, current_step: int) -> bool:
         """Check if map should be saved.
@@ -125,18 +126,48 @@ class MapVisualizer:
         filename = f"map_step{step}_ep{episode}_{timestamp}.png"
         filepath = self.output_dir / filename
         
+        self.last_save_step = step
+        self._render_pool.submit(
+            self._render_map, filepath, self._snapshot(), self.total_unique_coords
+        )
+    
+    def flush(self):
+        """Block until all queued map/heatmap renders have been written."""
+        if self._closed:
+            return  # close() already waited for them
+        self._render_pool.submit(lambda: None).result()
+    
+    def close(self):
+        """Finish queued renders and stop the render thread."""
+        self._closed = True
+        self._render_pool.shutdown(wait=True)
+    
+    def _snapshot(self) -> Dict[int, np.ndarray]:
+        """Copy the visit grids so rendering can proceed while training mutates them."""
+        return {map_id: grid.copy() for map_id, grid in self._visit_grid.items()}
+    
+    def _render_map(self, filepath: Path, grids: Dict[int, np.ndarray], unique_coords: int):
+        """Render worker for save_map."""
         try:
-            self._generate_map_image(filepath)
-            self.last_save_step = step
-            print(f"🗺️  Map saved: {filename} ({self.total_unique_coords} unique coords)")
+            self._generate_map_image(filepath, grids)
+            print(f"🗺️  Map saved: {filepath.name} ({unique_coords} unique coords)")
         except Exception as e:
             print(f"⚠️  Failed to save map: {e}")
     
-    def _generate_map_image(self, filepath: Path):
+    def _render_heatmap(self, filepath: Path, grids: Dict[int, np.ndarray], map_id: Optional[int]):
+        """Render worker for save_heatmap."""
+        try:
+            self._generate_heatmap(filepath, grids, map_id)
+            print(f"🔥 Heatmap saved: {filepath.name}")
+        except Exception as e:
+            print(f"⚠️  Failed to save heatmap: {e}")
+    
+    def _generate_map_image(self, filepath: Path, grids: Dict[int, np.ndarray]):
         """Generate and save map visualization image.
         
         Args:
             filepath: Path to save image
+            grids: Snapshot of per-map visit grids
         """
         if not PIL_AVAILABLE:
             return
@@ -147,7 +178,7 @@ class MapVisualizer:
         
         # Calculate layout
         maps_per_row = 4
-        num_maps = len(self.visited_coords)
+        num_maps = len(grids)
         
         if num_maps == 0:
             # Create simple message image
@@ -164,12 +195,13 @@ class MapVisualizer:
         rows = (num_maps + maps_per_row - 1) // maps_per_row
         canvas_height = (map_display_height + margin) * rows + margin * 2
         
-        img = Image.new('RGB', (canvas_width, canvas_height), color='white')
-        draw = ImageDraw.Draw(img)
+        canvas = np.full((canvas_height, canvas_width, 3), 255, dtype=np.uint8)
+        labels = []
         
         # Draw each map
-        for idx, (map_id, coords) in enumerate(sorted(self.visited_coords.items())):
-            if not coords:
+        for idx, (map_id, grid) in enumerate(sorted(grids.items())):
+            ys, xs = np.nonzero(grid)
+            if len(xs) == 0:
                 continue
             
             row = idx // maps_per_row
@@ -179,10 +211,8 @@ class MapVisualizer:
             offset_y = margin * 2 + row * (map_display_height + margin)
             
             # Find coordinate bounds
-            xs = [x for x, y in coords]
-            ys = [y for x, y in coords]
-            min_x, max_x = min(xs), max(xs)
-            min_y, max_y = min(ys), max(ys)
+            min_x, max_x = int(xs.min()), int(xs.max())
+            min_y, max_y = int(ys.min()), int(ys.max())
             
             # Scale to fit display area
             width = max(max_x - min_x + 1, 1)
@@ -191,34 +221,37 @@ class MapVisualizer:
             scale_y = map_display_height / height
             scale = min(scale_x, scale_y, 10)  # Max 10 pixels per coord
             
-            # Draw visited coordinates
-            color = MAP_COLORS.get(map_id, (100, 150, 255))
+            # Pixel position of each visited coordinate
+            px = offset_x + ((xs - min_x) * scale).astype(np.intp)
+            py = offset_y + ((ys - min_y) * scale).astype(np.intp)
             
-            for x, y in coords:
-                px = offset_x + int((x - min_x) * scale)
-                py = offset_y + int((y - min_y) * scale)
-                
-                # Get visit count for intensity
-                visit_count = self.coord_visits.get((map_id, x, y), 1)
-                intensity = min(1.0, visit_count / 10.0)  # Normalize to 0-1
-                
-                # Adjust color based on intensity
-                r = int(color[0] * intensity)
-                g = int(color[1] * intensity)
-                b = int(color[2] * intensity)
-                
-                draw.rectangle(
-                    [px, py, px + int(scale), py + int(scale)],
-                    fill=(r, g, b),
-                    outline=(0, 0, 0)
-                )
+            # Color scaled by visit count intensity (normalized to 0-1)
+            color = np.array(MAP_COLORS.get(map_id, (100, 150, 255)), dtype=np.float64)
+            intensity = np.minimum(grid[ys, xs] / 10.0, 1.0)
+            colors = (color * intensity[:, None]).astype(np.uint8)
             
-            # Draw map label
-            draw.text(
-                (offset_x, offset_y - 15),
-                f"Map {map_id} ({len(coords)} coords)",
-                fill='black'
+            # Each coordinate is a filled cell with a 1px black outline
+            cell = int(scale) + 1
+            span = np.arange(cell)
+            outline = np.zeros((cell, cell), dtype=bool)
+            outline[[0, -1], :] = True
+            outline[:, [0, -1]] = True
+            pixels = np.where(
+                outline[None, :, :, None], np.uint8(0), colors[:, None, None, :]
             )
+            canvas[
+                py[:, None, None] + span[None, :, None],
+                px[:, None, None] + span[None, None, :],
+            ] = pixels
+            
+            labels.append(((offset_x, offset_y - 15), f"Map {map_id} ({len(xs)} coords)"))
+        
+        img = Image.fromarray(canvas)
+        draw = ImageDraw.Draw(img)
+        
+        # Draw map labels
+        for position, text in labels:
+            draw.text(position, text, fill='black')
         
         img.save(filepath)
     
@@ -237,65 +270,64 @@ class MapVisualizer:
         filename = f"heatmap_step{step}_ep{episode}_{timestamp}.png"
         filepath = self.output_dir / filename
         
-        try:
-            self._generate_heatmap(filepath, map_id)
-            print(f"🔥 Heatmap saved: {filename}")
-        except Exception as e:
-            print(f"⚠️  Failed to save heatmap: {e}")
+        if map_id is not None:
+            grid = self._visit_grid.get(map_id)
+            grids = {map_id: grid.copy()} if grid is not None else {}
+        else:
+            grids = self._snapshot()
+        self._render_pool.submit(self._render_heatmap, filepath, grids, map_id)
     
-    def _generate_heatmap(self, filepath: Path, map_id: Optional[int] = None):
+    def _generate_heatmap(
+        self,
+        filepath: Path,
+        grids: Dict[int, np.ndarray],
+        map_id: Optional[int] = None
+    ):
         """Generate heatmap visualization.
         
         Args:
             filepath: Path to save heatmap
+            grids: Snapshot of per-map visit grids
             map_id: Optional specific map ID
         """
         if not MATPLOTLIB_AVAILABLE:
             return
         
-        # Filter coordinates by map_id if specified
+        # Select visit grid by map_id if specified
         if map_id is not None:
-            coords_to_plot = {
-                (x, y): count
-                for (mid, x, y), count in self.coord_visits.items()
-                if mid == map_id
-            }
+            visits = grids.get(map_id)
             title = f"Exploration Heatmap - Map {map_id}"
-        else:
-            # Plot all coordinates (ignoring map_id)
-            coords_to_plot = {}
-            for (mid, x, y), count in self.coord_visits.items():
-                key = (x, y)
-                coords_to_plot[key] = coords_to_plot.get(key, 0) + count
+        elif grids:
+            # Plot all coordinates (ignoring map_id), summed in place
+            visits = np.zeros((MAP_HEIGHT, MAP_WIDTH), dtype=np.uint64)
+            for map_grid in grids.values():
+                np.add(visits, map_grid, out=visits)
             title = "Exploration Heatmap - All Maps"
+        else:
+            visits = None
+        
+        if visits is None:
+            return
         
-        if not coords_to_plot:
+        # Find visited area from row/column occupancy (no per-cell index arrays)
+        rows = np.flatnonzero(visits.any(axis=1))
+        cols = np.flatnonzero(visits.any(axis=0))
+        if len(rows) == 0:
             return
         
-        # Create grid
-        xs = [x for x, y in coords_to_plot.keys()]
-        ys = [y for x, y in coords_to_plot.keys()]
-        min_x, max_x = min(xs), max(xs)
-        min_y, max_y = min(ys), max(ys)
-        
-        width = max_x - min_x + 1
-        height = max_y - min_y + 1
-        
-        grid = np.zeros((height, width))
-        
-        for (x, y), count in coords_to_plot.items():
-            grid[y - min_y, x - min_x] = count
-        
-        # Plot heatmap
-        plt.figure(figsize=(10, 8))
-        plt.imshow(grid, cmap='hot', interpolation='nearest', origin='upper')
-        plt.colorbar(label='Visit Count')
-        plt.title(title)
-        plt.xlabel('X Coordinate')
-        plt.ylabel('Y Coordinate')
-        plt.tight_layout()
-        plt.savefig(filepath, dpi=150)
-        plt.close()
+        # Zero-copy view of the visited area
+        grid = visits[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        
+        # Plot heatmap (standalone Figure: pyplot's global state is not thread-safe)
+        fig = Figure(figsize=(10, 8))
+        ax = fig.add_subplot()
+        image = ax.imshow(grid, cmap='hot', interpolation='nearest', origin='upper')
+        fig.colorbar(image, ax=ax, label='Visit Count')
+        ax.set_title(title)
+        ax.set_xlabel('X Coordinate')
+        ax.set_ylabel('Y Coordinate')
+        fig.tight_layout()
+        fig.savefig(filepath, dpi=150)
     
     def get_stats(self) -> Dict:
         """Get visualization statistics.
@@ -305,7 +337,7 @@ class MapVisualizer:
         """
         return {
             'enabled': self.enabled,
-            'maps_visited': len(self.visited_coords),
+            'maps_visited': len(self._visit_grid),
             'total_unique_coords': self.total_unique_coords,
             'output_dir': str(self.output_dir),
         }
@@ -5,49 +5,70 @@ Uses Q-Learning agent with heuristic guidance.
 
 from __future__ import annotations
 
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+from bot.dqn_agent import DQNAgent, TORCH_AVAILABLE
 from bot.q_learning import QLearningAgent
 from bot.rewards import HeuristicGuide
 from core.models import GameState
 
 
-# Global agent instance (singleton)
-_agent: Optional[QLearningAgent] = None
+# Agent singleton: holds at most one agent, created under _AGENT_LOCK.
+# The list is never rebound, so readers need no `global` and no lock.
+_AGENT_REF: List[Union[QLearningAgent, DQNAgent]] = []
+_AGENT_LOCK = threading.Lock()
 
 
 def get_agent(
     actions: List[str] = None,
-    q_table_path: Optional[Path] = None
-) -> QLearningAgent:
-    """Get or create Q-Learning agent instance.
+    q_table_path: Optional[Path] = None,
+    agent_kind: str = "tabular"
+) -> Union[QLearningAgent, DQNAgent]:
+    """Get or create the agent instance.
+    
+    Only the first call creates the agent; later calls return it unchanged.
     
     Args:
         actions: Available actions
-        q_table_path: Path to Q-table file
+        q_table_path: Path to Q-table (or DQN weights) file
+        agent_kind: "tabular" for QLearningAgent, "dqn" for DQNAgent
+            (falls back to tabular when PyTorch is not installed)
         
     Returns:
-        QLearningAgent instance
+        Agent instance
     """
-    global _agent
+    if _AGENT_REF:
+        return _AGENT_REF[0]
     
-    if _agent is None:
-        if actions is None:
-            actions = ["UP", "DOWN", "LEFT", "RIGHT", "A", "B"]
-        
-        if q_table_path is None:
-            q_table_path = Path("data/q_table.json")
-        
-        _agent = QLearningAgent(
-            actions=actions,
-            alpha=0.1,
-            gamma=0.95,
-            epsilon=0.2,
-            q_table_path=q_table_path
-        )
+    with _AGENT_LOCK:
+        # Re-check: another thread may have created the agent while we waited
+        if not _AGENT_REF:
+            if actions is None:
+                actions = ["UP", "DOWN", "LEFT", "RIGHT", "A", "B"]
+            
+            if agent_kind == "dqn" and not TORCH_AVAILABLE:
+                print("⚠️  Warning: PyTorch not available. Falling back to tabular Q-learning.")
+                agent_kind = "tabular"
+            
+            if agent_kind == "dqn":
+                _AGENT_REF.append(DQNAgent(
+                    actions=actions,
+                    gamma=0.95,
+                    epsilon=0.2,
+                    model_path=q_table_path or Path("data/dqn_agent.pt")
+                ))
+            else:
+                _AGENT_REF.append(QLearningAgent(
+                    actions=actions,
+                    alpha=0.1,
+                    gamma=0.95,
+                    epsilon=0.2,
+                    q_table_path=q_table_path or Path("data/q_table.json")
+                ))
     
-    return _agent
+    return _AGENT_REF[0]
 
 
 def select_action(
@@ -67,6 +88,11 @@ def select_action(
     """
     agent = get_agent(available_actions, q_table_path)
     
+    # Hard rules short-circuit the Q-table lookup entirely
+    forced = HeuristicGuide.suggest_forced(state, available_actions)
+    if forced is not None:
+        return forced, "heuristic_forced"
+    
     # Try heuristic guidance first during exploration
     action, is_exploration = agent.select_action(state, available_actions)
     
@@ -96,16 +122,34 @@ def update_q_learning(
         next_state: New state
         done: Episode complete
     """
-    global _agent
-    if _agent:
-        _agent.update(state, action, reward, next_state, done)
+    if _AGENT_REF:
+        _AGENT_REF[0].update(state, action, reward, next_state, done)
 
 
 def save_q_table():
     """Save Q-table to disk."""
-    global _agent
-    if _agent:
-        _agent.save_q_table()
+    if _AGENT_REF:
+        _AGENT_REF[0].save_q_table()
+
+
+def close_agent():
+    """Flush and close the agent's open files (e.g. the Q-table delta log)."""
+    if _AGENT_REF:
+        _AGENT_REF[0].close()
+
+
+def get_q_table_files() -> List[Path]:
+    """Files holding the agent's current state, for checkpoint backups.
+    
+    Call at checkpoint time: the Q-learning agent flushes its delta log
+    here so the snapshot plus log on disk are up to date.
+    
+    Returns:
+        Agent file paths (empty if no agent exists yet)
+    """
+    if _AGENT_REF:
+        return _AGENT_REF[0].q_table_files()
+    return []
 
 
 def get_agent_stats() -> Dict[str, int]:
@@ -114,7 +158,6 @@ def get_agent_stats() -> Dict[str, int]:
     Returns:
         Stats dictionary
     """
-    global _agent
-    if _agent:
-        return _agent.get_stats()
+    if _AGENT_REF:
+        return _AGENT_REF[0].get_stats()
     return {"states_explored": 0, "total_updates": 0, "q_table_size": 0}
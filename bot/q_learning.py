@@ -4,14 +4,52 @@ This module implements a tabular Q-Learning agent that learns to play
 Pokemon Red through reinforcement learning.
 """
 
+import io
 import json
+import os
 import random
-from collections import defaultdict
+import struct
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 from core.models import GameState
 
+try:
+    from bot._qcore import td_update, eps_greedy
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# State key: (map_id, badges, x // coord_bin, y // coord_bin)
+StateKey = Tuple[int, int, int, int]
+
+# On-disk layout version of the Q-table index (bump when StateKey changes)
+_Q_TABLE_FORMAT = 3
+
+def _quantize_rows(q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantize Q rows to int8 with one float32 scale per row.
+    
+    Returns:
+        (int8 values, per-row scales) with q ~= values * scales[:, None]
+    """
+    scales = (np.abs(q).max(axis=1) / 127.0).astype(np.float32)
+    safe = np.where(scales > 0, scales, 1.0)
+    values = np.rint(q / safe[:, None]).astype(np.int8)
+    return values, scales
+
+
+# Delta log record: state key, action index, new Q-value
+_DELTA_RECORD = struct.Struct("<iiiiIf")
+
 
 class QLearningAgent:
     """Tabular Q-Learning agent with persistent knowledge."""
@@ -22,7 +60,11 @@ class QLearningAgent:
         alpha: float = 0.1,
         gamma: float = 0.95,
         epsilon: float = 0.2,
-        q_table_path: Optional[Path] = None
+        q_table_path: Optional[Path] = None,
+        initial_capacity: int = 64,
+        snapshot_interval: int = 10_000,
+        coord_bin: int = 8,
+        seed: Optional[int] = None
     ):
         """Initialize Q-Learning agent.
         
@@ -32,36 +74,115 @@ class QLearningAgent:
             gamma: Discount factor (0-1)
             epsilon: Exploration rate (0-1)
             q_table_path: Path to save/load Q-table
+            initial_capacity: Initial number of state rows (grows by doubling)
+            snapshot_interval: Write a full snapshot every N updates; updates
+                in between go to an append-only delta log
+            coord_bin: Size of the square tile bins that discretize (x, y)
+                into the state
+            seed: Seed for the agent's private RNG (None = OS entropy)
         """
         self.actions = actions
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
         self.q_table_path = q_table_path
+        self.snapshot_interval = snapshot_interval
+        self.coord_bin = coord_bin
+        
+        # Private RNG: reproducible with a seed and independent of the
+        # module-global random state shared with other components
+        self._rng = random.Random(seed)
+        
+        # Append-only log of updates since the last snapshot (opened lazily;
+        # truncated instead if it belongs to an incompatible table)
+        self._delta_fp = None
+        self._delta_mode = "ab"
+        
+        self._action_idx: Dict[str, int] = {a: i for i, a in enumerate(actions)}
         
-        # Q-table: state -> action -> value
-        self.q_table: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # Q-table: row per state, column per action. _state_idx interns
+        # StateKey -> row; _visited marks (state, action) pairs that
+        # have been updated, so "no knowledge yet" is distinguishable from 0.0
+        self._state_idx: Dict[StateKey, int] = {}
+        self.Q = np.zeros((initial_capacity, len(actions)), dtype=np.float32)
+        self._visited = np.zeros((initial_capacity, len(actions)), dtype=bool)
+        
+        # Action masks / index arrays keyed by available_actions tuple
+        self._mask_cache: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._index_cache: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._full_mask = np.ones(len(actions), dtype=bool)
         
         # Statistics
         self.total_updates = 0
-        self.states_explored = set()
+        self._q_cells = 0  # (state, action) pairs with a learned value
         
         # Load existing knowledge
-        if q_table_path and q_table_path.exists():
+        if q_table_path and (q_table_path.exists() or self._delta_path().exists()):
             self.load_q_table()
+        
+        if NUMBA_AVAILABLE:
+            self._warm_up_kernels()
     
-    def get_state_key(self, state: GameState) -> str:
-        """Convert game state to string key for Q-table.
+    def _warm_up_kernels(self):
+        """Compile the Numba kernels now rather than on the first step."""
+        q = np.zeros((1, len(self.actions)), dtype=np.float32)
+        visited = np.zeros((1, len(self.actions)), dtype=bool)
+        td_update(q, visited, 0, 0, 0.0, 0, False, self.alpha, self.gamma)
+        eps_greedy(q, visited, 0, self._full_mask, self.epsilon, 0.0, 0.0)
+    
+    def get_state_key(self, state: GameState) -> int:
+        """Convert game state to its Q-table row index.
         
-        Uses map_id and badges for manageable state space.
+        The state is map_id, badges and the position binned to
+        coord_bin-sized tiles, which keeps the table bounded while still
+        telling apart different parts of a map. Unseen states are assigned
+        the next free row.
         
         Args:
             state: Current game state
-            
+        
         Returns:
-            State key string
+            Row index into Q
         """
-        return f"map_{state.map_id}_badges_{state.badges}"
+        key = (state.map_id, state.badges, state.x // self.coord_bin, state.y // self.coord_bin)
+        idx = self._state_idx.get(key)
+        if idx is None:
+            idx = self._add_state(key)
+        return idx
+    
+    def _add_state(self, key: StateKey) -> int:
+        """Intern a new state, growing the Q arrays if they are full."""
+        idx = len(self._state_idx)
+        if idx >= len(self.Q):
+            capacity = max(2 * len(self.Q), 1)
+            q = np.zeros((capacity, len(self.actions)), dtype=np.float32)
+            q[:idx] = self.Q[:idx]
+            visited = np.zeros((capacity, len(self.actions)), dtype=bool)
+            visited[:idx] = self._visited[:idx]
+            self.Q, self._visited = q, visited
+        self._state_idx[key] = idx
+        return idx
+    
+    def _action_mask(self, available_actions: List[str]) -> np.ndarray:
+        """Boolean mask over self.actions for a list of available actions."""
+        key = tuple(available_actions)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = np.zeros(len(self.actions), dtype=bool)
+            for action in available_actions:
+                if action in self._action_idx:
+                    mask[self._action_idx[action]] = True
+            self._mask_cache[key] = mask
+        return mask
+    
+    def _action_indices(self, available_actions: List[str]) -> np.ndarray:
+        """Sorted column indices into Q for a list of available actions."""
+        key = tuple(available_actions)
+        idxs = self._index_cache.get(key)
+        if idxs is None:
+            idxs = np.flatnonzero(self._action_mask(available_actions)).astype(np.intp)
+            self._index_cache[key] = idxs
+        return idxs
     
     def select_action(
         self,
@@ -73,36 +194,48 @@ class QLearningAgent:
         Args:
             state: Current game state
             available_actions: Actions to choose from (defaults to all)
-            
+        
         Returns:
             Tuple of (action, is_exploration)
         """
         if available_actions is None:
             available_actions = self.actions
         
-        state_key = self.get_state_key(state)
-        self.states_explored.add(state_key)
+        state_idx = self.get_state_key(state)
+        
+        rng = self._rng
+        if NUMBA_AVAILABLE:
+            mask = self._full_mask if available_actions is self.actions else self._action_mask(available_actions)
+            best, is_exploration = eps_greedy(
+                self.Q, self._visited, state_idx, mask, self.epsilon,
+                rng.random(), rng.random()
+            )
+            if best >= 0:
+                return self.actions[best], is_exploration
+            # No known action available: fall through to the random pick
         
         # Epsilon-greedy: explore vs exploit
-        if random.random() < self.epsilon:
+        if rng.random() < self.epsilon:
             # Explore: random action
-            action = random.choice(available_actions)
+            action = rng.choice(available_actions)
             return action, True
         else:
             # Exploit: best known action
-            q_values = self.q_table[state_key]
-            
-            if not q_values:
+            if not self._visited[state_idx].any():
                 # No knowledge yet, random action
-                action = random.choice(available_actions)
+                action = rng.choice(available_actions)
                 return action, True
             
             # Choose action with highest Q-value
-            best_action = max(
-                available_actions,
-                key=lambda a: q_values.get(a, 0.0)
-            )
-            return best_action, False
+            row = self.Q[state_idx]
+            if available_actions is self.actions:
+                best = int(row.argmax())
+            else:
+                idxs = self._action_indices(available_actions)
+                if len(idxs) == 0:
+                    return rng.choice(available_actions), True
+                best = int(idxs[row[idxs].argmax()])
+            return self.actions[best], False
     
     def update(
         self,
@@ -123,75 +256,228 @@ class QLearningAgent:
             next_state: Current state after action
             done: Whether episode is complete
         """
-        state_key = self.get_state_key(state)
-        next_state_key = self.get_state_key(next_state)
+        state_idx = self.get_state_key(state)
+        next_state_idx = self.get_state_key(next_state)
+        action_idx = self._action_idx[action]
+        
+        if not self._visited[state_idx, action_idx]:
+            self._q_cells += 1
+        
+        if NUMBA_AVAILABLE:
+            new_q = td_update(
+                self.Q, self._visited, state_idx, action_idx, reward,
+                next_state_idx, done, self.alpha, self.gamma
+            )
+        else:
+            new_q = self._td_update(state_idx, action_idx, reward, next_state_idx, done)
+        
+        self.total_updates += 1
         
+        if self.q_table_path:
+            # Log the change; rotate into a full snapshot periodically
+            self._append_delta(
+                (state.map_id, state.badges, state.x // self.coord_bin, state.y // self.coord_bin),
+                action_idx, new_q
+            )
+            if self.total_updates % self.snapshot_interval == 0:
+                self.save_q_table()
+    
+    def _delta_path(self) -> Path:
+        """Path of the append-only delta log."""
+        return self.q_table_path.with_suffix(".delta")
+    
+    def _append_delta(self, key: StateKey, action_idx: int, new_q: float):
+        """Append one Q-value change to the delta log."""
+        if self._delta_fp is None:
+            self.q_table_path.parent.mkdir(parents=True, exist_ok=True)
+            self._delta_fp = open(self._delta_path(), self._delta_mode)
+        self._delta_fp.write(_DELTA_RECORD.pack(*key, action_idx, new_q))
+    
+    def close(self):
+        """Flush and close the delta log.
+        
+        Call when training ends so buffered updates reach disk even if
+        no final save_q_table() follows.
+        """
+        if self._delta_fp is not None:
+            self._delta_fp.close()
+            self._delta_fp = None
+    
+    def _td_update(self, state_idx: int, action_idx: int, reward: float, next_state_idx: int, done: bool) -> float:
+        """Pure-Python Q-learning update (used when numba is unavailable)."""
         # Current Q-value
-        current_q = self.q_table[state_key][action]
+        current_q = float(self.Q[state_idx, action_idx])
         
-        # Best Q-value for next state
+        # Best Q-value for next state (over actions updated so far)
         if done:
             max_next_q = 0.0
         else:
-            next_q_values = self.q_table[next_state_key]
-            max_next_q = max(next_q_values.values()) if next_q_values else 0.0
+            next_visited = self._visited[next_state_idx]
+            max_next_q = float(self.Q[next_state_idx, next_visited].max()) if next_visited.any() else 0.0
         
         # Q-learning update
         new_q = current_q + self.alpha * (reward + self.gamma * max_next_q - current_q)
-        self.q_table[state_key][action] = new_q
-        
-        self.total_updates += 1
+        self.Q[state_idx, action_idx] = new_q
+        self._visited[state_idx, action_idx] = True
+        return new_q
+    
+    def _arrays_path(self) -> Path:
+        """Path of the .npz file holding the Q arrays."""
+        return self.q_table_path.with_suffix(".npz")
+    
+    def q_table_files(self) -> List[Path]:
+        """Files that together hold the current Q-table.
         
-        # Auto-save every 100 updates
-        if self.total_updates % 100 == 0 and self.q_table_path:
-            self.save_q_table()
+        The last snapshot (JSON index and .npz arrays) plus the delta log
+        of updates since; the log is flushed first so a copy taken now
+        is current without writing a new snapshot.
+        """
+        if not self.q_table_path:
+            return []
+        if self._delta_fp is not None:
+            self._delta_fp.flush()
+        return [self.q_table_path, self._arrays_path(), self._delta_path()]
     
     def save_q_table(self):
-        """Save Q-table to JSON file."""
+        """Save a full Q-table snapshot and truncate the delta log.
+        
+        Values go to a compressed .npz next to q_table_path, quantized to
+        int8 with a per-state scale; q_table_path itself holds a small JSON
+        index (actions, state keys, stats).
+        Files are written to temporaries and swapped in, so a crash leaves
+        the previous snapshot plus its delta log intact.
+        """
         if not self.q_table_path:
             return
         
-        # Convert defaultdict to regular dict for JSON
-        regular_q_table = {
-            state: dict(actions)
-            for state, actions in self.q_table.items()
-        }
-        
-        data = {
-            "q_table": regular_q_table,
+        n_states = len(self._state_idx)
+        index = {
+            "format": _Q_TABLE_FORMAT,
+            "coord_bin": self.coord_bin,
+            "actions": self.actions,
+            "states": [list(key) for key in self._state_idx],
             "total_updates": self.total_updates,
-            "states_explored": len(self.states_explored),
+            "states_explored": len(self._state_idx),
             "alpha": self.alpha,
             "gamma": self.gamma,
             "epsilon": self.epsilon,
         }
         
         self.q_table_path.parent.mkdir(parents=True, exist_ok=True)
-        self.q_table_path.write_text(json.dumps(data, indent=2))
+        arrays_path = self._arrays_path()
+        arrays_tmp = arrays_path.with_name(arrays_path.name + ".tmp")
+        with open(arrays_tmp, "wb") as f:
+            q_int8, q_scale = _quantize_rows(self.Q[:n_states])
+            np.savez_compressed(f, q_int8=q_int8, q_scale=q_scale, visited=self._visited[:n_states])
+            f.flush()
+            os.fsync(f.fileno())
+        index_tmp = self.q_table_path.with_name(self.q_table_path.name + ".tmp")
+        with open(index_tmp, "wb") as f:
+            if ORJSON_AVAILABLE:
+                f.write(orjson.dumps(index))
+            else:
+                # Stream compact JSON straight into the file buffer
+                with io.TextIOWrapper(f, encoding="utf-8") as text:
+                    json.dump(index, text, separators=(',', ':'))
+        os.replace(arrays_tmp, arrays_path)
+        os.replace(index_tmp, self.q_table_path)
+        
+        # Snapshot now covers every logged update
+        if self._delta_fp is not None:
+            self._delta_fp.close()
+        self._delta_fp = open(self._delta_path(), "wb")
     
     def load_q_table(self):
-        """Load Q-table from JSON file."""
-        if not self.q_table_path or not self.q_table_path.exists():
+        """Load Q-table from disk.
+        
+        Tables saved with a different state layout (older formats or
+        another coord_bin) can't be mapped onto the current states and
+        are ignored; learning starts fresh and the next save replaces them.
+        """
+        if not self.q_table_path:
+            return
+        has_snapshot = self.q_table_path.exists()
+        if not has_snapshot and not self._delta_path().exists():
             return
         
-        data = json.loads(self.q_table_path.read_text())
+        self._state_idx = {}
+        self.Q = np.zeros_like(self.Q)
+        self._visited = np.zeros_like(self._visited)
+        self._q_cells = 0
+        self.total_updates = 0
+        
+        # Without a snapshot (crash before the first save) the delta log
+        # alone rebuilds the table
+        if has_snapshot:
+            data = json.loads(self.q_table_path.read_text())
+            
+            if data.get("format") != _Q_TABLE_FORMAT or data.get("coord_bin") != self.coord_bin:
+                print(f"⚠️  Q-table {self.q_table_path} uses a different state layout, starting fresh")
+                self._delta_mode = "wb"
+                return
+            
+            self._load_arrays(data)
+            
+            # Load statistics
+            self.total_updates = data.get("total_updates", 0)
+        
+        # Apply updates logged since the snapshot
+        self.total_updates += self._replay_delta()
         
-        # Load Q-table
-        loaded_table = data.get("q_table", {})
-        self.q_table = defaultdict(lambda: defaultdict(float))
+        # Counted once here; update() keeps it current afterwards
+        self._q_cells = int(np.count_nonzero(self._visited))
         
-        for state, actions in loaded_table.items():
-            for action, value in actions.items():
-                self.q_table[state][action] = value
+        print(f"✓ Loaded Q-table: {len(self._state_idx)} states, {self.total_updates} updates")
+    
+    def _replay_delta(self) -> int:
+        """Apply the delta log on top of the loaded snapshot.
         
-        # Load statistics
-        self.total_updates = data.get("total_updates", 0)
-        states_count = data.get("states_explored", 0)
+        Returns:
+            Number of records applied
+        """
+        delta_path = self._delta_path()
+        if not delta_path.exists():
+            return 0
         
-        # Rebuild states_explored from Q-table keys
-        self.states_explored = set(self.q_table.keys())
+        data = delta_path.read_bytes()
+        # Drop a trailing partial record from an interrupted write so
+        # appended records stay aligned
+        usable = len(data) - len(data) % _DELTA_RECORD.size
+        if usable < len(data):
+            os.truncate(delta_path, usable)
+        count = 0
+        for map_id, badges, bin_x, bin_y, action_idx, new_q in _DELTA_RECORD.iter_unpack(data[:usable]):
+            if action_idx >= len(self.actions):
+                continue
+            key = (map_id, badges, bin_x, bin_y)
+            idx = self._state_idx.get(key)
+            if idx is None:
+                idx = self._add_state(key)
+            self.Q[idx, action_idx] = new_q
+            self._visited[idx, action_idx] = True
+            count += 1
+        return count
+    
+    def _load_arrays(self, index: Dict):
+        """Load the .npz Q arrays described by a JSON index."""
+        with np.load(self._arrays_path()) as arrays:
+            if "q_int8" in arrays:
+                q = arrays["q_int8"] * arrays["q_scale"][:, None]
+            else:
+                q = arrays["q"]
+            visited = arrays["visited"]
         
-        print(f"✓ Loaded Q-table: {len(self.q_table)} states, {self.total_updates} updates")
+        # Map stored action columns onto this agent's actions
+        columns = [
+            (self._action_idx[action], col)
+            for col, action in enumerate(index.get("actions", []))
+            if action in self._action_idx
+        ]
+        for row, key in enumerate(index.get("states", [])):
+            idx = self._add_state(tuple(key))
+            for dst, src in columns:
+                self.Q[idx, dst] = q[row, src]
+                self._visited[idx, dst] = visited[row, src]
     
     def get_stats(self) -> Dict[str, int]:
         """Get learning statistics.
@@ -200,7 +486,7 @@ class QLearningAgent:
             Dictionary with stats
         """
         return {
-            "states_explored": len(self.states_explored),
+            "states_explored": len(self._state_idx),
             "total_updates": self.total_updates,
-            "q_table_size": sum(len(actions) for actions in self.q_table.values()),
+            "q_table_size": self._q_cells,
         }
@@ -13,7 +13,10 @@ Based on PokemonRedExperiments reward system with enhancements:
 - Stuck detection
 """
 
-from typing import Dict, List, Optional, Any
+import warnings
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
 import numpy as np
 
 from core.models import GameState
@@ -22,6 +25,39 @@ from bot.screen_explorer import ScreenExplorer
 from emulator import pokemon_memory
 
 
+# Per-step inputs for RewardCalculator.calculate_rewards_batch
+# (one record per step, see RewardCalculator.read_step_record)
+STEP_DTYPE = np.dtype([
+    ('x', np.int32),
+    ('y', np.int32),
+    ('map_id', np.int32),
+    ('badges', np.int32),
+    ('event_flags', np.int32),          # Event flag count, museum ticket excluded
+    ('party_levels', np.int32, (6,)),   # 0 for empty party slots
+    ('opponent_level', np.int32),       # Highest opponent level, 0 outside battle
+    ('hp_fraction', np.float64),
+    ('party_count', np.int32),
+])
+
+
+def _pack_coords(x, y, map_id):
+    """Pack (x, y, map_id) into one integer key (scalars or int64 arrays).
+    
+    x and y occupy 16 bits each, map_id the bits above.
+    """
+    return (map_id << 32) | (y << 16) | x
+
+
+def _monotonic_gains(values: np.ndarray, current_max: float):
+    """Per-step increases of a running maximum seeded with current_max.
+    
+    Returns:
+        (gains array, new running maximum)
+    """
+    running = np.maximum.accumulate(np.concatenate(([current_max], values)))
+    return np.diff(running), running[-1].item()
+
+
 class RewardCalculator:
     """Calculates rewards based on game state changes."""
     
@@ -39,13 +75,14 @@ class RewardCalculator:
         # Exploration tracking
         self.exploration_map = ExplorationMap()
         self.screen_explorer = ScreenExplorer()  # KNN-based frame deduplication
-        self.visited_locations = set()
-        self.seen_coords: Dict[str, int] = {}  # coord_string -> visit_count
+        self.visited_locations = set()  # map_ids (location names derive from map_id)
+        self.seen_coords: Dict[int, int] = defaultdict(int)  # packed coord -> visit_count
         self.base_screen_explore = 0  # Baseline unique frames at episode start
         
         # Position tracking
-        self.position_history: List[tuple] = []
         self.max_history = 10
+        self.position_history: deque = deque(maxlen=self.max_history)  # packed coords
+        self._position_counts: Dict[int, int] = defaultdict(int)  # counts within history
         
         # Max progress trackers (for monotonic rewards)
         self.base_event_flags = 0  # Set at reset
@@ -71,6 +108,7 @@ class RewardCalculator:
         self.visited_locations.clear()
         self.seen_coords.clear()
         self.position_history.clear()
+        self._position_counts.clear()
         self.base_screen_explore = 0
         
         # Initialize base event flags if we have access to memory
@@ -107,15 +145,18 @@ class RewardCalculator:
         self.step_count += 1
         rewards = {}
         
+        # Read emulator memory once for all reward components
+        snap = self._snapshot_memory()
+        
         # Core rewards (always active)
         rewards['badge'] = self._badge_reward(prev_state, curr_state)
-        rewards['event'] = self._event_reward()
-        rewards['level'] = self._level_reward()
+        rewards['event'] = self._event_reward(snap)
+        rewards['level'] = self._level_reward(snap)
         rewards['explore'] = self._exploration_reward(curr_state)
-        rewards['opponent'] = self._opponent_level_reward()
+        rewards['opponent'] = self._opponent_level_reward(snap)
         
         # Conditional rewards (grace period aware)
-        rewards['heal'] = self._healing_reward(curr_state)
+        rewards['heal'] = self._healing_reward(curr_state, snap)
         rewards['death'] = self._death_penalty()
         
         # Penalties (disabled during grace period)
@@ -128,13 +169,201 @@ class RewardCalculator:
             rewards['loop'] = 0.0
         
         # Update tracking state
-        self._update_tracking(curr_state)
+        self._update_tracking(curr_state, snap)
         
         # Calculate total
         rewards['total'] = sum(rewards.values())
         
         return rewards
     
+    def _snapshot_memory(self) -> Optional[Dict[str, Any]]:
+        """Read every memory value the reward components need, once.
+        
+        Returns:
+            Dictionary of values, or None without a memory reader
+        """
+        if not self.memory_reader:
+            return None
+        
+        read = self.memory_reader.read_memory
+        
+        # Event flags, excluding the museum ticket (0xD754 bit 0) to avoid cheese
+        event_flags = pokemon_memory.count_event_flags(self.memory_reader)
+        if pokemon_memory.read_bit(read(pokemon_memory.MEMORY_MAP["MUSEUM_TICKET"]), 0):
+            event_flags -= 1
+        
+        party_count = read(pokemon_memory.MEMORY_MAP["PARTY_COUNT"])
+        in_battle = pokemon_memory.is_in_battle(self.memory_reader)
+        
+        return {
+            'event_flags': event_flags,
+            'party_count': party_count,
+            'party_levels': pokemon_memory.get_party_levels(self.memory_reader, party_count),
+            'hp_fraction': pokemon_memory.get_hp_fraction(self.memory_reader, party_count),
+            'in_battle': in_battle,
+            'opp_levels': pokemon_memory.get_opponent_levels(self.memory_reader) if in_battle else [],
+        }
+    
+    def read_step_record(self, curr_state: GameState) -> tuple:
+        """Capture one step's inputs for calculate_rewards_batch.
+        
+        Must be called right after the step, while emulator memory still
+        reflects curr_state.
+        
+        Args:
+            curr_state: Current game state
+            
+        Returns:
+            Tuple matching STEP_DTYPE
+        """
+        event_flags = 0
+        party_levels = [0] * 6
+        opponent_level = 0
+        hp_fraction = self.last_health
+        party_count = self.party_size
+        
+        snap = self._snapshot_memory()
+        if snap:
+            event_flags = snap['event_flags']
+            for i, level in enumerate(snap['party_levels']):
+                party_levels[i] = level
+            if snap['opp_levels']:
+                opponent_level = max(snap['opp_levels'])
+            hp_fraction = snap['hp_fraction']
+            party_count = snap['party_count']
+        
+        return (
+            curr_state.x, curr_state.y, curr_state.map_id, curr_state.badges,
+            event_flags, party_levels, opponent_level, hp_fraction, party_count,
+        )
+    
+    def calculate_rewards_batch(
+        self,
+        steps: np.ndarray,
+        locations: List[str],
+        prev_badges: int
+    ) -> Dict[str, np.ndarray]:
+        """Calculate reward breakdowns for a buffered run of consecutive steps.
+        
+        Equivalent to calling calculate_reward once per step in order, but
+        each component is computed with array operations over the batch.
+        
+        Args:
+            steps: STEP_DTYPE structured array, one record per step
+            locations: Location name for each step
+            prev_badges: Badge count before the first step
+            
+        Returns:
+            Dictionary with per-step reward component arrays and total
+        """
+        n = len(steps)
+        scale = self.reward_scale
+        step_numbers = self.step_count + np.arange(1, n + 1)
+        self.step_count += n
+        rewards = {}
+        
+        x = steps['x'].astype(np.int64)
+        y = steps['y'].astype(np.int64)
+        map_ids = steps['map_id'].astype(np.int64)
+        
+        # Badges
+        badges = steps['badges']
+        badge_increase = np.maximum(np.diff(badges, prepend=prev_badges), 0)
+        rewards['badge'] = scale * badge_increase * 10.0
+        for i in np.flatnonzero(badge_increase):
+            print(f"🎖️ Badge earned! Total: {badges[i]} (+{rewards['badge'][i]:.1f} reward)")
+        
+        # Memory-derived monotonic rewards
+        if self.memory_reader:
+            events = np.maximum(steps['event_flags'] - self.base_event_flags, 0)
+            gains, self.max_event_flags = _monotonic_gains(events, self.max_event_flags)
+            rewards['event'] = scale * gains * 4.0
+            
+            level_sum = np.maximum(steps['party_levels'] - 2, 0).sum(axis=1)
+            level_sum = np.maximum(level_sum - 4, 0)
+            scaled_level_sum = np.where(level_sum < 22, level_sum, (level_sum - 22) / 4 + 22)
+            gains, self.max_level_sum = _monotonic_gains(scaled_level_sum, self.max_level_sum)
+            rewards['level'] = scale * gains
+        else:
+            rewards['event'] = np.zeros(n)
+            rewards['level'] = np.zeros(n)
+        
+        # Exploration: global map tiles
+        is_new, explored_counts = self.exploration_map.update_batch(x, y, map_ids)
+        explored = np.where(is_new, explored_counts, 0)
+        gains, self.max_explored_tiles = _monotonic_gains(explored, self.max_explored_tiles)
+        rewards['explore'] = scale * self.explore_weight * gains * 0.1
+        
+        # Coordinate visit counts, as seen after each step's own visit
+        keys = _pack_coords(x, y, map_ids)
+        unique_keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        group_starts = np.cumsum(counts) - counts
+        occurrence = np.empty(n, dtype=np.int64)
+        occurrence[np.argsort(inverse, kind='stable')] = np.arange(n) - np.repeat(group_starts, counts)
+        unique_keys = unique_keys.tolist()
+        prior = np.array([self.seen_coords.get(key, 0) for key in unique_keys], dtype=np.int64)
+        visit_counts = prior[inverse] + occurrence + 1
+        self.seen_coords.update(zip(unique_keys, (prior + counts).tolist()))
+        
+        # Exploration: location discovery
+        for i, (location, map_id) in enumerate(zip(locations, map_ids.tolist())):
+            if map_id not in self.visited_locations:
+                self.visited_locations.add(map_id)
+                rewards['explore'][i] += scale * 5.0
+                print(f"🗺️ New location: {location}")
+        
+        # Opponent level (0 outside battle never raises the maximum)
+        if self.memory_reader:
+            opponent = np.maximum(steps['opponent_level'] - 5, 0)
+            gains, self.max_opponent_level = _monotonic_gains(opponent, self.max_opponent_level)
+            rewards['opponent'] = scale * gains * 0.5
+        else:
+            rewards['opponent'] = np.zeros(n)
+        
+        # Healing and deaths (compare each step with the one before it)
+        if self.memory_reader:
+            hp = steps['hp_fraction']
+            party = steps['party_count']
+            last_hp = np.concatenate(([self.last_health], hp[:-1]))
+            last_party = np.concatenate(([self.party_size], party[:-1]))
+            healed = (hp > last_hp) & (party == last_party)
+            normal_heal = healed & (last_hp > 0)
+            rewards['heal'] = np.where(normal_heal, scale * (hp - last_hp) * 10.0, 0.0)
+            died = self.died_count + np.cumsum(healed & ~normal_heal)
+            self.total_healing_reward += float(rewards['heal'].sum())
+            if n:
+                self.died_count = int(died[-1])
+                self.last_health = float(hp[-1])
+                self.party_size = int(party[-1])
+        else:
+            rewards['heal'] = np.zeros(n)
+            died = np.full(n, self.died_count)
+        rewards['death'] = scale * died * -0.1
+        
+        # Penalties (disabled during grace period)
+        active = step_numbers > self.grace_period
+        rewards['stuck'] = np.where(active & (visit_counts > 600), scale * -0.05, 0.0)
+        
+        # Loop penalty over the position history of non-grace steps
+        rewards['loop'] = np.zeros(n)
+        history = np.array(self.position_history, dtype=np.int64)
+        sequence = np.concatenate((history, keys[active]))
+        if len(sequence) >= self.max_history:
+            windows = np.sort(
+                np.lib.stride_tricks.sliding_window_view(sequence, self.max_history), axis=1
+            )
+            unique_positions = 1 + np.count_nonzero(np.diff(windows, axis=1), axis=1)
+            # Window ending at each new position (None before the history is full)
+            ends = len(history) + np.arange(int(np.count_nonzero(active)))
+            full = ends >= self.max_history - 1
+            looping = np.zeros(len(ends), dtype=bool)
+            looping[full] = unique_positions[ends[full] - (self.max_history - 1)] <= 3
+            rewards['loop'][np.flatnonzero(active)[looping]] = -1.0
+        self._set_position_history(sequence[-self.max_history:].tolist())
+        
+        rewards['total'] = sum(rewards.values())
+        return rewards
+    
     def _badge_reward(self, prev_state: GameState, curr_state: GameState) -> float:
         """Massive reward for earning badges (primary objective)."""
         if curr_state.badges > prev_state.badges:
@@ -144,7 +373,7 @@ class RewardCalculator:
             return reward
         return 0.0
     
-    def _event_reward(self) -> float:
+    def _event_reward(self, snap: Optional[Dict[str, Any]]) -> float:
         """Reward for triggering event flags (story progress).
         
         Event flags track:
@@ -154,17 +383,11 @@ class RewardCalculator:
         - Gym badge flags (duplicate of badge byte)
         - Cut tree usage, strength boulder moves
         """
-        if not self.memory_reader:
+        if not snap:
             return 0.0
         
-        # Count current event flags (excluding museum ticket to avoid cheese)
-        current_events = pokemon_memory.count_event_flags(self.memory_reader)
-        
-        # Subtract museum ticket if set (0xD754 bit 0)
-        museum_byte = self.memory_reader.read_memory(pokemon_memory.MEMORY_MAP["MUSEUM_TICKET"])
-        museum_ticket_set = pokemon_memory.read_bit(museum_byte, 0)
-        if museum_ticket_set:
-            current_events -= 1
+        # Current event flags (museum ticket already excluded)
+        current_events = snap['event_flags']
         
         # Get events relative to episode start
         events_this_episode = max(0, current_events - self.base_event_flags)
@@ -177,16 +400,16 @@ class RewardCalculator:
         
         return 0.0
     
-    def _level_reward(self) -> float:
+    def _level_reward(self, snap: Optional[Dict[str, Any]]) -> float:
         """Reward for leveling up Pokemon with threshold scaling.
         
         Early levels are rewarded linearly to encourage training.
         After level ~22 (threshold), rewards scale down to encourage gym progression.
         """
-        if not self.memory_reader:
+        if not snap:
             return 0.0
         
-        party_levels = pokemon_memory.get_party_levels(self.memory_reader)
+        party_levels = snap['party_levels']
         if not party_levels:
             return 0.0
         
@@ -237,33 +460,29 @@ class RewardCalculator:
                 reward += self.reward_scale * self.explore_weight * tile_increase * 0.1
         
         # Update coordinate visit tracking
-        coord_string = f"x:{curr_state.x} y:{curr_state.y} m:{curr_state.map_id}"
-        if coord_string not in self.seen_coords:
-            self.seen_coords[coord_string] = 0
-        self.seen_coords[coord_string] += 1
+        self.seen_coords[_pack_coords(curr_state.x, curr_state.y, curr_state.map_id)] += 1
         
         # Location discovery bonus
-        location_key = f"{curr_state.location}_{curr_state.map_id}"
-        if location_key not in self.visited_locations:
-            self.visited_locations.add(location_key)
+        if curr_state.map_id not in self.visited_locations:
+            self.visited_locations.add(curr_state.map_id)
             reward += self.reward_scale * 5.0  # 5 points for new location
             print(f"🗺️ New location: {curr_state.location}")
         
         return reward
     
-    def _opponent_level_reward(self) -> float:
+    def _opponent_level_reward(self, snap: Optional[Dict[str, Any]]) -> float:
         """Reward for encountering stronger opponents.
         
         Encourages progression by rewarding battles with higher-level trainers.
         """
-        if not self.memory_reader:
+        if not snap:
             return 0.0
         
         # Check if in battle
-        if not pokemon_memory.is_in_battle(self.memory_reader):
+        if not snap['in_battle']:
             return 0.0
         
-        opponent_levels = pokemon_memory.get_opponent_levels(self.memory_reader)
+        opponent_levels = snap['opp_levels']
         if not opponent_levels:
             return 0.0
         
@@ -278,18 +497,16 @@ class RewardCalculator:
         
         return 0.0
     
-    def _healing_reward(self, curr_state: GameState) -> float:
+    def _healing_reward(self, curr_state: GameState, snap: Optional[Dict[str, Any]]) -> float:
         """Reward for healing Pokemon (encourages using Pokemon Centers).
         
         Detects health increases without party size changes (rules out Pokemon capture).
         """
-        if not self.memory_reader:
+        if not snap:
             return 0.0
         
-        current_health = pokemon_memory.get_hp_fraction(self.memory_reader)
-        current_party_size = self.memory_reader.read_memory(
-            pokemon_memory.MEMORY_MAP["PARTY_COUNT"]
-        )
+        current_health = snap['hp_fraction']
+        current_party_size = snap['party_count']
         
         # Check if healed (health increased without capturing new Pokemon)
         if current_health > self.last_health and current_party_size == self.party_size:
@@ -314,8 +531,9 @@ class RewardCalculator:
         
         If the same coordinate has been visited >600 times, apply penalty.
         """
-        coord_string = f"x:{curr_state.x} y:{curr_state.y} m:{curr_state.map_id}"
-        visit_count = self.seen_coords.get(coord_string, 0)
+        visit_count = self.seen_coords.get(
+            _pack_coords(curr_state.x, curr_state.y, curr_state.map_id), 0
+        )
         
         if visit_count > 600:
             return self.reward_scale * -0.05
@@ -324,48 +542,87 @@ class RewardCalculator:
     
     def _loop_penalty(self, curr_state: GameState) -> float:
         """Penalty for moving in tight loops (repetitive behavior)."""
-        current_pos = (curr_state.x, curr_state.y, curr_state.map_id)
-        self.position_history.append(current_pos)
-        
-        if len(self.position_history) > self.max_history:
-            self.position_history.pop(0)
+        current_pos = _pack_coords(curr_state.x, curr_state.y, curr_state.map_id)
+        history = self.position_history
+        counts = self._position_counts
+        
+        # Evict the oldest position before the deque drops it
+        if len(history) == history.maxlen:
+            evicted = history[0]
+            if counts[evicted] == 1:
+                del counts[evicted]
+            else:
+                counts[evicted] -= 1
+        history.append(current_pos)
+        counts[current_pos] += 1
         
         # Check if stuck (only 3 unique positions in last 10 steps)
-        if len(self.position_history) >= self.max_history:
-            unique_positions = len(set(self.position_history))
+        if len(history) >= self.max_history:
+            unique_positions = len(counts)
             if unique_positions <= 3:
                 return -1.0  # Fixed penalty
         
         return 0.0
     
-    def _update_tracking(self, curr_state: GameState):
+    def _set_position_history(self, positions: List[int]):
+        """Replace the loop-detection history (oldest first)."""
+        self.position_history = deque(positions, maxlen=self.max_history)
+        self._position_counts = defaultdict(int)
+        for position in self.position_history:
+            self._position_counts[position] += 1
+    
+    def _update_tracking(self, curr_state: GameState, snap: Optional[Dict[str, Any]]):
         """Update internal tracking state."""
-        if self.memory_reader:
-            self.last_health = pokemon_memory.get_hp_fraction(self.memory_reader)
-            self.party_size = self.memory_reader.read_memory(
-                pokemon_memory.MEMORY_MAP["PARTY_COUNT"]
-            )
+        if snap:
+            self.last_health = snap['hp_fraction']
+            self.party_size = snap['party_count']
+    
+    def process_screen_frame(self, frame: np.ndarray) -> Tuple[bool, float]:
+        """Add a screen frame and collect its screen-exploration reward.
+        
+        Uses KNN to deduplicate frames - rewards novel screens.
+        Helps prevent getting stuck in menus or repeated states.
+        
+        Args:
+            frame: Screen frame (H, W, C) numpy array
+            
+        Returns:
+            Tuple of (is_novel, reward)
+        """
+        explorer = self.screen_explorer
+        is_novel = explorer.add_frame(frame)
+        return is_novel, self._screen_reward(explorer.frame_count)
     
     def add_screen_frame(self, frame: np.ndarray) -> bool:
         """Add screen frame for KNN exploration tracking.
         
+        Deprecated: use process_screen_frame.
+        
         Args:
             frame: Screen frame (H, W, C) numpy array
             
         Returns:
             True if frame is novel
         """
-        is_novel = self.screen_explorer.add_frame(frame)
-        return is_novel
+        warnings.warn(
+            "add_screen_frame is deprecated, use process_screen_frame",
+            DeprecationWarning, stacklevel=2
+        )
+        return self.screen_explorer.add_frame(frame)
     
     def get_screen_exploration_reward(self) -> float:
         """Get reward for screen-based exploration.
         
-        Uses KNN to deduplicate frames - rewards novel screens.
-        Helps prevent getting stuck in menus or repeated states.
+        Deprecated: use process_screen_frame.
         """
-        unique_frames = self.screen_explorer.get_unique_frame_count()
-        
+        warnings.warn(
+            "get_screen_exploration_reward is deprecated, use process_screen_frame",
+            DeprecationWarning, stacklevel=2
+        )
+        return self._screen_reward(self.screen_explorer.get_unique_frame_count())
+    
+    def _screen_reward(self, unique_frames: int) -> float:
+        """Reward for unique frames gained since the last call; advances the baseline."""
         # Calculate reward based on new unique frames
         new_frames = unique_frames - self.base_screen_explore
         
@@ -378,28 +635,65 @@ class RewardCalculator:
         
         return 0.0
     
+    def get_counters(self) -> Tuple[int, int, int]:
+        """Get the per-step counters without building the stats dict.
+        
+        Returns:
+            Tuple of (event_flags, unique_frames, deaths)
+        """
+        return (
+            self.max_event_flags,
+            self.screen_explorer.get_unique_frame_count(),
+            self.died_count,
+        )
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get current reward statistics.
         
         Returns:
             Dictionary with current stats
         """
-        screen_stats = self.screen_explorer.get_stats()
         return {
             'max_event_flags': self.max_event_flags,
             'max_level_sum': self.max_level_sum,
             'max_opponent_level': self.max_opponent_level,
             'explored_tiles': self.max_explored_tiles,
             'unique_coords': len(self.seen_coords),
-            'unique_frames': screen_stats['unique_frames'],
+            'unique_frames': self.screen_explorer.get_unique_frame_count(),
             'died_count': self.died_count,
             'total_healing_reward': self.total_healing_reward,
         }
 
 
+# Early-game routing hints (badges == 0): location substring, hint, action
+_HINT_TABLE = (
+    ("pallet", "Try going UP/NORTH to leave Pallet Town", "UP"),
+    ("route 1", "Continue NORTH to Viridian City", "UP"),
+    ("viridian", "Go NORTH through forest to Pewter City", "UP"),
+    ("pewter", "Enter gym (building) to battle for first badge", "A"),
+)
+
+
+@lru_cache(maxsize=256)
+def _hint_for_location(location: str) -> Optional[tuple]:
+    """First _HINT_TABLE entry whose substring occurs in location, if any."""
+    location = location.lower()
+    for entry in _HINT_TABLE:
+        if entry[0] in location:
+            return entry
+    return None
+
+
 class HeuristicGuide:
     """Provides directional hints to accelerate learning."""
     
+    @staticmethod
+    def _match_hint(state: GameState) -> Optional[tuple]:
+        """Find the hint table entry for a state, if any."""
+        if state.badges != 0:
+            return None
+        return _hint_for_location(state.location)
+    
     @staticmethod
     def get_hint(state: GameState) -> Optional[str]:
         """Get directional hint based on current state.
@@ -410,88 +704,28 @@ class HeuristicGuide:
         Returns:
             Hint string or None
         """
-        location = state.location.lower()
-        
-        # Early game routing
-        if "pallet" in location and state.badges == 0:
-            return "Try going UP/NORTH to leave Pallet Town"
-        
-        if "route 1" in location and state.badges == 0:
-            return "Continue NORTH to Viridian City"
-        
-        if "viridian" in location and state.badges == 0:
-            return "Go NORTH through forest to Pewter City"
-        
-        if "pewter" in location and state.badges == 0:
-            return "Enter gym (building) to battle for first badge"
-        
-        return None
+        entry = HeuristicGuide._match_hint(state)
+        return entry[1] if entry else None
     
     @staticmethod
-    def suggest_action(
+    def suggest_forced(
         state: GameState,
         available_actions: List[str]
     ) -> Optional[str]:
-        """Suggest action based on hint.
-        
-        Args:
-            state: Current game state
-            available_actions: Actions to choose from
-            
-        Returns:
-            Suggested action or None
-        """
-        hint = HeuristicGuide.get_hint(state)
-        
-        if not hint:
-            return None
-        
-        # Map hints to actions
-        if "UP" in hint or "NORTH" in hint:
-            if "UP" in available_actions:
-                return "UP"
-        
-        if "DOWN" in hint or "SOUTH" in hint:
-            if "DOWN" in available_actions:
-                return "DOWN"
-        
-        if "LEFT" in hint or "WEST" in hint:
-            if "LEFT" in available_actions:
-                return "LEFT"
-        
-        if "RIGHT" in hint or "EAST" in hint:
-            if "RIGHT" in available_actions:
-                return "RIGHT"
-        
-        # For entering buildings/fighting
-        if "gym" in hint or "building" in hint or "battle" in hint:
-            if "A" in available_actions:
-                return "A"
+        """Return an action that must be taken regardless of the learned policy.
         
-        return None
-
-        """Get directional hint based on current state.
+        Cheap hard rules only; checked before any Q-table lookup.
         
         Args:
             state: Current game state
+            available_actions: Actions to choose from
             
         Returns:
-            Hint string or None
+            Forced action or None
         """
-        location = state.location.lower()
-        
-        # Early game routing
-        if "pallet" in location and state.badges == 0:
-            return "Try going UP/NORTH to leave Pallet Town"
-        
-        if "route 1" in location and state.badges == 0:
-            return "Continue NORTH to Viridian City"
-        
-        if "viridian" in location and state.badges == 0:
-            return "Go NORTH through forest to Pewter City"
-        
-        if "pewter" in location and state.badges == 0:
-            return "Enter gym (building) to battle for first badge"
+        # Only one legal action: nothing to choose
+        if len(available_actions) == 1:
+            return available_actions[0]
         
         return None
     
@@ -509,31 +743,7 @@ class HeuristicGuide:
         Returns:
             Suggested action or None
         """
-        hint = HeuristicGuide.get_hint(state)
-        
-        if not hint:
-            return None
-        
-        # Map hints to actions
-        if "UP" in hint or "NORTH" in hint:
-            if "UP" in available_actions:
-                return "UP"
-        
-        if "DOWN" in hint or "SOUTH" in hint:
-            if "DOWN" in available_actions:
-                return "DOWN"
-        
-        if "LEFT" in hint or "WEST" in hint:
-            if "LEFT" in available_actions:
-                return "LEFT"
-        
-        if "RIGHT" in hint or "EAST" in hint:
-            if "RIGHT" in available_actions:
-                return "RIGHT"
-        
-        # For entering buildings/fighting
-        if "gym" in hint or "building" in hint or "battle" in hint:
-            if "A" in available_actions:
-                return "A"
-        
+        entry = HeuristicGuide._match_hint(state)
+        if entry and entry[2] in available_actions:
+            return entry[2]
         return None
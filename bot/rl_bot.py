@@ -1,27 +1,56 @@
 from __future__ import annotations
 
-import json
+import os
+import queue
+from collections import deque
+from itertools import islice
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-from bot.policy import select_action, update_q_learning, save_q_table, get_agent_stats
+import numpy as np
+
+from bot.policy import (
+    get_agent, select_action, update_q_learning, save_q_table, get_agent_stats,
+    get_q_table_files, close_agent
+)
 from bot.rewards import RewardCalculator
-from bot.session_stats import SessionStats
+from bot.session_stats import SessionStats, STEP_RECORD_DTYPE
 from bot.tensorboard_logger import TensorboardLogger
 from bot.checkpoint_manager import CheckpointManager
 from bot.map_visualizer import MapVisualizer
 from core.models import GameState, RunDecision
+from core.serialization import dumps_compact
 from emulator.game_starter import GameStarter
+from emulator.pokemon_memory import MEMORY_MAP, PARTY_BLOCK_START
 from emulator.pyboy_emulator import PyBoyEmulator
 from run_logging.run_logger import RunLogger
 
 
+# Badge milestones in earning order (index = badge count - 1)
+BADGE_NAMES: tuple[str, ...] = (
+    "Boulder Badge (Pewter City)",
+    "Cascade Badge (Cerulean City)",
+    "Thunder Badge (Vermilion City)",
+    "Rainbow Badge (Celadon City)",
+    "Soul Badge (Fuchsia City)",
+    "Marsh Badge (Saffron City)",
+    "Volcano Badge (Cinnabar Island)",
+    "Earth Badge (Viridian City)",
+    "Elite Four Victory",
+)
+
+
 @dataclass
 class BotSettings:
     actions: List[str]
     max_steps: int = 100
+    step_delay: float = 0.0  # Minimum seconds per step in run() (0 = full emulator speed)
+    webui_step_delay: float = 0.05  # Minimum seconds per step in run_in_webui() (slower for viewing)
+    agent_kind: str = "tabular"  # "tabular" (QLearningAgent) or "dqn" (DQNAgent, needs PyTorch)
+    state_write_interval: int = 5  # Write the WebUI state file every N steps (and on the last)
 
 
 class PokeRushBot:
@@ -37,18 +66,36 @@ class PokeRushBot:
         self.data_path = data_path
         self.settings = settings
         self.reward_calculator = RewardCalculator(memory_reader=emulator)
-        self.recent_actions = []  # Store recent actions for WebUI
+        self.recent_actions = deque(maxlen=100)  # Store recent actions for WebUI
         self.current_step = 0
         self.total_reward = 0.0
-        self.visited_tiles = set()  # Track unique tiles visited
+        # get_agent_stats() result cached for one step (see _step_agent_stats)
+        self._agent_stats: Dict = {}
+        self._agent_stats_step = -1
+        # Unique tiles visited: per-map 256x256 bitmaps plus a running count
+        self._visited_bits: Dict[int, bytearray] = {}
+        self._unique_tiles = 0
+        
+        # Party offsets within emulator.read_party_block(), resolved once
+        self._party_count_off = MEMORY_MAP["PARTY_COUNT"] - PARTY_BLOCK_START
+        self._party_level_offsets = tuple(
+            MEMORY_MAP[f"PARTY_LEVEL_{i}"] - PARTY_BLOCK_START for i in range(1, 7)
+        )
+        
+        # Create the learning agent up front so the configured kind is used
+        get_agent(settings.actions, agent_kind=settings.agent_kind)
         
         # Session statistics tracker (use parent of data_path since it points to state.json)
         stats_dir = data_path.parent / "session_stats"
         self.session_stats = SessionStats(
             session_dir=stats_dir,
             save_interval=100,
-            enabled=True
+            enabled=True,
+            max_rows=settings.max_steps
         )
+        # Per-step stats rows, handed to record_block one full block at a time
+        self._stats_buf = np.zeros(self.session_stats.save_interval, dtype=STEP_RECORD_DTYPE)
+        self._stats_i = 0
         
         # Tensorboard logger
         tensorboard_dir = data_path.parent / "tensorboard"
@@ -77,7 +124,22 @@ class PokeRushBot:
         self.episode_count = 0
         self.best_reward = float('-inf')
         self.best_badges = 0
-
+        
+        # WebUI state file is written by a daemon thread; only the latest payload matters
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        self._state_queue: queue.Queue = queue.Queue(maxsize=1)
+        self._state_writer = threading.Thread(
+            target=self._state_writer_loop, name="state-writer", daemon=True
+        )
+        self._state_writer.start()
+        
+        # Stats/log writes run on a second daemon thread as (fn, args, kwargs) jobs
+        self._io_queue: queue.Queue = queue.Queue(maxsize=1024)
+        self._io_worker = threading.Thread(
+            target=self._io_worker_loop, name="bot-io", daemon=True
+        )
+        self._io_worker.start()
+    
     def run(self, milestones: Iterable[str], auto_start: bool = True, use_init_state: bool = False) -> None:
         """Run bot with Q-Learning (CLI mode).
         
@@ -89,7 +151,10 @@ class PokeRushBot:
         try:
             self._run_internal(milestones, auto_start, use_init_state)
         finally:
-            # Always cleanup emulator
+            # Let queued stats/log writes finish, close the Q-table delta
+            # log, then cleanup emulator
+            self.flush_io()
+            close_agent()
             try:
                 self.emulator.stop()
             except:
@@ -129,213 +194,17 @@ class PokeRushBot:
             print("✅ Using pre-loaded init state - starting directly in Pallet Town!")
             # No GameStarter needed - state is already loaded and ready to go
         
-        # Define badge milestones
-        badge_names = [
-            "Boulder Badge (Pewter City)",
-            "Cascade Badge (Cerulean City)",
-            "Thunder Badge (Vermilion City)",
-            "Rainbow Badge (Celadon City)",
-            "Soul Badge (Fuchsia City)",
-            "Marsh Badge (Saffron City)",
-            "Volcano Badge (Cinnabar Island)",
-            "Earth Badge (Viridian City)",
-            "Elite Four Victory"
-        ]
-        
-        run_id = self.logger.start_run(badge_names)
+        run_id, prev_state = self._start_episode()
+        curr_state = prev_state
         
-        # Reset reward calculator for new episode
-        self.reward_calculator.reset()
+        for step_start, curr_state in self._iter_steps(run_id, prev_state):
+            self._pace(step_start, self.settings.step_delay)
         
-        # Increment episode counter
-        self.episode_count += 1
-        
-        # Get initial state
-        prev_state = self.emulator.get_state()
-        prev_action = None
-        self.total_reward = 0.0
-        self.current_step = 0
-        self.recent_actions = []
-        self.visited_tiles = set()
-        prev_badges = prev_state.badges
-        
-        print(f"\n🚀 Starting Q-Learning bot for {self.settings.max_steps} steps...")
-        print(f"   Location: {prev_state.location}, Badges: {prev_state.badges}\n")
-        
-        for step in range(self.settings.max_steps):
-            self.current_step = step
-            step_start = time.time()
-            
-            # Select action
-            action, reason = select_action(prev_state, self.settings.actions)
-            
-            # Execute action
-            self.emulator.step(action)
-            curr_state = self.emulator.get_state()
-            
-            # Calculate reward
-            elapsed = time.time() - step_start
-            reward_dict = self.reward_calculator.calculate_reward(
-                prev_state, curr_state, elapsed
-            )
-            reward = reward_dict['total']
-            self.total_reward += reward
-            
-            # Update Q-Learning (if we have previous experience)
-            if prev_action is not None:
-                done = (step == self.settings.max_steps - 1)
-                update_q_learning(prev_state, prev_action, reward, curr_state, done)
-            
-            # Track visited tiles
-            tile_key = f"{curr_state.location}_{curr_state.x}_{curr_state.y}"
-            self.visited_tiles.add(tile_key)
-            
-            # Record session statistics
-            reward_stats = self.reward_calculator.get_stats()
-            # Read party info directly from memory (GameState doesn't include it)
-            from emulator.pokemon_memory import MEMORY_MAP
-            party_count = self.emulator.read_memory(MEMORY_MAP["PARTY_COUNT"])
-            levels = [
-                self.emulator.read_memory(MEMORY_MAP[f"PARTY_LEVEL_{i}"])
-                for i in range(1, min(party_count + 1, 7))
-            ] if party_count > 0 else []
-            
-            self.session_stats.record_step(
-                step=step,
-                x=curr_state.x,
-                y=curr_state.y,
-                map_id=curr_state.map_id,
-                location=curr_state.location,
-                action=action,
-                party_count=party_count,
-                levels=levels,
-                party_types=[],  # Species IDs not critical for stats
-                hp_fraction=1.0,  # HP tracking not critical for basic stats
-                badges=curr_state.badges,
-                event_reward=reward_stats.get('event_flags', 0),
-                total_reward=self.total_reward,
-                unique_coords=len(self.visited_tiles),
-                unique_frames=reward_stats.get('unique_frames', 0),
-                deaths=reward_stats.get('deaths', 0),
-            )
-            
-            # Track coordinate for map visualization
-            self.map_visualizer.add_coordinate(curr_state.map_id, curr_state.x, curr_state.y)
-            
-            # Log to Tensorboard (every 20 steps)
-            if step % 20 == 0:
-                agent_stats = get_agent_stats()
-                self.tensorboard.log_step(
-                    step=step,
-                    reward=reward,
-                    total_reward=self.total_reward,
-                    badges=curr_state.badges,
-                    location=curr_state.location,
-                    action=action
-                )
-                self.tensorboard.log_q_learning(
-                    step=step,
-                    q_table_size=agent_stats['q_table_size'],
-                    states_explored=agent_stats['states_explored'],
-                    total_updates=agent_stats['total_updates']
-                )
-                self.tensorboard.log_exploration(
-                    step=step,
-                    unique_coords=len(self.visited_tiles),
-                    unique_frames=reward_stats.get('unique_frames', 0),
-                    event_flags=reward_stats.get('event_flags', 0),
-                    heal_count=reward_stats.get('heal_count', 0),
-                    opponent_count=reward_stats.get('opponent_count', 0)
-                )
-            
-            # Save map visualization periodically
-            if self.map_visualizer.should_save(step):
-                self.map_visualizer.save_map(step, self.episode_count)
-            
-            # Save checkpoint periodically
-            if self.checkpoint_manager.should_checkpoint(step):
-                q_table_path = self.data_path.parent / "q_table.pkl"
-                checkpoint_stats = {
-                    'step': step,
-                    'episode': self.episode_count,
-                    'total_reward': self.total_reward,
-                    'badges': curr_state.badges,
-                    'unique_coords': len(self.visited_tiles),
-                    **agent_stats
-                }
-                self.checkpoint_manager.save_checkpoint(
-                    step=step,
-                    episode=self.episode_count,
-                    q_table_path=q_table_path,
-                    stats=checkpoint_stats,
-                    score=self.total_reward
-                )
-            
-            # Check for badge progress
-            if curr_state.badges > prev_badges:
-                badge_num = curr_state.badges
-                if badge_num <= len(badge_names):
-                    milestone_name = badge_names[badge_num - 1]
-                    self.logger.log_milestone(run_id, milestone_name, curr_state)
-                    print(f"\n🏅 BADGE EARNED: {milestone_name}")
-                    print(f"   Total badges: {badge_num}/8")
-                    print(f"   Steps taken: {step}")
-                    print(f"   Total reward: {self.total_reward:+.1f}\n")
-                    
-                    # Save best checkpoint for new badge
-                    if curr_state.badges > self.best_badges:
-                        self.best_badges = curr_state.badges
-                        q_table_path = self.data_path.parent / "q_table.pkl"
-                        agent_stats = get_agent_stats()
-                        self.checkpoint_manager.save_best_checkpoint(
-                            step=step,
-                            episode=self.episode_count,
-                            score=self.total_reward,
-                            q_table_path=q_table_path,
-                            stats={
-                                'badges': curr_state.badges,
-                                'total_reward': self.total_reward,
-                                'unique_coords': len(self.visited_tiles),
-                                **agent_stats
-                            },
-                            reason=f"badge{curr_state.badges}"
-                        )
-                prev_badges = curr_state.badges
-            
-            # Store recent action for WebUI
-            self.recent_actions.append({
-                "step": step,
-                "action": action,
-                "reward": round(reward, 2),
-                "location": curr_state.location
-            })
-            if len(self.recent_actions) > 100:
-                self.recent_actions.pop(0)
-            
-            # Logging
-            decision = RunDecision(
-                step=step,
-                action=action,
-                reason=reason,
-                timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-            )
-            self.logger.log_decision(run_id, decision, curr_state)
-            self._write_state(curr_state)
-            
-            # Progress output
-            if step % 20 == 0:
-                stats = get_agent_stats()
-                print(f"Step {step:3d}: {curr_state.location:20s} "
-                      f"Badges: {curr_state.badges}  "
-                      f"Reward: {self.total_reward:+7.1f}  "
-                      f"Q-States: {stats['states_explored']}  "
-                      f"Tiles: {len(self.visited_tiles)}")
-            
-            # Update for next iteration
-            prev_state = curr_state
-            prev_action = action
-            
-            time.sleep(0.01)
+        # Make sure the final state reached the WebUI file and queued
+        # stats/log writes are done before the end-of-run saves
+        self.flush_state()
+        self._flush_stats_buf()
+        self.flush_io()
         
         # Save Q-table
         save_q_table()
@@ -349,21 +218,24 @@ class PokeRushBot:
             self.map_visualizer.save_heatmap(self.settings.max_steps, self.episode_count)
         except Exception:
             pass  # Heatmap requires matplotlib, skip if not available
+        # Wait for the renders and stop the render thread
+        self.map_visualizer.close()
         
         # Save final checkpoint
-        q_table_path = self.data_path.parent / "q_table.pkl"
+        stats = get_agent_stats()
+        q_table_files = get_q_table_files()
         final_stats = {
             'step': self.settings.max_steps,
             'episode': self.episode_count,
             'total_reward': self.total_reward,
             'badges': curr_state.badges,
-            'unique_coords': len(self.visited_tiles),
+            'unique_coords': self._unique_tiles,
             **stats
         }
         self.checkpoint_manager.save_checkpoint(
             step=self.settings.max_steps,
             episode=self.episode_count,
-            q_table_path=q_table_path,
+            q_table_files=q_table_files,
             stats=final_stats,
             score=self.total_reward,
             is_best=False
@@ -376,20 +248,25 @@ class PokeRushBot:
                 step=self.settings.max_steps,
                 episode=self.episode_count,
                 score=self.total_reward,
-                q_table_path=q_table_path,
+                q_table_files=q_table_files,
                 stats=final_stats,
                 reason="highest_reward"
             )
         
+        # Wait for background checkpoint writes to land on disk and stop
+        # the checkpoint I/O worker
+        self.checkpoint_manager.close()
+        
         # Log final episode to Tensorboard
+        reward_stats = self.reward_calculator.get_stats()
         self.tensorboard.log_episode(
             episode=self.episode_count,
             total_steps=self.settings.max_steps,
             total_reward=self.total_reward,
             max_badges=curr_state.badges,
-            unique_coords=len(self.visited_tiles),
-            unique_frames=reward_stats.get('unique_frames', 0),
-            deaths=reward_stats.get('deaths', 0)
+            unique_coords=self._unique_tiles,
+            unique_frames=reward_stats['unique_frames'],
+            deaths=reward_stats['died_count']
         )
         self.tensorboard.flush()
         
@@ -400,7 +277,7 @@ class PokeRushBot:
         print(f"   States explored: {stats['states_explored']}")
         print(f"   Q-table size: {stats['q_table_size']}")
         print(f"   Learning updates: {stats['total_updates']}")
-        print(f"   Tiles visited: {len(self.visited_tiles)}\n")
+        print(f"   Tiles visited: {self._unique_tiles}\n")
         
         self.logger.finish_run(run_id)
     
@@ -435,164 +312,353 @@ class PokeRushBot:
             print("✅ Using pre-loaded init state - starting directly in Pallet Town! (WebUI mode)")
             # No GameStarter needed - state is already loaded and ready
         
-        # Define badge milestones
-        badge_names = [
-            "Boulder Badge (Pewter City)",
-            "Cascade Badge (Cerulean City)",
-            "Thunder Badge (Vermilion City)",
-            "Rainbow Badge (Celadon City)",
-            "Soul Badge (Fuchsia City)",
-            "Marsh Badge (Saffron City)",
-            "Volcano Badge (Cinnabar Island)",
-            "Earth Badge (Viridian City)",
-            "Elite Four Victory"
-        ]
-        
-        run_id = self.logger.start_run(badge_names)
+        # Start episode tracking (WebUI)
+        self.session_stats.start_episode()
+        
+        run_id, prev_state = self._start_episode()
+        curr_state = prev_state
+        
+        if stop_flag and stop_flag():
+            print("\n🛑 Bot stopped by user")
+        else:
+            for step_start, curr_state in self._iter_steps(run_id, prev_state):
+                # Slower for viewing in WebUI
+                self._pace(step_start, self.settings.webui_step_delay)
+                # Check if we should stop
+                if stop_flag and stop_flag():
+                    print("\n🛑 Bot stopped by user")
+                    self._write_state(curr_state)
+                    break
+        
+        # Make sure the final state reached the WebUI file and queued
+        # stats/log writes are done before the end-of-run saves
+        self.flush_state()
+        self._flush_stats_buf()
+        self.flush_io()
+        
+        # Save Q-table
+        save_q_table()
+        
+        # Save session statistics
+        self.session_stats.save_to_csv()
+        
+        # Finish background map renders and checkpoint writes
+        self.map_visualizer.close()
+        self.checkpoint_manager.close()
+        
+        # Final summary
+        stats = get_agent_stats()
+        print(f"\n? Bot completed {self.settings.max_steps} steps")
+        print(f"   Total reward: {self.total_reward:+.1f}")
+        print(f"   Final badges: {curr_state.badges}")
+        print(f"   States explored: {stats['states_explored']}")
+        print(f"   Q-table size: {stats['q_table_size']}")
+        print(f"   Learning updates: {stats['total_updates']}\n")
+        
+        self.logger.finish_run(run_id)
+    
+    def _start_episode(self) -> Tuple[int, GameState]:
+        """Start a logged run and reset per-episode tracking.
+        
+        Returns:
+            Tuple of (run_id, initial game state)
+        """
+        run_id = self.logger.start_run(BADGE_NAMES)
         
         # Reset reward calculator for new episode
         self.reward_calculator.reset()
         
-        # Start episode tracking (WebUI)
-        self.session_stats.start_episode()
+        # Increment episode counter
+        self.episode_count += 1
         
         # Get initial state
         prev_state = self.emulator.get_state()
-        prev_action = None
         self.total_reward = 0.0
         self.current_step = 0
-        self.recent_actions = []
-        self.visited_tiles = set()
-        prev_badges = prev_state.badges
+        self._agent_stats_step = -1
+        self.recent_actions = deque(maxlen=100)
+        self._visited_bits = {}
+        self._unique_tiles = 0
+        self._stats_i = 0
         
         print(f"\n🚀 Starting Q-Learning bot for {self.settings.max_steps} steps...")
         print(f"   Location: {prev_state.location}, Badges: {prev_state.badges}\n")
         
-        for step in range(self.settings.max_steps):
-            # Check if we should stop
-            if stop_flag and stop_flag():
-                print("\n🛑 Bot stopped by user")
-                break
-            step_start = time.time()
+        return run_id, prev_state
+    
+    def _iter_steps(self, run_id: int, prev_state: GameState) -> Iterator[Tuple[float, GameState]]:
+        """Run the shared per-step loop, yielding after each step.
+        
+        Callers drive pacing and stopping between steps; closing the
+        generator early (break) simply ends the episode there.
+        
+        Args:
+            run_id: Run ID from _start_episode
+            prev_state: Initial game state
+        
+        Yields:
+            Tuple of (perf_counter at step start, state after the step)
+        """
+        # Hoisted lookups: this loop runs once per emulator step
+        settings = self.settings
+        actions = settings.actions
+        max_steps = settings.max_steps
+        last_step = max_steps - 1
+        write_interval = settings.state_write_interval
+        emulator = self.emulator
+        emulator_step = emulator.step
+        get_state = emulator.get_state
+        read_party_block = emulator.read_party_block
+        calculate_reward = self.reward_calculator.calculate_reward
+        get_reward_stats = self.reward_calculator.get_stats
+        get_reward_counters = self.reward_calculator.get_counters
+        record_block = self.session_stats.record_block
+        stats_buf = self._stats_buf
+        stats_cap = len(stats_buf)
+        log_decision = self.logger.log_decision
+        submit_io = self._submit_io
+        submit_io_nowait = self._submit_io_nowait
+        mark_tile = self._mark_tile
+        add_coordinate = self.map_visualizer.add_coordinate
+        checkpoint_manager = self.checkpoint_manager
+        map_visualizer = self.map_visualizer
+        tensorboard = self.tensorboard
+        append_action = self.recent_actions.append
+        party_count_off = self._party_count_off
+        party_level_offsets = self._party_level_offsets
+        q_table_files = get_q_table_files
+        perf_counter = time.perf_counter
+        time_ns = time.time_ns
+        select = select_action
+        update = update_q_learning
+        write_state = self._write_state
+        step_agent_stats = self._step_agent_stats
+        
+        action_index = {a: i for i, a in enumerate(actions)}
+        max_badge = len(BADGE_NAMES)
+        
+        prev_action = None
+        prev_badges = prev_state.badges
+        
+        for step in range(max_steps):
+            self.current_step = step
+            step_start = perf_counter()
             
             # Select action
-            action, reason = select_action(prev_state, self.settings.actions)
+            action, reason = select(prev_state, actions)
             
             # Execute action
-            self.emulator.step(action)
-            curr_state = self.emulator.get_state()
+            emulator_step(action)
+            curr_state = get_state()
             
             # Calculate reward
-            elapsed = time.time() - step_start
-            reward_dict = self.reward_calculator.calculate_reward(
-                prev_state, curr_state, elapsed
-            )
+            elapsed = perf_counter() - step_start
+            reward_dict = calculate_reward(prev_state, curr_state, elapsed)
             reward = reward_dict['total']
             self.total_reward += reward
+            
+            # Update Q-Learning (if we have previous experience)
+            if prev_action is not None:
+                done = (step == last_step)
+                update(prev_state, prev_action, reward, curr_state, done)
+            
+            # Track visited tiles
+            mark_tile(curr_state.map_id, curr_state.x, curr_state.y)
+            
+            # Record session statistics
+            event_flags, unique_frames, deaths = get_reward_counters()
             # Read party info directly from memory (GameState doesn't include it)
-            from emulator.pokemon_memory import MEMORY_MAP
-            party_count = self.emulator.read_memory(MEMORY_MAP["PARTY_COUNT"])
-            levels = [
-                self.emulator.read_memory(MEMORY_MAP[f"PARTY_LEVEL_{i}"])
-                for i in range(1, min(party_count + 1, 7))
-            ] if party_count > 0 else []
+            party_block = read_party_block()
+            party_count = party_block[party_count_off]
+            levels = [party_block[off] for off in party_level_offsets[:party_count]]
             
-            self.session_stats.record_step(
-                step=step,
-                x=curr_state.x,
-                y=curr_state.y,
-                map_id=curr_state.map_id,
-                location=curr_state.location,
-                action=action,
-                party_count=party_count,
-                levels=levels,
-                party_types=[],  # Species IDs not critical for stats
-                hp_fraction=1.0,  # HP tracking not critical for basic stats
-                badges=curr_state.badges,
-                event_reward=reward_stats.get('event_flags', 0),
-                total_reward=self.total_reward,
-                unique_coords=len(self.visited_tiles),
-                unique_frames=reward_stats.get('unique_frames', 0),
-                deaths=reward_stats.get('deaths', 0),
+            levels += [0] * (6 - len(levels))
+            
+            # Buffer the row; full blocks go to the I/O worker in one job
+            stats_i = self._stats_i
+            stats_buf[stats_i] = (
+                step,
+                curr_state.x,
+                curr_state.y,
+                curr_state.map_id,
+                action_index[action],
+                party_count,
+                levels,
+                1.0,  # HP tracking not critical for basic stats
+                curr_state.badges,
+                event_flags,
+                self.total_reward,
+                self._unique_tiles,
+                unique_frames,
+                deaths,
+                time_ns() / 1e9,
             )
+            stats_i += 1
+            if stats_i == stats_cap:
+                submit_io(record_block, stats_buf.copy(), actions)
+                stats_i = 0
+            self._stats_i = stats_i
             
-            # Track recent actions (keep last 100)
-            self.recent_actions.append({
-                'step': step,
-                'action': action,
-                'reward': round(reward, 2),
-                'location': curr_state.location
-            })
-            if len(self.recent_actions) > 100:
-                self.recent_actions.pop(0)
+            # Track coordinate for map visualization
+            add_coordinate(curr_state.map_id, curr_state.x, curr_state.y)
             
-            # Update Q-Learning (if we have previous experience)
-            if prev_action is not None:
-                done = (step == self.settings.max_steps - 1)
-                update_q_learning(prev_state, prev_action, reward, curr_state, done)
+            # Log to Tensorboard (every 20 steps)
+            if step % 20 == 0:
+                agent_stats = step_agent_stats()
+                reward_stats = get_reward_stats()
+                submit_io_nowait(
+                    tensorboard.log_step,
+                    step=step,
+                    reward=reward,
+                    total_reward=self.total_reward,
+                    badges=curr_state.badges,
+                    location=curr_state.location,
+                    action=action
+                )
+                submit_io_nowait(
+                    tensorboard.log_q_learning,
+                    step=step,
+                    q_table_size=agent_stats['q_table_size'],
+                    states_explored=agent_stats['states_explored'],
+                    total_updates=agent_stats['total_updates']
+                )
+                submit_io_nowait(
+                    tensorboard.log_exploration,
+                    step=step,
+                    unique_coords=self._unique_tiles,
+                    unique_frames=unique_frames,
+                    event_flags=event_flags,
+                    heal_count=reward_stats.get('heal_count', 0),
+                    opponent_count=reward_stats.get('opponent_count', 0)
+                )
+            
+            # Save map visualization periodically
+            if map_visualizer.should_save(step):
+                map_visualizer.save_map(step, self.episode_count)
+            
+            # Save checkpoint periodically
+            if checkpoint_manager.should_checkpoint(step):
+                agent_stats = step_agent_stats()
+                checkpoint_stats = {
+                    'step': step,
+                    'episode': self.episode_count,
+                    'total_reward': self.total_reward,
+                    'badges': curr_state.badges,
+                    'unique_coords': self._unique_tiles,
+                    **agent_stats
+                }
+                checkpoint_manager.save_checkpoint(
+                    step=step,
+                    episode=self.episode_count,
+                    q_table_files=q_table_files(),
+                    stats=checkpoint_stats,
+                    score=self.total_reward
+                )
             
             # Check for badge progress
             if curr_state.badges > prev_badges:
                 badge_num = curr_state.badges
-                if badge_num <= len(badge_names):
-                    milestone_name = badge_names[badge_num - 1]
+                if badge_num <= max_badge:
+                    milestone_name = BADGE_NAMES[badge_num - 1]
                     self.logger.log_milestone(run_id, milestone_name, curr_state)
                     print(f"\n🏅 BADGE EARNED: {milestone_name}")
                     print(f"   Total badges: {badge_num}/8")
                     print(f"   Steps taken: {step}")
                     print(f"   Total reward: {self.total_reward:+.1f}\n")
+                    
+                    # Save best checkpoint for new badge
+                    if curr_state.badges > self.best_badges:
+                        self.best_badges = curr_state.badges
+                        agent_stats = step_agent_stats()
+                        checkpoint_manager.save_best_checkpoint(
+                            step=step,
+                            episode=self.episode_count,
+                            score=self.total_reward,
+                            q_table_files=q_table_files(),
+                            stats={
+                                'badges': curr_state.badges,
+                                'total_reward': self.total_reward,
+                                'unique_coords': self._unique_tiles,
+                                **agent_stats
+                            },
+                            reason=f"badge{curr_state.badges}"
+                        )
                 prev_badges = curr_state.badges
             
+            # Store recent action for WebUI
+            append_action({
+                "step": step,
+                "action": action,
+                "reward": reward,
+                "location": curr_state.location
+            })
+            
             # Logging
             decision = RunDecision(
                 step=step,
                 action=action,
                 reason=reason,
-                timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                timestamp=time_ns(),
             )
-            self.logger.log_decision(run_id, decision, curr_state)
-            self._write_state(curr_state)
+            submit_io(log_decision, run_id, decision, curr_state)
+            if step % write_interval == 0 or step == last_step:
+                write_state(curr_state)
             
             # Progress output
             if step % 20 == 0:
-                stats = get_agent_stats()
+                stats = step_agent_stats()
                 print(f"Step {step:3d}: {curr_state.location:20s} "
                       f"Badges: {curr_state.badges}  "
                       f"Reward: {self.total_reward:+7.1f}  "
-                      f"Tiles: {len(self.visited_tiles)}  "
-                      f"Q-States: {stats['states_explored']}")
+                      f"Q-States: {stats['states_explored']}  "
+                      f"Tiles: {self._unique_tiles}")
             
             # Update for next iteration
             prev_state = curr_state
             prev_action = action
             
-            # Slower for viewing in WebUI
-            time.sleep(0.05)
-        
-        # Save Q-table
-        save_q_table()
-        
-        # Save session statistics
-        self.session_stats.save_to_csv()
+            yield step_start, curr_state
+    
+    def _mark_tile(self, map_id: int, x: int, y: int) -> None:
+        """Set the visited bit for a tile, counting it on first visit."""
+        bitmap = self._visited_bits.get(map_id)
+        if bitmap is None:
+            bitmap = bytearray(8192)  # 256 * 256 bits
+            self._visited_bits[map_id] = bitmap
+        idx = (y << 8) | x
+        byte = idx >> 3
+        bit = 1 << (idx & 7)
+        if not bitmap[byte] & bit:
+            bitmap[byte] |= bit
+            self._unique_tiles += 1
+    
+    @staticmethod
+    def _pace(step_start: float, period: float) -> None:
+        """Sleep off whatever is left of a step's time budget.
         
-        # Final summary
-        stats = get_agent_stats()
-        print(f"\n? Bot completed {self.settings.max_steps} steps")
-        print(f"   Total reward: {total_reward:+.1f}")
-        print(f"   Final badges: {curr_state.badges}")
-        print(f"   States explored: {stats['states_explored']}")
-        print(f"   Q-table size: {stats['q_table_size']}")
-        print(f"   Learning updates: {stats['total_updates']}\n")
+        Args:
+            step_start: time.perf_counter() taken at the start of the step
+            period: Minimum seconds per step (0 disables pacing)
+        """
+        if period:
+            remaining = period - (time.perf_counter() - step_start)
+            if remaining > 0:
+                time.sleep(remaining)
+    
+    def _step_agent_stats(self) -> Dict:
+        """Agent stats for the current step, fetched at most once per step.
         
-        self.logger.finish_run(run_id)
-
+        Only valid after the step's Q-update; every caller in the run loops
+        comes after it.
+        """
+        if self._agent_stats_step != self.current_step:
+            self._agent_stats = get_agent_stats()
+            self._agent_stats_step = self.current_step
+        return self._agent_stats
+    
     def _write_state(self, state: GameState) -> None:
         # Get Q-Learning stats
-        stats = get_agent_stats()
-        
-        # Track visited tile
-        tile_key = f"{state.map_id}_{state.x}_{state.y}"
-        self.visited_tiles.add(tile_key)
+        stats = self._step_agent_stats()
         
         # Get party and money
         try:
@@ -624,11 +690,83 @@ class PokeRushBot:
             "q_table_size": stats['q_table_size'],
             "total_updates": stats['total_updates'],
             "epsilon": stats.get('epsilon', 0.1),
-            "tiles_visited": len(self.visited_tiles),
+            "tiles_visited": self._unique_tiles,
             # Recent Actions (last 30)
-            "recent_actions": self.recent_actions[-30:]
+            "recent_actions": list(islice(self.recent_actions, max(0, len(self.recent_actions) - 30), None))
         }
-        self.data_path.parent.mkdir(parents=True, exist_ok=True)
-        self.data_path.write_text(json.dumps(payload, indent=2))
+        self._publish_state(payload)
+    
+    def _publish_state(self, payload: dict) -> None:
+        """Hand a state payload to the writer thread, replacing any unwritten one.
+        
+        Args:
+            payload: JSON-serializable state dict
+        """
+        while True:
+            try:
+                self._state_queue.put_nowait(payload)
+                return
+            except queue.Full:
+                # Drop the stale payload; the WebUI only needs the current state
+                try:
+                    self._state_queue.get_nowait()
+                    self._state_queue.task_done()
+                except queue.Empty:
+                    pass
+    
+    def _state_writer_loop(self) -> None:
+        """Writer thread: encode compactly and atomically replace data_path."""
+        tmp_path = self.data_path.with_name(self.data_path.name + ".tmp")
+        while True:
+            payload = self._state_queue.get()
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(dumps_compact(payload))
+                # Readers (WebUI) never see a half-written file
+                os.replace(tmp_path, self.data_path)
+            except Exception as e:
+                print(f"⚠️  Failed to write state: {e}")
+            finally:
+                self._state_queue.task_done()
+    
+    def _submit_io(self, fn, /, *args, **kwargs) -> None:
+        """Queue a stats/log call for the I/O thread, blocking if the queue is full."""
+        self._io_queue.put((fn, args, kwargs))
+    
+    def _submit_io_nowait(self, fn, /, *args, **kwargs) -> None:
+        """Queue a non-critical stats/log call; dropped if the queue is full."""
+        try:
+            self._io_queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            pass
+    
+    def _io_worker_loop(self) -> None:
+        """I/O thread: run queued calls in submission order."""
+        while True:
+            fn, args, kwargs = self._io_queue.get()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                print(f"⚠️  Background write failed ({getattr(fn, '__qualname__', fn)}): {e}")
+            finally:
+                self._io_queue.task_done()
+    
+    def _flush_stats_buf(self) -> None:
+        """Queue any buffered stats rows that did not fill a whole block."""
+        if self._stats_i:
+            self._submit_io(
+                self.session_stats.record_block,
+                self._stats_buf[:self._stats_i].copy(),
+                self.settings.actions
+            )
+            self._stats_i = 0
+    
+    def flush_io(self) -> None:
+        """Block until all queued stats/log calls have run."""
+        self._io_queue.join()
+    
+    def flush_state(self) -> None:
+        """Block until the latest published state has been written."""
+        self._state_queue.join()
 
 
@@ -1,19 +1,91 @@
 """Screen-based exploration using KNN for frame deduplication.
 
-Uses hnswlib for efficient nearest-neighbor search to detect unique frames.
-This prevents the bot from getting stuck in menus or repeated states.
+Uses an HNSW index for efficient nearest-neighbor search to detect unique
+frames: faiss with 8-bit scalar-quantized vectors when installed, else
+hnswlib. This prevents the bot from getting stuck in menus or repeated states.
+Frames first go through a 64-bit dHash lookup; only hash misses reach the
+index, as a compact grayscale thumbnail.
 
 Based on PokemonRedExperiments approach.
 """
 
+import os
+
 import numpy as np
 try:
     import hnswlib
     HNSWLIB_AVAILABLE = True
 except ImportError:
     HNSWLIB_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+if not (HNSWLIB_AVAILABLE or FAISS_AVAILABLE):
     print("⚠️  Warning: hnswlib not available. Screen exploration will be limited.")
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    from bot._screen_kernel import dhash_kernel, frame_hash_kernel
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _block_mean(gray: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Average a 2D image down to (rows, cols), cropping any remainder."""
+    h = gray.shape[0] // rows
+    w = gray.shape[1] // cols
+    return gray[:rows * h, :cols * w].reshape(rows, h, cols, w).mean(axis=(1, 3))
+
+
+class _FaissHNSWIndex:
+    """faiss IndexHNSWSQ behind the hnswlib calls ScreenExplorer uses.
+    
+    Vectors are stored as 8-bit scalar-quantized codes. Thumbnail values
+    lie in [0, 255], so the quantizer is trained on that range directly
+    instead of on sample frames.
+    """
+    
+    def __init__(self, dim: int, M: int = 32):
+        self.index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, M)
+        self.index.train(np.stack([np.zeros(dim, np.float32), np.full(dim, 255.0, np.float32)]))
+    
+    def knn_query(self, vectors: np.ndarray, k: int = 1, num_threads: int = -1):
+        """Return (labels, squared L2 distances) like hnswlib."""
+        distances, labels = self.index.search(np.atleast_2d(vectors), k)
+        return labels, distances
+    
+    def add_items(self, vectors: np.ndarray, ids=None, num_threads: int = -1):
+        """Append vectors; faiss numbers them sequentially, matching ScreenExplorer's ids."""
+        self.index.add(np.atleast_2d(vectors))
+
+
+def _dhash(intensity: np.ndarray) -> int:
+    """64-bit difference hash: horizontal gradient signs of an 8x9 thumbnail."""
+    small = _block_mean(intensity, 8, 9)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def _frame_hash(frame: np.ndarray) -> int:
+    """Unsigned 64-bit hash of every 4th pixel of a frame (hash fallback)."""
+    # Downsample to reduce hash collisions while keeping uniqueness
+    if XXHASH_AVAILABLE:
+        # xxh3 reads the array buffer directly, no tobytes() copy
+        return xxhash.xxh3_64_intdigest(np.ascontiguousarray(frame[::4, ::4, :]))
+    if NUMBA_AVAILABLE:
+        return int(frame_hash_kernel(frame, 4))
+    return hash(frame[::4, ::4, :].tobytes()) & 0xFFFFFFFFFFFFFFFF
+
 
 class ScreenExplorer:
     """KNN-based screen frame deduplication for exploration tracking."""
@@ -22,67 +94,100 @@ class ScreenExplorer:
         self,
         frame_shape: tuple = (144, 160, 3),
         max_elements: int = 20000,
-        similarity_threshold: float = 2000000.0
+        similarity_threshold: float = 2000000.0,
+        batch_size: int = 16,
+        compact_size: int = 16,
+        bloom_bits: int = 22
     ):
         """Initialize screen explorer.
         
         Args:
             frame_shape: Expected screen frame shape (H, W, C)
-            max_elements: Maximum number of frames to store
+            max_elements: Maximum number of frames to store (across episodes)
             similarity_threshold: Distance threshold for considering frames similar
+                (squared L2 at full resolution)
+            batch_size: Frames buffered by queue_frame before a batched KNN flush
+            compact_size: Side of the grayscale thumbnail stored in the index
+            bloom_bits: log2 of the bit count of the hash-fallback Bloom filter (max 32)
         """
         self.frame_shape = frame_shape
         self.max_elements = max_elements
         self.similarity_threshold = similarity_threshold
         
-        # Calculate vector dimension (flattened frame)
-        self.vec_dim = int(np.prod(frame_shape))
+        # Frames are indexed as compact_size x compact_size grayscale
+        # thumbnails; the squared-L2 threshold scales with the element count
+        self.compact_size = compact_size
+        self.vec_dim = compact_size * compact_size
+        self._threshold = similarity_threshold * self.vec_dim / int(np.prod(frame_shape))
+        
+        # dHashes of frames already checked; a hit skips the index entirely
+        self._hash_set = set()
+        
+        # Frames waiting for a batched query/insert (see queue_frame)
+        self._pending = np.empty((batch_size, self.vec_dim), dtype=np.float32)
+        self._pending_n = 0
+        # Threads for batched hnswlib calls; single frames stay on one thread
+        self._n_threads = max(1, (os.cpu_count() or 2) // 2)
         
         # Initialize KNN index
         self.knn_index = None
-        self.use_knn = HNSWLIB_AVAILABLE
+        self.use_knn = HNSWLIB_AVAILABLE or FAISS_AVAILABLE
         
         if self.use_knn:
             self._init_knn_index()
         
-        # Fallback to simple frame hashing if hnswlib unavailable
-        self.seen_frame_hashes = set()
+        # The index persists across episodes; novelty is per episode, so
+        # track which index ids this episode has matched or added
+        self._episode_ids = set()
+        self._next_id = 0
+        
+        # Fallback to simple frame hashing if hnswlib unavailable: a Bloom
+        # filter with two probes per 64-bit hash (rare false "seen" results)
+        self._bloom_shift = bloom_bits
+        self._bloom_mask = (1 << bloom_bits) - 1
+        self._bloom = bytearray(1 << max(0, bloom_bits - 3))
         self.frame_count = 0
     
     def _init_knn_index(self):
-        """Initialize hnswlib KNN index."""
+        """Initialize the KNN index (faiss if available, else hnswlib)."""
         try:
-            # L2 distance, dimension = flattened frame size
-            self.knn_index = hnswlib.Index(space='l2', dim=self.vec_dim)
-            
-            # Initialize index with max elements
-            # ef_construction=100 and M=16 are recommended values
-            self.knn_index.init_index(
-                max_elements=self.max_elements,
-                ef_construction=100,
-                M=16
-            )
+            if FAISS_AVAILABLE:
+                self.knn_index = _FaissHNSWIndex(self.vec_dim)
+            else:
+                # L2 distance, dimension = flattened frame size
+                self.knn_index = hnswlib.Index(space='l2', dim=self.vec_dim)
+                
+                # Initialize index with max elements
+                # ef_construction=100 and M=16 are recommended values
+                self.knn_index.init_index(
+                    max_elements=self.max_elements,
+                    ef_construction=100,
+                    M=16
+                )
             
+            self._next_id = 0
             self.frame_count = 0
-            print(f"✅ KNN Screen Explorer initialized (dim={self.vec_dim}, max={self.max_elements})")
+            backend = "faiss" if FAISS_AVAILABLE else "hnswlib"
+            print(f"✅ KNN Screen Explorer initialized ({backend}, dim={self.vec_dim}, max={self.max_elements})")
         except Exception as e:
             print(f"⚠️  Failed to initialize KNN index: {e}")
             self.use_knn = False
     
     def reset(self):
         """Reset the explorer for a new episode."""
-        if self.use_knn:
-            self._init_knn_index()
-        else:
-            self.seen_frame_hashes.clear()
-            self.frame_count = 0
+        self._pending_n = 0
+        self._hash_set.clear()
+        # Keep the KNN graph; only the per-episode novelty state starts over
+        self._episode_ids.clear()
+        self._bloom[:] = bytes(len(self._bloom))
+        self.frame_count = 0
     
     def add_frame(self, frame: np.ndarray) -> bool:
         """Add a frame and check if it's novel.
         
         Args:
             frame: Screen frame array (H, W, C)
-            
+        
         Returns:
             True if frame is novel (different from seen frames), False otherwise
         """
@@ -91,58 +196,212 @@ class ScreenExplorer:
         else:
             return self._add_frame_hash(frame)
     
-    def _add_frame_knn(self, frame: np.ndarray) -> bool:
-        """Add frame using KNN index (accurate deduplication)."""
-        # Flatten frame to vector
-        frame_vec = frame.flatten().astype(np.float32)
+    def add_frames(self, frames) -> np.ndarray:
+        """Check a batch of frames (e.g. a replay buffer) for novelty at once.
         
-        # Ensure correct dimension
-        if len(frame_vec) != self.vec_dim:
-            print(f"⚠️  Frame dimension mismatch: {len(frame_vec)} != {self.vec_dim}")
-            return False
+        Frames are judged in order, as if passed to add_frame one by one,
+        but the KNN query/insert or Bloom filter update runs once for the
+        whole batch. Frames queued with queue_frame are not affected.
+        
+        Args:
+            frames: (B, H, W, C) array or sequence of screen frames
+        
+        Returns:
+            Boolean novelty mask over the batch
+        """
+        if len(frames) == 0:
+            return np.zeros(0, dtype=bool)
+        if not self.use_knn:
+            return self._add_frames_hash(frames)
+        
+        novel = np.zeros(len(frames), dtype=bool)
+        rows, vecs = [], []
+        for i, frame in enumerate(frames):
+            vec = self._compact_vec(frame)
+            if vec is not None:
+                rows.append(i)
+                vecs.append(vec)
+        if vecs:
+            novel[rows] = self._check_batch(np.stack(vecs), self._n_threads)
+        return novel
+    
+    def queue_frame(self, frame: np.ndarray) -> None:
+        """Buffer a frame for batched novelty checking.
         
-        # Check if we've reached capacity
-        if self.frame_count >= self.max_elements:
-            # Index is full, just query without adding
-            labels, distances = self.knn_index.knn_query(frame_vec, k=1)
-            is_novel = distances[0][0] > self.similarity_threshold
-            return is_novel
+        The KNN query and insert for buffered frames run together once
+        batch_size frames are queued (or on flush()), which costs about
+        the same as a single-frame query. Without hnswlib the frame is
+        checked immediately.
         
-        # Query existing frames if we have any
-        if self.frame_count > 0:
+        Args:
+            frame: Screen frame array (H, W, C)
+        """
+        if not self.use_knn:
+            self._add_frame_hash(frame)
+            return
+        
+        vec = self._compact_vec(frame)
+        if vec is None:
+            return
+        
+        self._pending[self._pending_n] = vec
+        self._pending_n += 1
+        if self._pending_n == len(self._pending):
+            self.flush()
+    
+    def flush(self) -> np.ndarray:
+        """Check all queued frames in one KNN query and add the novel ones.
+        
+        Returns:
+            Boolean novelty mask over the flushed frames, in queue order
+        """
+        n = self._pending_n
+        self._pending_n = 0
+        if n == 0 or not self.use_knn:
+            return np.zeros(0, dtype=bool)
+        
+        return self._check_batch(self._pending[:n], self._n_threads)
+    
+    def _check_batch(self, batch: np.ndarray, num_threads: int) -> np.ndarray:
+        """Novelty for a batch of index vectors, updating the index.
+        
+        A frame is novel if its nearest indexed frame is either too far away
+        (the frame is inserted) or not yet matched this episode.
+        
+        Args:
+            batch: (n, vec_dim) float32 vectors
+            num_threads: Threads for the hnswlib query/insert
+        
+        Returns:
+            Boolean novelty mask over the batch
+        """
+        n = len(batch)
+        threshold = self._threshold
+        novel = np.zeros(n, dtype=bool)
+        
+        # Match against frames already in the index (this or earlier episodes)
+        far = np.ones(n, dtype=bool)
+        if self._next_id > 0:
             try:
-                labels, distances = self.knn_index.knn_query(frame_vec, k=1)
-                
-                # Check if frame is similar to any existing frame
-                if distances[0][0] < self.similarity_threshold:
-                    # Frame is too similar to an existing one
-                    return False
+                labels, distances = self.knn_index.knn_query(batch, k=1, num_threads=num_threads)
+                far = distances[:, 0] >= threshold
+                for row in np.flatnonzero(~far):
+                    label = int(labels[row, 0])
+                    if label not in self._episode_ids:
+                        self._episode_ids.add(label)
+                        novel[row] = True
             except Exception as e:
                 print(f"⚠️  KNN query error: {e}")
-                pass
         
-        # Add new frame to index
-        try:
-            self.knn_index.add_items(frame_vec, self.frame_count)
-            self.frame_count += 1
-            return True
-        except Exception as e:
-            print(f"⚠️  Failed to add frame to KNN index: {e}")
+        # Drop far frames that duplicate an earlier one in the same batch
+        candidates = np.flatnonzero(far)
+        if len(candidates) > 1:
+            vecs = batch[candidates].astype(np.float64)
+            sq = np.einsum('ij,ij->i', vecs, vecs)
+            dist = sq[:, None] + sq[None, :] - 2.0 * (vecs @ vecs.T)
+            kept = []
+            for i, row in enumerate(candidates):
+                if kept and dist[i, kept].min() < threshold:
+                    far[row] = False
+                else:
+                    kept.append(i)
+        novel |= far
+        
+        # Insert as many new frames as capacity allows; the rest are still
+        # reported novel but not remembered (index full)
+        rows = np.flatnonzero(far)[:max(0, self.max_elements - self._next_id)]
+        if len(rows):
+            ids = np.arange(self._next_id, self._next_id + len(rows))
+            try:
+                self.knn_index.add_items(batch[rows], ids, num_threads=num_threads)
+                self._next_id += len(rows)
+                self._episode_ids.update(ids.tolist())
+            except Exception as e:
+                print(f"⚠️  Failed to add frames to KNN index: {e}")
+                novel[rows] = False
+        
+        self.frame_count = len(self._episode_ids)
+        return novel
+    
+    def _compact_vec(self, frame: np.ndarray):
+        """dHash-filter a frame and return its index vector.
+        
+        Args:
+            frame: Screen frame array (H, W, C)
+        
+        Returns:
+            Flattened grayscale thumbnail (float32), or None if the frame's
+            dHash was already seen or the frame has the wrong size
+        """
+        if frame.shape[:2] != tuple(self.frame_shape[:2]):
+            print(f"⚠️  Frame shape mismatch: {frame.shape} != {self.frame_shape}")
+            return None
+        
+        if frame.ndim != 3:
+            frame_hash = _dhash(frame)
+        elif NUMBA_AVAILABLE:
+            frame_hash = int(dhash_kernel(frame))
+        else:
+            frame_hash = _dhash(frame.sum(axis=2, dtype=np.int32))
+        if frame_hash in self._hash_set:
+            return None
+        self._hash_set.add(frame_hash)
+        
+        gray = frame.mean(axis=2, dtype=np.float32) if frame.ndim == 3 else frame.astype(np.float32)
+        size = self.compact_size
+        return _block_mean(gray, size, size).astype(np.float32).reshape(-1)
+    
+    def _add_frame_knn(self, frame: np.ndarray) -> bool:
+        """Add frame using KNN index (accurate deduplication)."""
+        # Cheap hash check first; only new hashes reach the index
+        frame_vec = self._compact_vec(frame)
+        if frame_vec is None:
             return False
+        
+        return bool(self._check_batch(frame_vec[None, :], 1)[0])
     
     def _add_frame_hash(self, frame: np.ndarray) -> bool:
         """Add frame using simple hashing (fallback method)."""
-        # Create hash from downsampled frame
-        # Downsample to reduce hash collisions while keeping uniqueness
-        downsampled = frame[::4, ::4, :].tobytes()
-        frame_hash = hash(downsampled)
+        frame_hash = _frame_hash(frame)
+        
+        # Two bit positions from disjoint slices of the hash
+        bloom = self._bloom
+        i1 = frame_hash & self._bloom_mask
+        i2 = (frame_hash >> self._bloom_shift) & self._bloom_mask
+        bit1 = 1 << (i1 & 7)
+        bit2 = 1 << (i2 & 7)
+        if bloom[i1 >> 3] & bit1 and bloom[i2 >> 3] & bit2:
+            return False
+        
+        bloom[i1 >> 3] |= bit1
+        bloom[i2 >> 3] |= bit2
+        self.frame_count += 1
+        return True
+    
+    def _add_frames_hash(self, frames) -> np.ndarray:
+        """Batched _add_frame_hash: one vectorized Bloom filter probe/update."""
+        hashes = np.fromiter((_frame_hash(f) for f in frames), dtype=np.uint64, count=len(frames))
+        
+        # Only the first occurrence of a hash within the batch can be novel
+        first = np.zeros(len(hashes), dtype=bool)
+        first[np.unique(hashes, return_index=True)[1]] = True
+        
+        mask = np.uint64(self._bloom_mask)
+        i1 = hashes & mask
+        i2 = (hashes >> np.uint64(self._bloom_shift)) & mask
+        byte1, byte2 = (i1 >> np.uint64(3)).astype(np.intp), (i2 >> np.uint64(3)).astype(np.intp)
+        bit1 = np.left_shift(np.uint64(1), i1 & np.uint64(7)).astype(np.uint8)
+        bit2 = np.left_shift(np.uint64(1), i2 & np.uint64(7)).astype(np.uint8)
         
-        if frame_hash not in self.seen_frame_hashes:
-            self.seen_frame_hashes.add(frame_hash)
-            self.frame_count += 1
-            return True
+        bloom = np.frombuffer(self._bloom, dtype=np.uint8)
+        seen = ((bloom[byte1] & bit1) != 0) & ((bloom[byte2] & bit2) != 0)
+        novel = first & ~seen
+        np.bitwise_or.at(bloom, byte1[novel], bit1[novel])
+        np.bitwise_or.at(bloom, byte2[novel], bit2[novel])
+        del bloom
         
-        return False
+        self.frame_count += int(novel.sum())
+        return novel
     
     def get_unique_frame_count(self) -> int:
         """Get number of unique frames seen."""
@@ -153,7 +412,8 @@ class ScreenExplorer:
         return {
             'unique_frames': self.frame_count,
             'max_capacity': self.max_elements,
-            'capacity_used': f"{(self.frame_count / self.max_elements) * 100:.1f}%",
+            'indexed_frames': self._next_id,
+            'capacity_used': f"{(self._next_id / self.max_elements) * 100:.1f}%",
             'using_knn': self.use_knn,
             'vec_dim': self.vec_dim
         }
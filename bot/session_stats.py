@@ -1,15 +1,24 @@
 """Session statistics tracking and CSV export.
 
 Tracks detailed statistics during training episodes and exports to CSV
-for analysis and visualization.
+for analysis and visualization. Batched rows are streamed to a
+memory-mapped binary file and only converted to CSV on save. With pyarrow
+installed, saves append row groups to a Parquet file instead of rewriting
+the CSV.
 
 Based on PokemonRedExperiments agent_stats approach.
 """
 
+import atexit
+import mmap
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence
 import time
 
+import numpy as np
+
+from emulator.pokemon_memory import get_map_name
+
 try:
     import pandas as pd
     PANDAS_AVAILABLE = True
@@ -17,6 +26,89 @@ except ImportError:
     PANDAS_AVAILABLE = False
     print("⚠️  Warning: pandas not available. CSV export disabled.")
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    from bot._stats_kernel import summarize_kernel
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# One row per step for SessionStats.record_block; levels is zero-padded to
+# 6 slots (party_count says how many are real), action indexes action_names
+STEP_RECORD_DTYPE = np.dtype([
+    ('step', np.int32),
+    ('x', np.int16),
+    ('y', np.int16),
+    ('map_id', np.int16),
+    ('action', np.int16),
+    ('party_count', np.uint8),
+    ('levels', np.uint8, (6,)),
+    ('hp', np.float32),
+    ('badges', np.int8),
+    ('event_reward', np.float64),
+    ('total_reward', np.float64),
+    ('unique_coords', np.int32),
+    ('unique_frames', np.int32),
+    ('deaths', np.int16),
+    ('timestamp', np.float64),
+])
+
+# Record layout of stats.bin: a step row plus its episode and session-wide step
+_BIN_RECORD_DTYPE = np.dtype(
+    [('episode', np.int32), ('total_step', np.int64)] + STEP_RECORD_DTYPE.descr
+)
+
+# stats.bin starts with the record count (int64), padded to 16 bytes
+_BIN_HEADER_SIZE = 16
+
+def _summarize(total_reward: np.ndarray, badges: np.ndarray, deaths: np.ndarray) -> tuple:
+    """Sum/max of the summary columns (same non-zero length).
+    
+    Returns:
+        (reward_sum, reward_max, badges_sum, badges_max, deaths_max)
+    """
+    if NUMBA_AVAILABLE:
+        r_sum, r_max, b_sum, b_max, d_max = summarize_kernel(total_reward, badges, deaths)
+        return float(r_sum), float(r_max), int(b_sum), int(b_max), int(d_max)
+    return (
+        float(total_reward.sum()), float(total_reward.max()),
+        int(badges.sum(dtype=np.int64)), int(badges.max()),
+        int(deaths.max()),
+    )
+
+
+# CSV columns in order; numeric ones get a preallocated array in
+# SessionStats, the rest (dtype None) a list
+_CSV_COLUMNS = (
+    ('episode', np.int32),
+    ('step', np.int32),
+    ('total_step', np.int64),
+    ('x', np.int32),
+    ('y', np.int32),
+    ('map', np.int32),
+    ('location', None),
+    ('action', None),
+    ('party_count', np.int32),
+    ('level_sum', np.int32),
+    ('levels', None),
+    ('party_types', None),
+    ('hp', np.float64),
+    ('badges', np.int32),
+    ('event_reward', np.float64),
+    ('total_reward', np.float64),
+    ('unique_coords', np.int32),
+    ('unique_frames', np.int32),
+    ('deaths', np.int32),
+    ('timestamp', np.float64),
+)
+
 
 class SessionStats:
     """Tracks and exports detailed session statistics."""
@@ -25,25 +117,54 @@ class SessionStats:
         self,
         session_dir: Path,
         save_interval: int = 100,
-        enabled: bool = True
+        enabled: bool = True,
+        max_rows: int = 100_000
     ):
         """Initialize session statistics tracker.
         
         Args:
             session_dir: Directory to save statistics
-            save_interval: Save CSV every N steps
+            save_interval: Save CSV every N steps recorded with record_step
             enabled: Whether statistics tracking is enabled
+            max_rows: Initial stats.bin capacity in rows (grows if exceeded)
         """
         self.session_dir = Path(session_dir)
         self.save_interval = save_interval
         self.enabled = enabled and PANDAS_AVAILABLE
         
-        self.stats_data: List[Dict[str, Any]] = []
+        # Rows recorded via record_step, one buffer per column (grown by doubling)
+        self._cap = 4096
+        self._n = 0
+        self._cols: Dict[str, Any] = {
+            name: [] if dtype is None else np.empty(self._cap, dtype=dtype)
+            for name, dtype in _CSV_COLUMNS
+        }
+        # extra_stats columns, padded with None for rows that lacked them
+        self._extra: Dict[str, List[Any]] = {}
+        # Rows recorded via record_block go to a memory-mapped stats.bin
+        self._bin_path = self.session_dir / "stats.bin"
+        self._bin_file = None
+        self._bin_map: Optional[mmap.mmap] = None
+        self._bin_capacity = max(1, max_rows)
+        self._bin_rows = 0
+        self._action_names: Sequence[str] = ()
+        self._row_count = 0
+        
+        # Parquet export (pyarrow): rows are appended once and then dropped
+        # from memory; get_summary works from running aggregates
+        self.use_parquet = PYARROW_AVAILABLE
+        self._parquet_path = self.session_dir / "stats.parquet"
+        self._writer = None
+        self._bin_exported = 0
+        self._dropped_columns: set = set()
+        self._agg = self._empty_aggregates()
         self.episode_count = 0
         self.total_steps = 0
         
         if self.enabled:
             self.session_dir.mkdir(parents=True, exist_ok=True)
+            if self.use_parquet:
+                atexit.register(self.close)
     
     def record_step(
         self,
@@ -91,39 +212,179 @@ class SessionStats:
         
         self.total_steps += 1
         
-        # Create stats entry
-        stats_entry = {
-            'episode': self.episode_count,
-            'step': step,
-            'total_step': self.total_steps,
-            'x': x,
-            'y': y,
-            'map': map_id,
-            'location': location,
-            'action': action,
-            'party_count': party_count,
-            'level_sum': sum(levels) if levels else 0,
-            'levels': str(levels),  # Store as string for CSV
-            'party_types': str(party_types),  # Store as string for CSV
-            'hp': hp_fraction,
-            'badges': badges,
-            'event_reward': event_reward,
-            'total_reward': total_reward,
-            'unique_coords': unique_coords,
-            'unique_frames': unique_frames,
-            'deaths': deaths,
-            'timestamp': time.time(),
-        }
+        n = self._n
+        if n == self._cap:
+            self._grow()
+        
+        # Store the entry column by column
+        cols = self._cols
+        cols['episode'][n] = self.episode_count
+        cols['step'][n] = step
+        cols['total_step'][n] = self.total_steps
+        cols['x'][n] = x
+        cols['y'][n] = y
+        cols['map'][n] = map_id
+        cols['location'].append(location)
+        cols['action'].append(action)
+        cols['party_count'][n] = party_count
+        cols['level_sum'][n] = sum(levels) if levels else 0
+        # Stringified for CSV in _step_frame; tuples guard against caller mutation
+        cols['levels'].append(tuple(levels))
+        cols['party_types'].append(tuple(party_types))
+        cols['hp'][n] = hp_fraction
+        cols['badges'][n] = badges
+        cols['event_reward'][n] = event_reward
+        cols['total_reward'][n] = total_reward
+        cols['unique_coords'][n] = unique_coords
+        cols['unique_frames'][n] = unique_frames
+        cols['deaths'][n] = deaths
+        cols['timestamp'][n] = time.time()
         
         # Add extra stats
-        stats_entry.update(extra_stats)
+        for key, value in extra_stats.items():
+            column = self._extra.get(key)
+            if column is None:
+                column = self._extra[key] = [None] * n
+            column.append(value)
+        for column in self._extra.values():
+            if len(column) == n:
+                column.append(None)
         
-        self.stats_data.append(stats_entry)
+        self._n = n + 1
+        self._row_count += 1
         
         # Periodic save
-        if len(self.stats_data) % self.save_interval == 0:
+        if self._row_count % self.save_interval == 0:
             self.save_to_csv()
     
+    def _grow(self):
+        """Double the capacity of the numeric record_step columns."""
+        self._cap *= 2
+        for name, dtype in _CSV_COLUMNS:
+            if dtype is not None:
+                column = np.empty(self._cap, dtype=dtype)
+                column[:self._n] = self._cols[name][:self._n]
+                self._cols[name] = column
+    
+    def record_block(self, block: np.ndarray, action_names: Sequence[str]):
+        """Append a block of steps to stats.bin.
+        
+        Rows are stored as fixed-width binary records; CSV formatting only
+        happens when save_to_csv converts the file.
+        
+        Args:
+            block: Structured array with STEP_RECORD_DTYPE, one row per step
+            action_names: Action names indexed by block['action']
+        """
+        if not self.enabled or len(block) == 0:
+            return
+        
+        n = len(block)
+        records = np.empty(n, dtype=_BIN_RECORD_DTYPE)
+        records['episode'] = self.episode_count
+        records['total_step'] = np.arange(self.total_steps + 1, self.total_steps + n + 1)
+        for name in STEP_RECORD_DTYPE.names:
+            records[name] = block[name]
+        
+        if self._bin_map is None:
+            self._open_bin()
+        if self._bin_rows + n > self._bin_capacity:
+            self._grow_bin(self._bin_rows + n)
+        
+        offset = _BIN_HEADER_SIZE + self._bin_rows * _BIN_RECORD_DTYPE.itemsize
+        self._bin_map[offset:offset + records.nbytes] = memoryview(records).cast('B')
+        self._bin_rows += n
+        self._bin_map[:8] = np.int64(self._bin_rows).tobytes()
+        
+        self._action_names = action_names
+        self.total_steps += n
+        self._row_count += n
+    
+    def _open_bin(self):
+        """Create stats.bin and map it at the current capacity."""
+        self._bin_file = open(self._bin_path, 'w+b')
+        self._bin_file.truncate(_BIN_HEADER_SIZE + self._bin_capacity * _BIN_RECORD_DTYPE.itemsize)
+        self._bin_map = mmap.mmap(self._bin_file.fileno(), 0)
+    
+    def _grow_bin(self, min_rows: int):
+        """Remap stats.bin with room for at least min_rows records."""
+        while self._bin_capacity < min_rows:
+            self._bin_capacity *= 2
+        self._bin_map.close()
+        self._bin_file.truncate(_BIN_HEADER_SIZE + self._bin_capacity * _BIN_RECORD_DTYPE.itemsize)
+        self._bin_map = mmap.mmap(self._bin_file.fileno(), 0)
+    
+    def _bin_frame(self, start: int = 0) -> "pd.DataFrame":
+        """Convert records in stats.bin (from index start) to record_step's CSV columns."""
+        records = np.frombuffer(
+            self._bin_map, dtype=_BIN_RECORD_DTYPE,
+            count=self._bin_rows - start,
+            offset=_BIN_HEADER_SIZE + start * _BIN_RECORD_DTYPE.itemsize
+        ).copy()
+        levels = records['levels']
+        party_count = records['party_count']
+        return pd.DataFrame({
+            'episode': records['episode'],
+            'step': records['step'],
+            'total_step': records['total_step'],
+            'x': records['x'],
+            'y': records['y'],
+            'map': records['map_id'],
+            'location': [get_map_name(int(m)) for m in records['map_id']],
+            'action': np.asarray(self._action_names, dtype=object)[records['action']],
+            'party_count': party_count,
+            'level_sum': levels.sum(axis=1, dtype=np.int64),
+            'levels': [str(row[:count].tolist()) for row, count in zip(levels, party_count)],
+            'party_types': '[]',
+            'hp': records['hp'],
+            'badges': records['badges'],
+            'event_reward': records['event_reward'],
+            'total_reward': records['total_reward'],
+            'unique_coords': records['unique_coords'],
+            'unique_frames': records['unique_frames'],
+            'deaths': records['deaths'],
+            'timestamp': records['timestamp'],
+        })
+    
+    def _step_frame(self) -> "pd.DataFrame":
+        """Buffered record_step rows as a DataFrame (views of the numeric columns)."""
+        n = self._n
+        data = {
+            name: self._cols[name] if dtype is None else self._cols[name][:n]
+            for name, dtype in _CSV_COLUMNS
+        }
+        data['levels'] = [str(list(v)) for v in data['levels']]
+        data['party_types'] = [str(list(v)) for v in data['party_types']]
+        data.update(self._extra)
+        return pd.DataFrame(data)
+    
+    def _reset_step_rows(self):
+        """Drop buffered record_step rows (capacity is kept)."""
+        self._n = 0
+        for name, dtype in _CSV_COLUMNS:
+            if dtype is None:
+                self._cols[name] = []
+        self._extra.clear()
+    
+    @staticmethod
+    def _merge_frames(frames: List["pd.DataFrame"]) -> "pd.DataFrame":
+        """Combine record_step and stats.bin rows in recording order."""
+        if len(frames) == 1:
+            return frames[0]
+        df = pd.concat(frames, ignore_index=True)
+        # The two buffers interleave when both are used; total_step is the
+        # recording order
+        return df.sort_values('total_step', kind='stable', ignore_index=True)
+    
+    def _frame(self) -> "pd.DataFrame":
+        """All recorded rows as one DataFrame, ordered by total_step."""
+        frames = []
+        if self._n:
+            frames.append(self._step_frame())
+        if self._bin_rows:
+            frames.append(self._bin_frame())
+        return self._merge_frames(frames)
+    
     def start_episode(self):
         """Mark the start of a new episode."""
         self.episode_count += 1
@@ -131,14 +392,21 @@ class SessionStats:
     def save_to_csv(self, filename: Optional[str] = None):
         """Save statistics to CSV file.
         
+        With pyarrow installed this appends the rows recorded since the last
+        save to stats.parquet instead (filename is ignored).
+        
         Args:
             filename: Optional custom filename (without extension)
         """
-        if not self.enabled or not self.stats_data:
+        if not self.enabled or not self._row_count:
+            return
+        
+        if self.use_parquet:
+            self._append_parquet()
             return
         
         try:
-            df = pd.DataFrame(self.stats_data)
+            df = self._frame()
             
             if filename is None:
                 filename = f"stats_episode_{self.episode_count}"
@@ -147,42 +415,161 @@ class SessionStats:
             df.to_csv(csv_path, index=False)
             
             # Also save compressed version for large datasets
-            if len(self.stats_data) > 1000:
+            if self._row_count > 1000:
                 gz_path = self.session_dir / f"{filename}.csv.gz"
                 df.to_csv(gz_path, index=False, compression='gzip')
             
-            print(f"📊 Stats saved: {csv_path} ({len(self.stats_data)} rows)")
+            print(f"📊 Stats saved: {csv_path} ({self._row_count} rows)")
         except Exception as e:
             print(f"⚠️  Failed to save stats: {e}")
     
+    @staticmethod
+    def _empty_aggregates() -> Dict[str, Any]:
+        """Running totals behind get_summary for rows already written to Parquet."""
+        return {
+            'rows': 0,
+            'reward_sum': 0.0,
+            'reward_max': -np.inf,
+            'badges_sum': 0,
+            'badges_max': 0,
+            'locations': set(),
+            'deaths_max': 0,
+        }
+    
+    def _append_parquet(self):
+        """Write rows recorded since the last save as one Parquet row group."""
+        frames = []
+        if self._n:
+            frames.append(self._step_frame())
+        if self._bin_rows > self._bin_exported:
+            frames.append(self._bin_frame(self._bin_exported))
+        if not frames:
+            return
+        df = self._merge_frames(frames)
+        
+        try:
+            if self._writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._writer = pq.ParquetWriter(
+                    self._parquet_path, table.schema, compression='zstd'
+                )
+            else:
+                # Match the schema of the first row group
+                schema = self._writer.schema
+                new_columns = set(df.columns) - set(schema.names) - self._dropped_columns
+                if new_columns:
+                    print(f"⚠️  Stats columns not in Parquet schema, skipped: {sorted(new_columns)}")
+                    self._dropped_columns |= new_columns
+                df = df.reindex(columns=schema.names)
+                table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            self._writer.write_table(table)
+        except Exception as e:
+            print(f"⚠️  Failed to save stats: {e}")
+            return
+        
+        agg = self._agg
+        agg['rows'] += len(df)
+        agg['reward_sum'] += float(df['total_reward'].sum())
+        agg['reward_max'] = max(agg['reward_max'], float(df['total_reward'].max()))
+        agg['badges_sum'] += int(df['badges'].sum())
+        agg['badges_max'] = max(agg['badges_max'], int(df['badges'].max()))
+        agg['locations'].update(df['location'].unique())
+        agg['deaths_max'] = max(agg['deaths_max'], int(df['deaths'].max()))
+        
+        self._reset_step_rows()
+        self._bin_exported = self._bin_rows
+        print(f"📊 Stats saved: {self._parquet_path} ({agg['rows']} rows)")
+    
+    def close(self):
+        """Write any pending rows and finalize the Parquet file."""
+        if not (self.enabled and self.use_parquet):
+            return
+        self._append_parquet()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+    
     def get_summary(self) -> Dict[str, Any]:
         """Get summary statistics for current session.
         
         Returns:
             Dictionary with summary stats
         """
-        if not self.stats_data:
+        if not self._row_count:
             return {}
         
-        try:
-            df = pd.DataFrame(self.stats_data)
-            
+        if self.use_parquet and self.enabled:
+            self._append_parquet()
+            agg = self._agg
+            if not agg['rows']:
+                return {'total_steps': self.total_steps, 'episodes': self.episode_count}
             return {
                 'total_steps': self.total_steps,
                 'episodes': self.episode_count,
-                'avg_reward': df['total_reward'].mean(),
-                'max_reward': df['total_reward'].max(),
-                'avg_badges': df['badges'].mean(),
-                'max_badges': df['badges'].max(),
-                'unique_locations': df['location'].nunique(),
-                'total_deaths': df['deaths'].max(),
+                'avg_reward': agg['reward_sum'] / agg['rows'],
+                'max_reward': agg['reward_max'],
+                'avg_badges': agg['badges_sum'] / agg['rows'],
+                'max_badges': agg['badges_max'],
+                'unique_locations': len(agg['locations']),
+                'total_deaths': agg['deaths_max'],
             }
-        except Exception:
+        
+        parts = []
+        locations = set()
+        if self._n:
+            n = self._n
+            cols = self._cols
+            parts.append((cols['total_reward'][:n], cols['badges'][:n], cols['deaths'][:n]))
+            locations.update(cols['location'])
+        if self._bin_rows:
+            records = np.frombuffer(
+                self._bin_map, dtype=_BIN_RECORD_DTYPE,
+                count=self._bin_rows, offset=_BIN_HEADER_SIZE
+            )
+            # Copy the fields out so no view of the mmap outlives this call
+            parts.append(tuple(
+                np.ascontiguousarray(records[name])
+                for name in ('total_reward', 'badges', 'deaths')
+            ))
+            locations.update(get_map_name(int(m)) for m in np.unique(records['map_id']))
+            del records
+        
+        rows = 0
+        reward_sum = badges_sum = 0
+        reward_max = badges_max = deaths_max = None
+        for total_reward, badges, deaths in parts:
+            r_sum, r_max, b_sum, b_max, d_max = _summarize(total_reward, badges, deaths)
+            rows += len(total_reward)
+            reward_sum += r_sum
+            badges_sum += b_sum
+            reward_max = r_max if reward_max is None else max(reward_max, r_max)
+            badges_max = b_max if badges_max is None else max(badges_max, b_max)
+            deaths_max = d_max if deaths_max is None else max(deaths_max, d_max)
+        
+        if not rows:
             return {'total_steps': self.total_steps, 'episodes': self.episode_count}
+        return {
+            'total_steps': self.total_steps,
+            'episodes': self.episode_count,
+            'avg_reward': reward_sum / rows,
+            'max_reward': reward_max,
+            'avg_badges': badges_sum / rows,
+            'max_badges': badges_max,
+            'unique_locations': len(locations),
+            'total_deaths': deaths_max,
+        }
     
     def clear(self):
         """Clear current statistics (for new run)."""
-        self.stats_data.clear()
+        self.close()
+        self._agg = self._empty_aggregates()
+        self._dropped_columns.clear()
+        self._reset_step_rows()
+        self._bin_rows = 0
+        self._bin_exported = 0
+        if self._bin_map is not None:
+            self._bin_map[:8] = bytes(8)
+        self._row_count = 0
         self.episode_count = 0
         self.total_steps = 0
     
@@ -192,7 +579,7 @@ class SessionStats:
             'enabled': self.enabled,
             'total_steps': self.total_steps,
             'episodes': self.episode_count,
-            'data_points': len(self.stats_data),
+            'data_points': self._row_count,
             'session_dir': str(self.session_dir),
         }
 
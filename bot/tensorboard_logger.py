@@ -15,6 +15,15 @@ except ImportError:
     print("⚠️  Warning: tensorboard not available. Metrics logging disabled.")
 
 
+# Exact types checked first for extra metrics; isinstance covers subclasses
+_SCALAR_TYPES = (int, float, bool)
+
+
+def _is_scalar(value: Any) -> bool:
+    """Whether an extra metric can be logged with add_scalar."""
+    return type(value) in _SCALAR_TYPES or isinstance(value, (int, float))
+
+
 class TensorboardLogger:
     """Logs training metrics to Tensorboard."""
     
@@ -22,7 +31,9 @@ class TensorboardLogger:
         self,
         log_dir: Path,
         enabled: bool = True,
-        comment: str = ""
+        comment: str = "",
+        max_queue: int = 1024,
+        flush_secs: int = 60
     ):
         """Initialize Tensorboard logger.
         
@@ -30,6 +41,8 @@ class TensorboardLogger:
             log_dir: Directory for tensorboard logs
             enabled: Whether logging is enabled
             comment: Optional comment to append to log directory name
+            max_queue: Events buffered in memory before the writer flushes
+            flush_secs: Seconds between background flushes to disk
         """
         self.enabled = enabled and TENSORBOARD_AVAILABLE
         self.writer: Optional[SummaryWriter] = None
@@ -40,7 +53,9 @@ class TensorboardLogger:
             
             self.writer = SummaryWriter(
                 log_dir=str(log_dir),
-                comment=comment
+                comment=comment,
+                max_queue=max_queue,
+                flush_secs=flush_secs
             )
             print(f"📊 Tensorboard logging enabled: {log_dir}")
             print(f"   View with: tensorboard --logdir={log_dir.parent}")
@@ -69,15 +84,18 @@ class TensorboardLogger:
         if not self.enabled or not self.writer:
             return
         
+        add = self.writer.add_scalar
+        
         # Basic metrics
-        self.writer.add_scalar('Reward/Step', reward, step)
-        self.writer.add_scalar('Reward/Total', total_reward, step)
-        self.writer.add_scalar('Progress/Badges', badges, step)
+        add('Reward/Step', reward, step)
+        add('Reward/Total', total_reward, step)
+        add('Progress/Badges', badges, step)
         
         # Extra metrics
+        prefix = 'Metrics/'
         for key, value in extra_metrics.items():
-            if isinstance(value, (int, float)):
-                self.writer.add_scalar(f'Metrics/{key}', value, step)
+            if _is_scalar(value):
+                add(prefix + key, value, step)
     
     def log_episode(
         self,
@@ -105,17 +123,19 @@ class TensorboardLogger:
         if not self.enabled or not self.writer:
             return
         
-        self.writer.add_scalar('Episode/TotalReward', total_reward, episode)
-        self.writer.add_scalar('Episode/MaxBadges', max_badges, episode)
-        self.writer.add_scalar('Episode/Steps', total_steps, episode)
-        self.writer.add_scalar('Episode/UniqueCoords', unique_coords, episode)
-        self.writer.add_scalar('Episode/UniqueFrames', unique_frames, episode)
-        self.writer.add_scalar('Episode/Deaths', deaths, episode)
+        add = self.writer.add_scalar
+        add('Episode/TotalReward', total_reward, episode)
+        add('Episode/MaxBadges', max_badges, episode)
+        add('Episode/Steps', total_steps, episode)
+        add('Episode/UniqueCoords', unique_coords, episode)
+        add('Episode/UniqueFrames', unique_frames, episode)
+        add('Episode/Deaths', deaths, episode)
         
         # Extra stats
+        prefix = 'Episode/'
         for key, value in extra_stats.items():
-            if isinstance(value, (int, float)):
-                self.writer.add_scalar(f'Episode/{key}', value, episode)
+            if _is_scalar(value):
+                add(prefix + key, value, episode)
     
     def log_q_learning(
         self,
@@ -137,14 +157,16 @@ class TensorboardLogger:
         if not self.enabled or not self.writer:
             return
         
-        self.writer.add_scalar('QLearning/QTableSize', q_table_size, step)
-        self.writer.add_scalar('QLearning/StatesExplored', states_explored, step)
-        self.writer.add_scalar('QLearning/TotalUpdates', total_updates, step)
+        add = self.writer.add_scalar
+        add('QLearning/QTableSize', q_table_size, step)
+        add('QLearning/StatesExplored', states_explored, step)
+        add('QLearning/TotalUpdates', total_updates, step)
         
         # Extra metrics
+        prefix = 'QLearning/'
         for key, value in extra_metrics.items():
-            if isinstance(value, (int, float)):
-                self.writer.add_scalar(f'QLearning/{key}', value, step)
+            if _is_scalar(value):
+                add(prefix + key, value, step)
     
     def log_exploration(
         self,
@@ -170,16 +192,18 @@ class TensorboardLogger:
         if not self.enabled or not self.writer:
             return
         
-        self.writer.add_scalar('Exploration/UniqueCoords', unique_coords, step)
-        self.writer.add_scalar('Exploration/UniqueFrames', unique_frames, step)
-        self.writer.add_scalar('Exploration/EventFlags', event_flags, step)
-        self.writer.add_scalar('Exploration/Heals', heal_count, step)
-        self.writer.add_scalar('Exploration/Opponents', opponent_count, step)
+        add = self.writer.add_scalar
+        add('Exploration/UniqueCoords', unique_coords, step)
+        add('Exploration/UniqueFrames', unique_frames, step)
+        add('Exploration/EventFlags', event_flags, step)
+        add('Exploration/Heals', heal_count, step)
+        add('Exploration/Opponents', opponent_count, step)
         
         # Extra metrics
+        prefix = 'Exploration/'
         for key, value in extra_metrics.items():
-            if isinstance(value, (int, float)):
-                self.writer.add_scalar(f'Exploration/{key}', value, step)
+            if _is_scalar(value):
+                add(prefix + key, value, step)
     
     def log_text(self, tag: str, text: str, step: int):
         """Log text information.
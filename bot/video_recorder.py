@@ -1,19 +1,42 @@
 """Video recording for gameplay sessions.
 
-Records gameplay frames and saves as MP4 videos for analysis.
+Records gameplay frames and saves as MP4 videos for analysis. Frames are
+piped as raw RGB to an ffmpeg process that encodes them with libx264.
 Based on PokemonRedExperiments video recording approach.
 """
 
+import os
+import queue
+import shutil
+import subprocess
+import threading
 from pathlib import Path
 from typing import Optional
 import numpy as np
 
-try:
-    import mediapy as media
-    MEDIAPY_AVAILABLE = True
-except ImportError:
-    MEDIAPY_AVAILABLE = False
-    print("⚠️  Warning: mediapy not available. Video recording disabled.")
+FFMPEG_PATH = shutil.which("ffmpeg")
+FFMPEG_AVAILABLE = FFMPEG_PATH is not None
+if not FFMPEG_AVAILABLE:
+    print("⚠️  Warning: ffmpeg not found on PATH. Video recording disabled.")
+
+
+def _ffmpeg_input_args(frame_shape: tuple, fps: int, source: str) -> list:
+    """ffmpeg arguments for one raw RGB input stream."""
+    height, width = frame_shape[:2]
+    return [
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f'{width}x{height}', '-r', str(fps),
+        '-i', source,
+    ]
+
+
+def _ffmpeg_output_args(path: Path) -> list:
+    """ffmpeg arguments for one libx264 output file."""
+    return [
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency',
+        '-pix_fmt', 'yuv420p',
+        str(path),
+    ]
 
 
 class VideoRecorder:
@@ -23,7 +46,8 @@ class VideoRecorder:
         self,
         output_dir: Path,
         fps: int = 60,
-        enabled: bool = True
+        enabled: bool = True,
+        queue_size: int = 256
     ):
         """Initialize video recorder.
         
@@ -31,14 +55,20 @@ class VideoRecorder:
             output_dir: Directory to save videos
             fps: Frames per second
             enabled: Whether recording is enabled
+            queue_size: Frames buffered for the encoder before the oldest is dropped
         """
         self.output_dir = Path(output_dir)
         self.fps = fps
-        self.enabled = enabled and MEDIAPY_AVAILABLE
+        self.enabled = enabled and FFMPEG_AVAILABLE
+        self.queue_size = queue_size
         
-        self.writer: Optional[media.VideoWriter] = None
+        self._proc: Optional[subprocess.Popen] = None
+        # Frame bytes go to ffmpeg on a background thread (None = stop)
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
         self.current_video_path: Optional[Path] = None
         self.frame_count = 0
+        self.dropped_frames = 0
         
         if self.enabled:
             self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -48,7 +78,7 @@ class VideoRecorder:
         
         Args:
             video_name: Name for the video file (without extension)
-            frame_shape: Shape of frames (height, width)
+            frame_shape: Shape of frames (height, width[, channels])
         """
         if not self.enabled:
             return
@@ -60,58 +90,122 @@ class VideoRecorder:
         self.current_video_path = self.output_dir / f"{video_name}.mp4"
         
         try:
-            # Create video writer
-            self.writer = media.VideoWriter(
-                self.current_video_path,
-                shape=frame_shape,
-                fps=self.fps,
-                codec='h264'
+            # Raw RGB frames on stdin, encoded by ffmpeg. Default pipe
+            # buffering: the writer queue is the only frame buffer, so each
+            # frame reaches ffmpeg as soon as the writer thread takes it
+            self._proc = subprocess.Popen(
+                [FFMPEG_PATH, '-y', '-loglevel', 'error']
+                + _ffmpeg_input_args(frame_shape, self.fps, '-')
+                + _ffmpeg_output_args(self.current_video_path),
+                stdin=subprocess.PIPE
             )
-            self.writer.__enter__()
-            self.frame_count = 0
+            self._start_writer(self._proc.stdin)
             print(f"📹 Started recording: {self.current_video_path}")
         except Exception as e:
             print(f"⚠️  Failed to start video recording: {e}")
-            self.writer = None
+            self._proc = None
             self.enabled = False
     
+    def _start_writer(self, sink):
+        """Start the background thread that writes queued frames to sink."""
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(
+            target=self._writer_loop,
+            args=(sink, self._queue),
+            name="video-writer",
+            daemon=True
+        )
+        self._thread.start()
+    
+    def _stop_writer(self, sink):
+        """Write out queued frames, stop the writer thread and close sink."""
+        self._queue.put(None)
+        self._thread.join()
+        self._queue = None
+        self._thread = None
+        sink.close()
+    
     def add_frame(self, frame: np.ndarray):
-        """Add a frame to the current video.
+        """Queue a frame for the current video without blocking.
+        
+        If the encoder falls behind, the oldest queued frame is dropped.
         
         Args:
             frame: Frame array (H, W, C) in RGB format
         """
-        if not self.enabled or self.writer is None:
+        if not self.enabled or self._queue is None:
             return
         
+        # Queue exactly one private uint8 RGB copy so the caller may reuse its
+        # buffer: tobytes() copies a contiguous uint8 frame, any other frame
+        # (RGBA slice, other dtype) already becomes a fresh array when converted
+        if frame.ndim == 2:
+            data = np.repeat(frame[:, :, None], 3, axis=2).astype(np.uint8, copy=False)
+        else:
+            rgb = frame[:, :, :3]
+            if rgb.dtype == np.uint8 and rgb.flags['C_CONTIGUOUS']:
+                data = rgb.tobytes()
+            else:
+                data = np.ascontiguousarray(rgb, dtype=np.uint8)
+        
         try:
-            # Ensure frame is uint8
-            if frame.dtype != np.uint8:
-                frame = frame.astype(np.uint8)
-            
-            self.writer.add_image(frame)
-            self.frame_count += 1
-        except Exception as e:
-            print(f"⚠️  Failed to add frame: {e}")
+            self._queue.put_nowait(data)
+        except queue.Full:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self.frame_count -= 1
+                self.dropped_frames += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(data)
+            except queue.Full:
+                self.dropped_frames += 1
+                return
+        self.frame_count += 1
+    
+    @staticmethod
+    def _writer_loop(sink, frames: queue.Queue):
+        """Write queued frames to an ffmpeg input until the None sentinel arrives."""
+        failed = False
+        while True:
+            data = frames.get()
+            try:
+                if data is None:
+                    return
+                if not failed:
+                    sink.write(data)
+            except Exception as e:
+                # Keep draining so producers and stop_recording never block
+                print(f"⚠️  Failed to add frame: {e}")
+                failed = True
+            finally:
+                frames.task_done()
     
     def stop_recording(self):
         """Stop current recording and save video."""
-        if not self.enabled or self.writer is None:
+        if not self.enabled or self._proc is None:
             return
         
         try:
-            self.writer.__exit__(None, None, None)
-            print(f"✅ Video saved: {self.current_video_path} ({self.frame_count} frames)")
+            self._stop_writer(self._proc.stdin)
+            if self._proc.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with code {self._proc.returncode}")
+            dropped = f", {self.dropped_frames} dropped" if self.dropped_frames else ""
+            print(f"✅ Video saved: {self.current_video_path} ({self.frame_count} frames{dropped})")
         except Exception as e:
             print(f"⚠️  Failed to save video: {e}")
         finally:
-            self.writer = None
+            self._proc = None
             self.current_video_path = None
             self.frame_count = 0
     
     def is_recording(self) -> bool:
         """Check if currently recording."""
-        return self.enabled and self.writer is not None
+        return self.enabled and self._queue is not None
     
     def get_stats(self) -> dict:
         """Get recording statistics."""
@@ -119,13 +213,18 @@ class VideoRecorder:
             'enabled': self.enabled,
             'recording': self.is_recording(),
             'frame_count': self.frame_count,
+            'dropped_frames': self.dropped_frames,
             'output_dir': str(self.output_dir),
             'current_video': str(self.current_video_path) if self.current_video_path else None,
         }
 
 
 class DualVideoRecorder:
-    """Records both full gameplay and model view simultaneously."""
+    """Records both full gameplay and model view simultaneously.
+    
+    Both views are encoded by one ffmpeg process, each read from its own
+    pipe; the child recorders only queue and write frames.
+    """
     
     def __init__(
         self,
@@ -142,7 +241,11 @@ class DualVideoRecorder:
         """
         self.full_recorder = VideoRecorder(output_dir / "full", fps, enabled)
         self.model_recorder = VideoRecorder(output_dir / "model", fps, enabled)
-        self.enabled = enabled and MEDIAPY_AVAILABLE
+        self.fps = fps
+        self.enabled = enabled and FFMPEG_AVAILABLE
+        
+        self._proc: Optional[subprocess.Popen] = None
+        self._sinks: list = []
     
     def start_recording(
         self,
@@ -160,14 +263,40 @@ class DualVideoRecorder:
         if not self.enabled:
             return
         
-        self.full_recorder.start_recording(
-            f"episode_{episode_id}_full",
-            full_shape
-        )
-        self.model_recorder.start_recording(
-            f"episode_{episode_id}_model",
-            model_shape
-        )
+        # Stop any existing recording
+        self.stop_recording()
+        
+        recorders = (self.full_recorder, self.model_recorder)
+        views = (("full", full_shape), ("model", model_shape))
+        pipes = [os.pipe() for _ in recorders]
+        
+        args = [FFMPEG_PATH, '-y', '-loglevel', 'error']
+        for (read_fd, _), (_, shape) in zip(pipes, views):
+            args += _ffmpeg_input_args(shape, self.fps, f'pipe:{read_fd}')
+        for i, (recorder, (view, _)) in enumerate(zip(recorders, views)):
+            recorder.current_video_path = recorder.output_dir / f"episode_{episode_id}_{view}.mp4"
+            args += ['-map', f'{i}:v'] + _ffmpeg_output_args(recorder.current_video_path)
+        
+        try:
+            self._proc = subprocess.Popen(args, pass_fds=[read_fd for read_fd, _ in pipes])
+        except Exception as e:
+            print(f"⚠️  Failed to start video recording: {e}")
+            for read_fd, write_fd in pipes:
+                os.close(read_fd)
+                os.close(write_fd)
+            for recorder in recorders:
+                recorder.current_video_path = None
+            self.enabled = False
+            return
+        
+        # The child holds the read ends now
+        for (read_fd, write_fd), recorder in zip(pipes, recorders):
+            os.close(read_fd)
+            # Default buffering: the writer queue is the only frame buffer
+            sink = os.fdopen(write_fd, 'wb')
+            recorder._start_writer(sink)
+            self._sinks.append(sink)
+            print(f"📹 Started recording: {recorder.current_video_path}")
     
     def add_frames(self, full_frame: np.ndarray, model_frame: np.ndarray):
         """Add frames to both recorders.
@@ -181,8 +310,26 @@ class DualVideoRecorder:
     
     def stop_recording(self):
         """Stop both recorders."""
-        self.full_recorder.stop_recording()
-        self.model_recorder.stop_recording()
+        if self._proc is None:
+            return
+        
+        recorders = (self.full_recorder, self.model_recorder)
+        try:
+            for recorder, sink in zip(recorders, self._sinks):
+                recorder._stop_writer(sink)
+            if self._proc.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with code {self._proc.returncode}")
+            for recorder in recorders:
+                dropped = f", {recorder.dropped_frames} dropped" if recorder.dropped_frames else ""
+                print(f"✅ Video saved: {recorder.current_video_path} ({recorder.frame_count} frames{dropped})")
+        except Exception as e:
+            print(f"⚠️  Failed to save video: {e}")
+        finally:
+            self._proc = None
+            self._sinks = []
+            for recorder in recorders:
+                recorder.current_video_path = None
+                recorder.frame_count = 0
     
     def is_recording(self) -> bool:
         """Check if either recorder is active."""
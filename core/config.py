@@ -1,26 +1,29 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from types import MappingProxyType
+from typing import Mapping
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EditionConfig:
     name: str
     rom_path: Path
     map_url: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     base_dir: Path
     project_root: Path
-    editions: Dict[str, EditionConfig]
+    editions: Mapping[str, EditionConfig]
     data_dir: Path
     log_dir: Path
 
 
+@lru_cache(maxsize=None)
 def build_config(base_dir: Path) -> AppConfig:
     data_dir = base_dir / "data"
     log_dir = base_dir / "logs"
@@ -29,7 +32,7 @@ def build_config(base_dir: Path) -> AppConfig:
     # This map has pixel-perfect coordinates for all locations
     map_url = "https://raw.githubusercontent.com/PWhiddy/PokemonRedExperiments/master/visualization/poke_map/pokemap_full_calibrated_CROPPED_1.png"
     
-    editions = {
+    editions = MappingProxyType({
         "red": EditionConfig(
             name="Red",
             rom_path=base_dir / "rom" / "pokemon_red.gb",
@@ -45,7 +48,7 @@ def build_config(base_dir: Path) -> AppConfig:
             rom_path=base_dir / "rom" / "pokemon_yellow.gbc",
             map_url=map_url,
         ),
-    }
+    })
     return AppConfig(
         base_dir=base_dir,
         project_root=base_dir,
@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GameState:
     edition: str
     location: str
@@ -15,21 +15,21 @@ class GameState:
     play_time_seconds: float
 
 
-@dataclass
+@dataclass(slots=True)
 class SplitTime:
     name: str
     time_seconds: float
 
 
-@dataclass
+@dataclass(slots=True)
 class RunDecision:
     step: int
     action: str
     reason: str
-    timestamp: str
+    timestamp: int  # time.time_ns(); formatted by the logger on write
 
 
-@dataclass
+@dataclass(slots=True)
 class RunSummary:
     run_id: int
     edition: str
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_compact(obj: Dict[str, Any]) -> bytes:
+    """Serialize a dict to compact JSON bytes.
+    
+    Uses orjson when available, otherwise the stdlib C encoder
+    (compact separators, no indent).
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(',', ':')).encode()
@@ -19,9 +19,9 @@ Usage:
 
 from pathlib import Path
 import sys
-import time
 
 from emulator.pyboy_emulator import PyBoyEmulator, EmulatorSettings
+from emulator.pokemon_memory import MEMORY_MAP, get_map_name
 from core.config import build_config
 
 def create_init_state():
@@ -87,6 +87,10 @@ def create_init_state():
         print("⏳ Waiting for ENTER key...")
         frame = 0
         last_status = ""
+        memory = emulator.pyboy.memory
+        joypad_addr = MEMORY_MAP["JOYPAD_DISABLE"]
+        battle_addr = MEMORY_MAP["BATTLE_TYPE"]
+        map_addr = MEMORY_MAP["MAP_ID"]
         
         while True:
             emulator.pyboy.tick()
@@ -95,16 +99,18 @@ def create_init_state():
             # Show status every 2 seconds
             if frame % 120 == 0:
                 try:
-                    state = emulator.get_state()
-                    joypad = emulator.pyboy.memory[0xD79E]
-                    battle = emulator.pyboy.memory[0xD057]
-                    map_id = emulator.pyboy.memory[0xD35E]
+                    # Three byte reads; the location follows from the map id
+                    # without a full get_state()
+                    joypad = memory[joypad_addr]
+                    battle = memory[battle_addr]
+                    map_id = memory[map_addr]
+                    location = get_map_name(map_id)
                     
                     has_control = (joypad == 0) and (battle == 0)
-                    in_pallet = "Pallet" in state.location
+                    in_pallet = "Pallet" in location
                     outside = map_id in [0, 1]
                     
-                    status = f"📍 {state.location} (Map:{map_id})"
+                    status = f"📍 {location} (Map:{map_id})"
                     if has_control and in_pallet and outside:
                         status += " ✅ READY TO SAVE!"
                     elif not has_control:
@@ -118,13 +124,12 @@ def create_init_state():
                 except:
                     pass
             
-            # Check for Enter key
-            if msvcrt.kbhit():
+            # Check for Enter key every 6th frame; tick() already paces the
+            # loop to real time, so no sleep is needed
+            if frame % 6 == 0 and msvcrt.kbhit():
                 key = msvcrt.getch()
                 if key == b'\r':  # Enter
                     break
-            
-            time.sleep(0.016)
     else:
         # Unix: just wait for Enter
         input()
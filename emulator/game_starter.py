@@ -3,6 +3,7 @@ from __future__ import annotations
 import json, sys, time
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
+from emulator.pokemon_memory import MEMORY_MAP, get_map_name
 if TYPE_CHECKING:
     from emulator.pyboy_emulator import PyBoyEmulator
 class GameStarter:
@@ -12,24 +13,32 @@ class GameStarter:
         self.data_dir = Path(data_dir or "data")
         self.data_dir.mkdir(exist_ok=True)
         self.learned_sequence_file = self.data_dir / "learned_game_start.json"
+        self._last_map_id,self._last_location=None,""
     def has_learned_sequence(self): return self.learned_sequence_file.exists()
+    def _location(self):
+        # Only the map byte decides the location; re-decode it when it changes
+        map_id=self.emulator.read_memory(MEMORY_MAP["MAP_ID"])
+        if map_id!=self._last_map_id: self._last_map_id,self._last_location=map_id,get_map_name(map_id)
+        return self._last_location
     def wait_for_manual_start(self, max_wait_seconds=300, learn_mode=True):
         print("\n  MANUAL MODE"); print("="*60); print("Instructions:\n  1. PyBoy window\n  2. Press A\n  3. NEW GAME\n  4. Trainer name\n  5. Rival name\n  6. To Pallet Town")
         if learn_mode: print("\n Bot detects Pallet Town after 10 seconds\n   You have 10 seconds!")
         print("="*60); print("\n Booting...")
-        for i in range(180):
-            self.emulator.pyboy.tick()
-            if i%60==0 and i>0: print(f"   Loading...{i}/180")
+        # Boot in 60-frame native ticks, rendering off
+        for i in (60,120,180):
+            self.emulator.pyboy.tick(60,False)
+            if i<180: print(f"   Loading...{i}/180")
         print(" Ready!\n Watching for Pallet Town in 10s...\n")
         if sys.platform=="win32": import msvcrt
         start_time,frame_count,last_location,detection_delay,detection_active=time.time(),0,"",10.0,False
+        tick,location=self.emulator.pyboy.tick,self._location
         try:
             while(time.time()-start_time)<max_wait_seconds:
-                self.emulator.pyboy.tick(); frame_count+=1; elapsed=time.time()-start_time
+                tick(); frame_count+=1; elapsed=time.time()-start_time
                 if not detection_active and elapsed>=detection_delay: detection_active=True; print(" Detection active!")
                 if learn_mode and detection_active and frame_count%30==0:
                     try:
-                        state=self.emulator.get_state(); current_location=state.location
+                        current_location=location()
                         if"Pallet"in current_location and"Pallet"not in last_location: print("\n Pallet Town detected!"); print(" Bot taking over..."); time.sleep(1); return True
                         if current_location!=last_location: print(f"   {current_location}")
                         last_location=current_location
@@ -37,43 +46,52 @@ class GameStarter:
                 if frame_count%600==0:
                     status="Active"if detection_active else f"{int(detection_delay-elapsed)}s until active"
                     print(f"  Waiting...({frame_count//60}s)[{status}]")
-                if sys.platform=="win32" and msvcrt.kbhit():
+                # tick() paces to real time; poll the keyboard every 6th frame
+                if sys.platform=="win32" and frame_count%6==0 and msvcrt.kbhit():
                     if msvcrt.getch()==b'\r': print("\n Enter pressed"); return True
-                time.sleep(0.016)
             print("\n Timeout"); return False
         except KeyboardInterrupt: print("\n Cancelled"); return False
     def start_new_game(self, max_attempts=400, use_learned=True):
+        # Waits are counted in frames, so emulate unthrottled; PyBoy's default speed is 1
+        pyboy=self.emulator.pyboy; pyboy.set_emulation_speed(0)
+        try: return self._start_new_game(max_attempts)
+        finally: pyboy.set_emulation_speed(1)
+    def _start_new_game(self, max_attempts):
         print("\n Auto-starting..."); print(f"   Player:{self.player_name}"); attempts,phase=0,"intro"
         while attempts<max_attempts:
             attempts+=1
-            try: state=self.emulator.get_state(); location=state.location
+            try: location=self._location()
             except: location="Unknown"
             if phase=="intro":
                 if"Pallet"in location: phase="ready"; print(" In Pallet Town!"); break
-                elif attempts<100: self.emulator.step("A"); time.sleep(0.1)
-                elif attempts<150: self.emulator.step("START"); time.sleep(0.1)
+                elif attempts<100: self._press_and_wait("A",6)
+                elif attempts<150: self._press_and_wait("START",6)
                 else: phase="menu"; print("   Selecting...")
             elif phase=="menu":
-                if attempts<200: self.emulator.step("A"); time.sleep(0.2)
+                if attempts<200: self._press_and_wait("A",12)
                 else: phase="name"; print("   Name...")
             elif phase=="name":
                 relative_attempt=attempts-200
                 if relative_attempt<50:
-                    self.emulator.step("A"); time.sleep(0.15)
+                    self._press_and_wait("A",9)
                     if"Pallet"in location: phase="ready"; print(" Named!"); break
                 else: phase="rival"; print("   Rival...")
             elif phase=="rival":
                 relative_attempt=attempts-250
                 if relative_attempt<120:
-                    self.emulator.step("A"); time.sleep(0.15)
+                    self._press_and_wait("A",9)
                     if"Pallet"in location: phase="ready"; print(" Started!"); break
                 else: print(" Timeout"); phase="ready"; break
-        if phase=="ready": print(f" Done ({attempts})"); time.sleep(0.5); return True
+        if phase=="ready": print(f" Done ({attempts})"); self.emulator.pyboy.tick(30,False); return True
         else: print(f" Incomplete({phase},{attempts})"); return False
     def _press_button(self, button): self.emulator.step(button)
+    def _press_and_wait(self, button, frames):
+        # Frame-accurate pause after the press instead of a wall-clock sleep
+        self.emulator.step(button); self.emulator.pyboy.tick(frames,False)
     def skip_intro_fast(self):
         print(" Skipping...")
-        for _ in range(50): self._press_button("A"); time.sleep(0.05)
+        tick=self.emulator.pyboy.tick
+        for _ in range(50): self._press_button("A"); tick(3,False)
         print(" Skipped")
     def is_in_game(self):
         try:
@@ -3,6 +3,8 @@ Map coordinate system for Pokemon Red/Blue/Yellow
 Based on PokemonRedExperiments visualization mapping
 """
 
+from functools import lru_cache
+
 import numpy as np
 
 # Pixel size of each game tile (16x16 pixels)
@@ -11,64 +13,75 @@ TILE_SIZE = 16
 # Global offset for the map (calibration from PokemonRedExperiments)
 GLOBAL_OFFSET = np.array([1056 - 16*12, 331])
 
-# Map offsets: converts map_id to pixel grid offset
+# Map offsets: converts map_id to pixel grid offset (tile units)
 # Based on https://github.com/PWhiddy/PokemonRedExperiments
 MAP_PIXEL_OFFSETS = {
     # Main Towns/Cities
-    0: np.array([0, 0]),         # Pallet Town
-    1: np.array([-10, 72]),      # Viridian City
-    2: np.array([-10, 180]),     # Pewter City
-    3: np.array([180, 198]),     # Cerulean City
+    0: (0, 0),         # Pallet Town
+    1: (-10, 72),      # Viridian City
+    2: (-10, 180),     # Pewter City
+    3: (180, 198),     # Cerulean City
     
     # Routes
-    12: np.array([0, 36]),       # Route 1
-    13: np.array([0, 144]),      # Route 2
-    14: np.array([30, 172]),     # Route 3
-    15: np.array([80, 190]),     # Route 4
-    33: np.array([-50, 64]),     # Route 22
+    12: (0, 36),       # Route 1
+    13: (0, 144),      # Route 2
+    14: (30, 172),     # Route 3
+    15: (80, 190),     # Route 4
+    33: (-50, 64),     # Route 22
     
     # Buildings - Pallet Town
-    37: np.array([-9, 2]),       # Red's House 1F
-    38: np.array([-9, 25-32]),   # Red's House 2F
-    39: np.array([9+12, 2]),     # Blue's House
-    40: np.array([25-4, -6]),    # Oak's Lab
+    37: (-9, 2),       # Red's House 1F
+    38: (-9, 25-32),   # Red's House 2F
+    39: (9+12, 2),     # Blue's House
+    40: (25-4, -6),    # Oak's Lab
     
     # Buildings - Viridian City
-    41: np.array([30, 47]),      # Pokemon Center
-    42: np.array([30, 55]),      # Poke Mart
-    43: np.array([30, 72]),      # School
-    44: np.array([30, 64]),      # House 1
+    41: (30, 47),      # Pokemon Center
+    42: (30, 55),      # Poke Mart
+    43: (30, 72),      # School
+    44: (30, 64),      # House 1
     
     # Gates & Transitions
-    47: np.array([21, 136]),     # Gate (Viridian/Pewter)
-    49: np.array([21, 108]),     # Gate (Route 2)
-    50: np.array([21, 108]),     # Gate (Route 2/Viridian Forest)
+    47: (21, 136),     # Gate (Viridian/Pewter)
+    49: (21, 108),     # Gate (Route 2)
+    50: (21, 108),     # Gate (Route 2/Viridian Forest)
     
     # Dungeons
-    51: np.array([-35, 137]),    # Viridian Forest
-    52: np.array([-10, 189]),    # Pewter Museum 1F
-    53: np.array([-10, 198]),    # Pewter Museum 2F
+    51: (-35, 137),    # Viridian Forest
+    52: (-10, 189),    # Pewter Museum 1F
+    53: (-10, 198),    # Pewter Museum 2F
     
     # Buildings - Pewter City
-    54: np.array([-21, 169]),    # Pewter Gym
-    55: np.array([-19, 177]),    # House with Nidoran
-    56: np.array([-30, 163]),    # Poke Mart
-    57: np.array([-19, 177]),    # House with Trainers
-    58: np.array([-25, 154]),    # Pokemon Center
+    54: (-21, 169),    # Pewter Gym
+    55: (-19, 177),    # House with Nidoran
+    56: (-30, 163),    # Poke Mart
+    57: (-19, 177),    # House with Trainers
+    58: (-25, 154),    # Pokemon Center
     
     # Mt. Moon
-    59: np.array([83, 227]),     # Mt. Moon Entrance
-    60: np.array([123, 227]),    # Mt. Moon B1F
-    61: np.array([152, 227]),    # Mt. Moon B2F
+    59: (83, 227),     # Mt. Moon Entrance
+    60: (123, 227),    # Mt. Moon B1F
+    61: (152, 227),    # Mt. Moon B2F
     
     # Route 4
-    68: np.array([65, 190]),     # Pokemon Center (Route 4) 
+    68: (65, 190),     # Pokemon Center (Route 4) 
     
     # Special
-    193: np.array([0, 0]),       # Badge Gate (Route 22)
+    193: (0, 0),       # Badge Gate (Route 22)
 }
 
+# MAP_PIXEL_OFFSETS compiled to one dense int16 table indexed by map_id,
+# plus a mask of the map ids that have an offset
+_OFFSET_ARRAY = np.zeros((max(MAP_PIXEL_OFFSETS) + 1, 2), dtype=np.int16)
+_HAS_OFFSET = np.zeros(len(_OFFSET_ARRAY), dtype=bool)
+_OFFSET_ARRAY[list(MAP_PIXEL_OFFSETS)] = list(MAP_PIXEL_OFFSETS.values())
+_HAS_OFFSET[list(MAP_PIXEL_OFFSETS)] = True
+
+# GLOBAL_OFFSET as plain ints, so the scalar path avoids NumPy per call
+_GX, _GY = int(GLOBAL_OFFSET[0]), int(GLOBAL_OFFSET[1])
+
 
+@lru_cache(maxsize=1024)
 def game_coords_to_pixel_coords(x: int, y: int, map_id: int, map_height: int = 2016) -> tuple:
     """
     Convert game coordinates (x, y, map_id) to pixel coordinates on the full Kanto map.
@@ -82,53 +95,85 @@ def game_coords_to_pixel_coords(x: int, y: int, map_id: int, map_height: int = 2
     Returns:
         (pixel_x, pixel_y) tuple for positioning on the map image
     """
+    # Plain ints: NumPy scalars (e.g. uint8 memory reads) would overflow in
+    # the arithmetic below, and would make distinct lru_cache keys
+    x, y, map_id = int(x), int(y), int(map_id)
+    
     # Get map offset or default to origin
-    if map_id in MAP_PIXEL_OFFSETS:
-        offset = MAP_PIXEL_OFFSETS[map_id]
-    else:
+    offset = MAP_PIXEL_OFFSETS.get(map_id)
+    if offset is None:
         # Unknown map - place at origin
-        offset = np.array([0, 0])
+        offset = (0, 0)
         x, y = 0, 0
     
-    # Calculate pixel coordinate
-    # Formula: global_offset + tile_size * (map_offset + player_position)
-    coord = GLOBAL_OFFSET + TILE_SIZE * (offset + np.array([x, y]))
-    
-    # Flip Y coordinate (image coordinates start from top-left)
-    coord[1] = map_height - coord[1]
+    # Formula: global_offset + tile_size * (map_offset + player_position),
+    # with Y flipped (image coordinates start from top-left)
+    px = _GX + TILE_SIZE * (offset[0] + x)
+    py = map_height - (_GY + TILE_SIZE * (offset[1] + y))
     
-    return int(coord[0]), int(coord[1])
+    return int(px), int(py)
 
 
-def get_map_bounds() -> dict:
+def game_coords_to_pixel_coords_batch(xs, ys, map_ids, map_height: int = 2016) -> np.ndarray:
     """
-    Get the bounding box of the known mapped area.
-    Useful for centering/scaling the map view.
+    Vectorized game_coords_to_pixel_coords for many points (e.g. a trajectory).
+    
+    Args:
+        xs: Player x positions (array-like)
+        ys: Player y positions (array-like)
+        map_ids: Map indices (array-like)
+        map_height: Height of the map image in pixels
+        
+    Returns:
+        (N, 2) int array of (pixel_x, pixel_y); unknown maps map to the origin
     """
-    all_coords = []
-    for map_id, offset in MAP_PIXEL_OFFSETS.items():
-        # Sample some positions in each map (0,0) and (10,10)
-        px, py = game_coords_to_pixel_coords(0, 0, map_id)
-        all_coords.append((px, py))
-        px2, py2 = game_coords_to_pixel_coords(10, 10, map_id)
-        all_coords.append((px2, py2))
-    
-    if not all_coords:
+    map_ids = np.asarray(map_ids, dtype=np.intp)
+    xy = np.stack([np.asarray(xs, dtype=np.int32), np.asarray(ys, dtype=np.int32)], axis=-1)
+    
+    # Unknown maps (including ids past the table) use offset 0 and position 0
+    in_range = (map_ids >= 0) & (map_ids < len(_OFFSET_ARRAY))
+    safe_ids = np.where(in_range, map_ids, 0)
+    known = in_range & _HAS_OFFSET[safe_ids]
+    xy[~known] = 0
+    
+    coord = GLOBAL_OFFSET + TILE_SIZE * (_OFFSET_ARRAY[safe_ids] + xy)
+    coord[:, 1] = map_height - coord[:, 1]
+    return coord
+
+
+def _compute_map_bounds() -> dict:
+    """Bounding box of the known mapped area, sampling (0,0) and (10,10) in each map."""
+    if not MAP_PIXEL_OFFSETS:
         return {"min_x": 0, "max_x": 1000, "min_y": 0, "max_y": 1000}
     
-    xs = [c[0] for c in all_coords]
-    ys = [c[1] for c in all_coords]
+    map_ids = np.array(list(MAP_PIXEL_OFFSETS))
+    corners = np.repeat([0, 10], len(map_ids))
+    coords = game_coords_to_pixel_coords_batch(corners, corners, np.tile(map_ids, 2))
+    min_x, min_y = (int(v) for v in coords.min(axis=0))
+    max_x, max_y = (int(v) for v in coords.max(axis=0))
     
     return {
-        "min_x": min(xs),
-        "max_x": max(xs),
-        "min_y": min(ys),
-        "max_y": max(ys),
-        "width": max(xs) - min(xs),
-        "height": max(ys) - min(ys)
+        "min_x": min_x,
+        "max_x": max_x,
+        "min_y": min_y,
+        "max_y": max_y,
+        "width": max_x - min_x,
+        "height": max_y - min_y
     }
 
 
+# MAP_PIXEL_OFFSETS is constant, so the bounds are computed once at import
+_MAP_BOUNDS = _compute_map_bounds()
+
+
+def get_map_bounds() -> dict:
+    """
+    Get the bounding box of the known mapped area.
+    Useful for centering/scaling the map view.
+    """
+    return dict(_MAP_BOUNDS)
+
+
 if __name__ == "__main__":
     # Test the coordinate system
     print("Testing coordinate system...")
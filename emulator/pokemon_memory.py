@@ -1,5 +1,7 @@
 """Pokemon Red/Blue/Yellow Memory Map - Known addresses for game state."""
 
+from functools import lru_cache
+
 # Pokemon Red/Blue/Yellow Memory Addresses
 MEMORY_MAP = {
     # Player position
@@ -85,6 +87,11 @@ MEMORY_MAP = {
     "POKEDEX_SEEN_START": 0xD30A,   # 19 bytes
 }
 
+# Contiguous WRAM block from PARTY_COUNT through the last party struct's
+# max HP; one bulk read covers party count, levels and HP
+PARTY_BLOCK_START = MEMORY_MAP["PARTY_COUNT"]
+PARTY_BLOCK_LENGTH = MEMORY_MAP["PARTY_MAX_HP_6"] + 2 - PARTY_BLOCK_START
+
 # Pokemon Species ID to Name mapping (First 151 Pokemon)
 POKEMON_NAMES = {
     0x01: "Rhydon", 0x02: "Kangaskhan", 0x03: "Nidoran♂", 0x04: "Clefairy",
@@ -263,6 +270,7 @@ MAP_NAMES = {
     0xB2: "Cerulean Cave B1F",
 }
 
+@lru_cache(maxsize=256)
 def get_map_name(map_id: int) -> str:
     """Get human-readable location name from map ID."""
     return MAP_NAMES.get(map_id, f"Unknown Location (0x{map_id:02X})")
@@ -312,11 +320,12 @@ def read_hp_16bit(high: int, low: int) -> int:
     """Read 16-bit HP value from two bytes."""
     return (high << 8) | low
 
-def get_party_levels(memory_reader) -> list[int]:
+def get_party_levels(memory_reader, party_count: int | None = None) -> list[int]:
     """Get all party Pokemon levels.
     
     Args:
         memory_reader: Object with read_memory(address) method
+        party_count: Party size if already read (skips re-reading it)
         
     Returns:
         List of up to 6 Pokemon levels
@@ -326,7 +335,8 @@ def get_party_levels(memory_reader) -> list[int]:
         MEMORY_MAP["PARTY_LEVEL_3"], MEMORY_MAP["PARTY_LEVEL_4"],
         MEMORY_MAP["PARTY_LEVEL_5"], MEMORY_MAP["PARTY_LEVEL_6"]
     ]
-    party_count = memory_reader.read_memory(MEMORY_MAP["PARTY_COUNT"])
+    if party_count is None:
+        party_count = memory_reader.read_memory(MEMORY_MAP["PARTY_COUNT"])
     return [memory_reader.read_memory(addr) for addr in level_addresses[:party_count]]
 
 def get_opponent_levels(memory_reader) -> list[int]:
@@ -345,11 +355,12 @@ def get_opponent_levels(memory_reader) -> list[int]:
     ]
     return [memory_reader.read_memory(addr) for addr in opp_addresses]
 
-def get_hp_fraction(memory_reader) -> float:
+def get_hp_fraction(memory_reader, party_count: int | None = None) -> float:
     """Calculate party HP fraction (current / max).
     
     Args:
         memory_reader: Object with read_memory(address) method
+        party_count: Party size if already read (skips re-reading it)
         
     Returns:
         HP fraction (0.0 to 1.0)
@@ -363,7 +374,8 @@ def get_hp_fraction(memory_reader) -> float:
         (MEMORY_MAP["PARTY_HP_6"], MEMORY_MAP["PARTY_MAX_HP_6"]),
     ]
     
-    party_count = memory_reader.read_memory(MEMORY_MAP["PARTY_COUNT"])
+    if party_count is None:
+        party_count = memory_reader.read_memory(MEMORY_MAP["PARTY_COUNT"])
     if party_count == 0:
         return 1.0
     
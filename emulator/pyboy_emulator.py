@@ -6,6 +6,7 @@ from typing import Optional
 
 from pyboy import PyBoy
 from core.models import GameState
+from emulator.pokemon_memory import PARTY_BLOCK_LENGTH, PARTY_BLOCK_START
 
 
 @dataclass
@@ -82,18 +83,27 @@ class PyBoyEmulator:
         
         button_code = button_map.get(action.upper())
         if button_code:
+            # Hold for 8 frames, release for 8; tick(n) runs them in one call
             self.pyboy.button_press(button_code)
-            for _ in range(8):
-                self.pyboy.tick()
+            self.pyboy.tick(8)
             self.pyboy.button_release(button_code)
-            for _ in range(8):
-                self.pyboy.tick()
+            self.pyboy.tick(8)
 
     def read_memory(self, address: int) -> int:
         if not self._loaded or not self.pyboy:
             raise RuntimeError("Emulator not loaded.")
         return self.pyboy.memory[address]
     
+    def read_memory_range(self, start: int, length: int) -> bytes:
+        """Read a contiguous memory block in a single call."""
+        if not self._loaded or not self.pyboy:
+            raise RuntimeError("Emulator not loaded.")
+        return bytes(self.pyboy.memory[start:start + length])
+    
+    def read_party_block(self) -> bytes:
+        """Read the party block (see pokemon_memory.PARTY_BLOCK_START)."""
+        return self.read_memory_range(PARTY_BLOCK_START, PARTY_BLOCK_LENGTH)
+    
     def write_memory(self, address: int, value: int) -> None:
         if not self._loaded or not self.pyboy:
             raise RuntimeError("Emulator not loaded.")
@@ -102,8 +112,8 @@ class PyBoyEmulator:
     def tick(self, count: int = 1) -> None:
         if not self._loaded or not self.pyboy:
             raise RuntimeError("Emulator not loaded.")
-        for _ in range(count):
-            self.pyboy.tick()
+        if count > 0:
+            self.pyboy.tick(count)
     
     def stop(self) -> None:
         """Stop and cleanup the emulator."""
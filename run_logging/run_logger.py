@@ -15,6 +15,9 @@ class RunLogger:
         self.edition_dir = base_log_dir / edition
         self.edition_dir.mkdir(parents=True, exist_ok=True)
         self.counter_path = self.edition_dir / "run_counter.json"
+        # Decisions arrive many times per second; reuse the formatted second
+        self._ts_second = -1
+        self._ts_text = ""
 
     def start_run(self, milestones: Iterable[str]) -> int:
         run_id = self._next_run_id()
@@ -36,7 +39,7 @@ class RunLogger:
             "step": decision.step,
             "action": decision.action,
             "reason": decision.reason,
-            "timestamp": decision.timestamp,
+            "timestamp": self._format_ns(decision.timestamp),
             "state": {
                 "location": state.location,
                 "x": state.x,
@@ -125,3 +128,10 @@ class RunLogger:
 
     def _timestamp(self) -> str:
         return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    def _format_ns(self, timestamp_ns: int) -> str:
+        second = timestamp_ns // 1_000_000_000
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_text = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second))
+        return self._ts_text